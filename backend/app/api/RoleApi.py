@@ -22,7 +22,7 @@ class Role(BaseModel):
             summary="agregar un nuevo rol a la base de datos",
             status_code=status.HTTP_200_OK)
 async def create_role(data: RoleCreate):
-    return RoleManager.create(name=data.name, color=data.color)
+    return await RoleManager.create(name=data.name, color=data.color)
 
 
 @router.get(
@@ -31,7 +31,7 @@ async def create_role(data: RoleCreate):
             summary="obtener todos los roles de la base de datos",
             status_code=status.HTTP_200_OK)
 async def get_roles():
-    return RoleManager.read_all()
+    return await RoleManager.read_all()
 
 
 @router.get(
@@ -40,7 +40,7 @@ async def get_roles():
             summary="obtener un rol de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
 async def get_role(id: int):
-    return RoleManager.read_by_id(id)
+    return await RoleManager.read_by_id(id)
 
 
 @router.put(
@@ -49,7 +49,7 @@ async def get_role(id: int):
             summary="editar un rol de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
 async def update_role(id: int, data: RoleCreate):
-    return RoleManager.update(id, name=data.name, color=data.color)
+    return await RoleManager.update(id, name=data.name, color=data.color)
 
 
 @router.delete(
@@ -58,4 +58,4 @@ async def update_role(id: int, data: RoleCreate):
             summary="eliminar un rol de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
 async def delete_role(id: int):
-    return RoleManager.delete(id)
+    return await RoleManager.delete(id)
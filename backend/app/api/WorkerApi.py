@@ -1,11 +1,125 @@
-from fastapi import APIRouter, status
-from pydantic import BaseModel
-from services.workerManager import WorkerManager
+from fastapi import (APIRouter, Header, HTTPException, Query, Request,
+                     Response, status)
+from pydantic import BaseModel, ValidationError
+from services.workerManager import WorkerManager, WorkerUpdateConflict
 from services.speechService import SpeechService
+from services.imageUtils import ImageDecodeError, ImageUtils
 import base64
+import os
 
 router = APIRouter(prefix="/workers", tags=["Worker managing"])
 
+# Tipos de contenido aceptados para subir una foto en binario
+BINARY_CONTENT_TYPES = ("application/octet-stream", "image/")
+# Margen para los separadores y cabeceras de un cuerpo multipart
+MULTIPART_OVERHEAD = 16 * 1024
+# Audio de la verificación por defecto: "inline" (base64) o "ref" (GET /audio)
+AUDIO_RESPONSE_MODE = os.getenv("AUDIO_RESPONSE_MODE", "inline")
+AUDIO_MODE_QUERY = Query(
+    None, pattern="^(inline|ref)$",
+    description="inline: audio en base64 en `message`; ref: `message` es "
+                "el id del clip y `audio_url` su ruta en GET /audio/{id}")
+
+
+def audio_by_reference(audio: str | None) -> bool:
+    return (audio or AUDIO_RESPONSE_MODE) == "ref"
+
+
+def with_audio_type(reply: dict, audio_format: str) -> dict:
+    """
+    Agrega el tipo MIME del audio. El formato se negocia con los tipos
+    audio/* de Accept (p. ej. "application/json, audio/ogg;q=0.9").
+    """
+    reply["audio_type"] = SpeechService.mime_type(audio_format)
+    return reply
+
+
+def expected_version(body_version: int | None,
+                     if_match: str | None) -> int | None:
+    """
+    Versión de la fila que el cliente editó: el campo `version` del cuerpo
+    o la cabecera If-Match (p. ej. If-Match: "3").
+    """
+    if body_version is not None or not if_match:
+        return body_version
+    value = if_match.strip().removeprefix("W/").strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="If-Match debe ser la versión del "
+                                   "trabajador.")
+    return int(value)
+
+
+def image_error(e: ImageDecodeError) -> HTTPException:
+    """Respuesta HTTP para una foto rechazada por ImageUtils."""
+    if e.reason == "too_large":
+        return HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e))
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                         detail=str(e))
+
+
+async def read_limited_body(request: Request, limit: int) -> bytes:
+    """
+    Cuerpo de la petición leído por partes: se corta con 413 en cuanto
+    supera `limit` bytes (0 sin límite), también si llega sin
+    Content-Length (transfer-encoding chunked).
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                              detail="La imagen supera el tamaño máximo "
+                                     "permitido.")
+    # Cuerpos declarados demasiado grandes se rechazan antes de leerlos
+    declared = request.headers.get("content-length", "")
+    if limit and declared.isdigit() and int(declared) > limit:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if limit and len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+async def read_limited_form(request: Request):
+    """
+    Formulario multipart interpretado sobre el cuerpo ya leído y acotado a
+    max_image_bytes (más el margen de separadores y campos).
+    """
+    limit = ImageUtils.max_image_bytes
+    body = await read_limited_body(
+        request, limit + MULTIPART_OVERHEAD if limit else 0)
+
+    async def replay():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return await Request(request.scope, replay).form()
+
+
+async def form_photo(form) -> bytes:
+    """Bytes del archivo `photo` de un formulario multipart."""
+    upload = form.get("photo")
+    if upload is None or isinstance(upload, str):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Falta el archivo 'photo'.")
+    return await upload.read()
+
+
+async def read_binary_photo(request: Request) -> bytes:
+    """
+    Bytes de la foto enviada en binario: el cuerpo completo si es
+    application/octet-stream (o image/*), o el archivo `photo` si es
+    multipart/form-data. Sin base64 ni JSON de por medio.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        return await form_photo(await read_limited_form(request))
+    if content_type.startswith(BINARY_CONTENT_TYPES):
+        return await read_limited_body(request, ImageUtils.max_image_bytes)
+    raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="Use application/octet-stream o "
+                               "multipart/form-data.")
+
 
 class WorkerCreate(BaseModel):
     name: str
@@ -14,12 +128,19 @@ class WorkerCreate(BaseModel):
     photo: str
 
 
+class WorkerUpdate(WorkerCreate):
+    # Versión recibida en GET /workers/{id}; si la fila cambió desde
+    # entonces la edición se rechaza con 409
+    version: int | None = None
+
+
 class Worker(BaseModel):
     id: int
     name: str
     document: str
     role: int
     photo: str
+    version: int | None = None
 
 
 class verification(BaseModel):
@@ -30,6 +151,8 @@ class verification(BaseModel):
 class result(BaseModel):
     match: bool
     message: str
+    audio_url: str | None = None
+    audio_type: str | None = None
 
 
 @router.post(
@@ -38,17 +161,79 @@ class result(BaseModel):
             summary="agregar un nuevo worker a la base de datos",
             status_code=status.HTTP_200_OK)
 async def create_worker(data: WorkerCreate):
-    return WorkerManager.create(name=data.name, document=data.document,
-                                role=data.role, photo=data.photo)
+    try:
+        return await WorkerManager.create(name=data.name,
+                                          document=data.document,
+                                          role=data.role, photo=data.photo)
+    except ImageDecodeError as e:
+        raise image_error(e)
+
+
+@router.post(
+            "/upload",
+            response_model=Worker,
+            summary="agregar un nuevo worker con la foto en binario (multipart)",
+            status_code=status.HTTP_200_OK,
+            openapi_extra={"requestBody": {"required": True, "content": {
+                "multipart/form-data": {"schema": {
+                    "type": "object",
+                    "required": ["name", "document", "role", "photo"],
+                    "properties": {
+                        "name": {"type": "string"},
+                        "document": {"type": "string"},
+                        "role": {"type": "integer"},
+                        "photo": {"type": "string", "format": "binary"},
+                    }}}}}})
+async def create_worker_upload(request: Request):
+    """
+    Campos `name`, `document` y `role` y archivo `photo`. El cuerpo se lee
+    acotado (ver read_limited_form) antes de interpretar el formulario.
+    """
+    if not request.headers.get("content-type", "").startswith(
+            "multipart/form-data"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Use multipart/form-data.")
+    form = await read_limited_form(request)
+    try:
+        worker = WorkerCreate(name=form.get("name"),
+                              document=form.get("document"),
+                              role=form.get("role"), photo="")
+    except ValidationError as e:
+        raise HTTPException(status_code=422,
+                            detail=e.errors(include_url=False))
+    photo = await form_photo(form)
+    try:
+        return await WorkerManager.create(name=worker.name,
+                                          document=worker.document,
+                                          role=worker.role, photo=photo)
+    except ImageDecodeError as e:
+        raise image_error(e)
 
 
 @router.get(
             "/",
             response_model=list,
-            summary="obtener todos los workers de la base de datos",
+            summary="obtener una página de workers (sin foto por defecto)",
             status_code=status.HTTP_200_OK)
-async def get_workers():
-    return WorkerManager.read_all()
+async def get_workers(
+        response: Response,
+        fields: str | None = Query(
+            None, description="columnas separadas por coma, p. ej. id,name"),
+        after: int | None = Query(
+            None, description="cursor: id del último worker recibido"),
+        limit: int = Query(50, ge=1, le=WorkerManager.MAX_PAGE_SIZE)):
+    try:
+        workers, next_cursor = await WorkerManager.list_page(
+            fields=fields.split(",") if fields else None,
+            after=after, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=str(e))
+
+    # El cliente pide la siguiente página con ?after=<X-Next-Cursor>
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return workers
 
 
 @router.get(
@@ -57,7 +242,40 @@ async def get_workers():
             summary="obtener un worker de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
 async def get_worker(id: int):
-    return WorkerManager.read_by_id(id)
+    return await WorkerManager.read_by_id(id)
+
+
+@router.get(
+            "/{id}/photo",
+            summary="obtener la foto registrada de un worker en binario",
+            status_code=status.HTTP_200_OK)
+async def get_worker_photo(id: int):
+    photo = await WorkerManager.read_photo(id)
+    if photo is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="El trabajador no tiene foto registrada.")
+    return Response(content=photo,
+                    media_type=ImageUtils.guess_mime_type(photo),
+                    headers={"Cache-Control": "private, max-age=300"})
+
+
+@router.put(
+            "/{id}/photo",
+            response_model=Worker,
+            summary="reemplazar la foto de un worker (octet-stream o multipart)",
+            status_code=status.HTTP_200_OK)
+async def update_worker_photo(id: int, request: Request,
+                              if_match: str | None = Header(None)):
+    version = expected_version(None, if_match)
+    photo = await read_binary_photo(request)
+    try:
+        return await WorkerManager.update(id, expected_version=version,
+                                          photo=photo)
+    except WorkerUpdateConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=str(e))
+    except ImageDecodeError as e:
+        raise image_error(e)
 
 
 @router.put(
@@ -65,9 +283,19 @@ async def get_worker(id: int):
             response_model=Worker,
             summary="editar un worker de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
-async def update_worker(id: int, data: WorkerCreate):
-    return WorkerManager.update(id, name=data.name, document=data.document,
-                                role=data.role, photo=data.photo)
+async def update_worker(id: int, data: WorkerUpdate,
+                        if_match: str | None = Header(None)):
+    version = expected_version(data.version, if_match)
+    try:
+        return await WorkerManager.update(id, expected_version=version,
+                                          name=data.name,
+                                          document=data.document,
+                                          role=data.role, photo=data.photo)
+    except WorkerUpdateConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=str(e))
+    except ImageDecodeError as e:
+        raise image_error(e)
 
 
 @router.delete(
@@ -76,7 +304,7 @@ async def update_worker(id: int, data: WorkerCreate):
             summary="eliminar un worker de la base de datos en base a su id",
             status_code=status.HTTP_200_OK)
 async def delete_worker(id: int):
-    return WorkerManager.delete(id)
+    return await WorkerManager.delete(id)
 
 
 @router.post(
@@ -84,8 +312,13 @@ async def delete_worker(id: int):
             response_model=result,
             summary="verificar un trabajador segun su c.c. y foto",
             status_code=status.HTTP_200_OK)
-async def verify_worker(data: verification):
-    return WorkerManager.check_worker(data.cc, data.photo)
+async def verify_worker(data: verification, request: Request,
+                        audio: str | None = AUDIO_MODE_QUERY):
+    audio_format = SpeechService.negociar_formato(
+        request.headers.get("accept"))
+    reply = await WorkerManager.check_worker(
+        data.cc, data.photo, audio_by_reference(audio), audio_format)
+    return with_audio_type(reply, audio_format)
 
     try:
         if data.cc % 2 == 0:
@@ -107,3 +340,19 @@ async def verify_worker(data: verification):
             return {"match": True, "message": ""}
         else:
             return {"match": False, "message": ""}
+
+
+@router.post(
+            "/verify/{cc}",
+            response_model=result,
+            summary="verificar un trabajador con la foto en binario "
+                    "(octet-stream o multipart)",
+            status_code=status.HTTP_200_OK)
+async def verify_worker_binary(cc: int, request: Request,
+                               audio: str | None = AUDIO_MODE_QUERY):
+    audio_format = SpeechService.negociar_formato(
+        request.headers.get("accept"))
+    photo = await read_binary_photo(request)
+    reply = await WorkerManager.check_worker_bytes(
+        cc, photo, audio_by_reference(audio), audio_format)
+    return with_audio_type(reply, audio_format)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from core.executor import ComputeExecutor
+from services.audioCache import AudioCache
+
+router = APIRouter(prefix="/audio", tags=["Audio"])
+
+# El id es el hash del contenido: un clip nunca cambia para el mismo id.
+# Es privado porque los saludos incluyen el nombre del trabajador.
+AUDIO_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+@router.get("/{audio_id}",
+            summary="clip de audio sintetizado (respuesta de /workers/verify)",
+            responses={304: {"description": "El cliente ya tiene el clip"},
+                       404: {"description": "Clip desconocido o expirado"}})
+async def get_audio(audio_id: str, request: Request):
+    if not AudioCache.is_key(audio_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Audio no encontrado.")
+
+    etag = f'"{audio_id}"'
+    headers = {"ETag": etag, "Cache-Control": AUDIO_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+
+    audio = await ComputeExecutor.run_io(AudioCache.get, audio_id)
+    if audio is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Audio no encontrado.")
+    return Response(content=audio, media_type=AudioCache.mime_type(audio),
+                    headers=headers)
@@ -6,6 +6,15 @@ from fastapi import APIRouter
 from services.monitoringService import check_database
 from services.monitoringService import check_recognition_service
 from services.monitoringService import check_speech_service
+from core.executor import ComputeExecutor
+from db.repository import AsyncDatabase
+from services.templateStore import TemplateStore
+from services.audioCache import AudioCache
+from services.workerIndex import WorkerIndex
+from services.imageService import ImageService
+from services.roleManager import RoleManager
+from services.speechService import SpeechService
+from services.verificationStages import VerificationStages
 
 router = APIRouter()
 
@@ -74,3 +83,22 @@ async def full_status():
         },
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
     }
+
+
+@router.get("/metrics", tags=["Monitoring"])
+async def metrics():
+    """
+    Devuelve contadores internos de rendimiento (cachés, colas, etc.).
+    """
+    return {
+        "template_cache": TemplateStore.stats(),
+        "role_cache": RoleManager.stats(),
+        "worker_index": WorkerIndex.stats(),
+        "audio_cache": AudioCache.stats(),
+        "speech_pool": SpeechService.pool_stats(),
+        "face_cascade": ImageService.cascade_stats(),
+        "verification_stages": VerificationStages.stats(),
+        "executor": ComputeExecutor.stats(),
+        "db_single_flight": AsyncDatabase.coalescing_stats(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
@@ -0,0 +1,66 @@
+import asyncio
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from services.speechService import SpeechService
+
+router = APIRouter(prefix="/speech", tags=["Speech"])
+
+
+async def relay_events(websocket: WebSocket, sesion):
+    """Envía al cliente cada hipótesis en cuanto el servicio la produce."""
+    async for evento in sesion.eventos():
+        await websocket.send_json(evento)
+
+
+async def receive_audio(websocket: WebSocket, sesion):
+    """Pasa los trozos de PCM a la sesión hasta recibir el texto "end"."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes"):
+            sesion.escribir(message["bytes"])
+        elif message.get("text") == "end":
+            return
+
+
+@router.websocket("/stream")
+async def stream_recognition(
+        websocket: WebSocket,
+        sample_rate: int = Query(16000, ge=8000, le=48000),
+        channels: int = Query(1, ge=1, le=2)):
+    """
+    Reconocimiento de voz en tiempo real. El cliente envía trozos binarios
+    de PCM de 16 bits (little endian) mientras la persona habla y el texto
+    "end" al terminar. El servidor responde con JSON
+    {"type": "partial" | "final" | "error", ...} a medida que reconoce, y
+    {"type": "end"} antes de cerrar.
+    """
+    await websocket.accept()
+    try:
+        sesion = await SpeechService.reconocer_en_vivo(sample_rate, 16,
+                                                       channels)
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    relay = asyncio.create_task(relay_events(websocket, sesion))
+    try:
+        await receive_audio(websocket, sesion)
+        sesion.terminar()
+        # Sin más audio solo quedan las últimas hipótesis por llegar
+        await asyncio.wait_for(relay, SpeechService.timeout)
+        await websocket.send_json({"type": "end"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+    except asyncio.TimeoutError:
+        await websocket.send_json(
+            {"type": "error", "message": "El reconocimiento no terminó a tiempo."})
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        relay.cancel()
+        await sesion.detener()
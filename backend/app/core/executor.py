@@ -0,0 +1,170 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def _prewarm():
+    """
+    Carga cv2/skimage y reserva los buffers de SSIM en el proceso actual,
+    para que la primera verificación no pague esos costos.
+    """
+    import numpy as np
+    import skimage.metrics  # noqa: F401
+    from services.imageService import ImageService
+
+    img = np.zeros((32, 32), dtype=np.uint8)
+    ImageService.ssim(img, img)
+
+
+def _timed_call(fn, args, kwargs):
+    """Ejecuta `fn` en el pool y retorna (instante de inicio, resultado)."""
+    return time.time(), fn(*args, **kwargs)
+
+
+class _PoolStats:
+    """Contadores de una cola de trabajo (profundidad y tiempo de espera)."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 3)
+            if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class ComputeExecutor:
+    """
+    Ejecuta trabajo bloqueante fuera del event loop de asyncio.
+
+    - run_cpu: procesamiento de imágenes en un pool de procesos
+      (COMPUTE_PROCESSES; 0 lo ejecuta en el pool de hilos).
+    - run_io: llamadas bloqueantes (Supabase, Azure) en un pool de hilos
+      (IO_THREADS).
+    """
+
+    processes: int = int(os.getenv(
+        "COMPUTE_PROCESSES", str(min(4, os.cpu_count() or 1))))
+    io_threads: int = int(os.getenv("IO_THREADS", "16"))
+
+    _process_pool: ProcessPoolExecutor | None = None
+    _thread_pool: ThreadPoolExecutor | None = None
+    _lock = threading.Lock()
+    _stats: dict[str, _PoolStats] = {}
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    @classmethod
+    def start(cls):
+        """Crea los pools y precalienta todos los procesos de cómputo."""
+        cls._io_pool()
+        pool = cls._cpu_pool()
+        if pool is not None:
+            # Un envío por proceso fuerza a levantarlos (y precalentarlos)
+            futures = [pool.submit(os.getpid) for _ in range(cls.processes)]
+            for future in futures:
+                future.result()
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            process_pool, cls._process_pool = cls._process_pool, None
+            thread_pool, cls._thread_pool = cls._thread_pool, None
+            cls._stats = {}
+        if process_pool is not None:
+            process_pool.shutdown(cancel_futures=True)
+        if thread_pool is not None:
+            thread_pool.shutdown(cancel_futures=True)
+
+    # ============================================================
+    # EJECUCIÓN
+    # ============================================================
+    @classmethod
+    async def run_cpu(cls, fn, *args, **kwargs):
+        """Ejecuta una tarea de CPU (debe ser serializable con pickle)."""
+        pool = cls._cpu_pool()
+        if pool is None:
+            return await cls._run(cls._io_pool(), "cpu", fn, args, kwargs)
+        return await cls._run(pool, "cpu", fn, args, kwargs)
+
+    @classmethod
+    async def run_io(cls, fn, *args, **kwargs):
+        """Ejecuta una llamada bloqueante de entrada/salida."""
+        return await cls._run(cls._io_pool(), "io", fn, args, kwargs)
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {kind: s.as_dict() for kind, s in cls._stats.items()}
+
+    # ------------------------------------------------------------
+
+    @classmethod
+    async def _run(cls, pool, kind: str, fn, args, kwargs):
+        stats = cls._stats_for(kind, pool)
+        with cls._lock:
+            stats.submitted += 1
+            stats.in_flight += 1
+
+        submitted_at = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            started_at, result = await loop.run_in_executor(
+                pool, _timed_call, fn, args, kwargs)
+        except BaseException:
+            with cls._lock:
+                stats.in_flight -= 1
+                stats.failed += 1
+            raise
+
+        wait = max(started_at - submitted_at, 0.0)
+        with cls._lock:
+            stats.in_flight -= 1
+            stats.completed += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+        return result
+
+    @classmethod
+    def _stats_for(cls, kind: str, pool) -> _PoolStats:
+        with cls._lock:
+            stats = cls._stats.get(kind)
+            if stats is None:
+                stats = cls._stats[kind] = _PoolStats(pool._max_workers)
+            return stats
+
+    @classmethod
+    def _cpu_pool(cls) -> ProcessPoolExecutor | None:
+        if cls.processes <= 0:
+            return None
+        with cls._lock:
+            if cls._process_pool is None:
+                cls._process_pool = ProcessPoolExecutor(
+                    max_workers=cls.processes, initializer=_prewarm)
+            return cls._process_pool
+
+    @classmethod
+    def _io_pool(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._thread_pool is None:
+                cls._thread_pool = ThreadPoolExecutor(
+                    max_workers=cls.io_threads, thread_name_prefix="io")
+            return cls._thread_pool
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas asíncronas idénticas y concurrentes: mientras una
+    consulta con la misma clave está en curso, las demás esperan su
+    resultado en lugar de repetirla.
+
+    La consulta corre en una tarea propia protegida con shield, así que si
+    la petición que la inició se cancela, las que esperan igual reciben el
+    resultado.
+    """
+
+    def __init__(self):
+        self._in_flight: dict = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        """
+        Ejecuta `fn(*args)` o se une a la ejecución en curso para `key`.
+        Retorna (resultado, compartido), donde `compartido` indica si el
+        resultado vino de otra llamada.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.calls += 1
+            task = self._in_flight.get((loop, key))
+            shared = task is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                self.executed += 1
+                task = loop.create_task(fn(*args))
+                self._in_flight[(loop, key)] = task
+                task.add_done_callback(
+                    lambda _: self._forget((loop, key), task))
+
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.executed = self.coalesced = 0
+
+    def _forget(self, key, task):
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+
+class BlobBackend(ABC):
+    """
+    Almacén de objetos binarios direccionados por contenido: la referencia
+    de cada blob es el hash SHA-256 (hex) de sus bytes, así que guardar dos
+    veces la misma foto no duplica datos.
+    """
+
+    @staticmethod
+    def ref_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @abstractmethod
+    def put(self, data: bytes) -> str: ...
+
+    @abstractmethod
+    def get(self, ref: str) -> bytes | None: ...
+
+    @abstractmethod
+    def exists(self, ref: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, ref: str): ...
+
+
+# ============================================================
+# LOCAL → sistema de archivos (funciona sin conexión)
+# ============================================================
+class LocalBlobStore(BlobBackend):
+    """Guarda cada blob en <root>/<2 primeros caracteres>/<referencia>."""
+
+    _REF = re.compile(r"[0-9a-f]{64}")
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def put(self, data: bytes) -> str:
+        ref = self.ref_for(data)
+        path = self._path(ref)
+        if os.path.exists(path):
+            return ref
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: un lector nunca ve un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return ref
+
+    def get(self, ref: str) -> bytes | None:
+        try:
+            with open(self._path(ref), "rb") as blob:
+                return blob.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+    def delete(self, ref: str):
+        try:
+            os.unlink(self._path(ref))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, ref: str) -> str:
+        if not self._REF.fullmatch(ref or ""):
+            raise ValueError(f"Referencia de blob inválida: {ref!r}")
+        return os.path.join(self.root, ref[:2], ref)
+
+
+# ============================================================
+# FACHADA → usada por los managers
+# ============================================================
+class BlobStore:
+    """
+    Punto de acceso al almacén de blobs configurado con BLOB_BACKEND
+    ("local", en BLOB_ROOT). Las llamadas son bloqueantes: desde código
+    asíncrono se ejecutan con ComputeExecutor.run_io.
+
+    Sin BLOB_BACKEND el almacén está desactivado y las fotos se quedan en
+    base64 en la fila. Activarlo solo si BLOB_ROOT es un volumen
+    persistente y compartido por todas las instancias: las filas migradas
+    ya no guardan la foto.
+    """
+
+    _backend: BlobBackend | None = None
+    _configured: bool = False
+    _lock = threading.Lock()
+
+    ref_for = staticmethod(BlobBackend.ref_for)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._get_backend() is not None
+
+    @classmethod
+    def backend(cls) -> BlobBackend:
+        backend = cls._get_backend()
+        if backend is None:
+            raise RuntimeError(
+                "El BlobStore no está configurado (defina BLOB_BACKEND).")
+        return backend
+
+    @classmethod
+    def use(cls, backend: BlobBackend | None):
+        """
+        Reemplaza el backend (útil para pruebas y benchmarks). None lo
+        desactiva.
+        """
+        with cls._lock:
+            cls._backend = backend
+            cls._configured = True
+
+    @classmethod
+    def reset(cls):
+        """Vuelve a leer BLOB_BACKEND en el próximo acceso."""
+        with cls._lock:
+            cls._backend = None
+            cls._configured = False
+
+    @classmethod
+    def _get_backend(cls) -> BlobBackend | None:
+        with cls._lock:
+            if not cls._configured:
+                cls._backend = cls._create_backend()
+                cls._configured = True
+            return cls._backend
+
+    @staticmethod
+    def _create_backend() -> BlobBackend | None:
+        kind = os.getenv("BLOB_BACKEND", "").lower()
+        if not kind:
+            return None
+        if kind == "local":
+            return LocalBlobStore(os.getenv("BLOB_ROOT", "data/blobs"))
+        raise ValueError(f"BLOB_BACKEND no soportado: {kind}")
+
+    @classmethod
+    def put(cls, data: bytes) -> str:
+        return cls.backend().put(data)
+
+    @classmethod
+    def get(cls, ref: str) -> bytes | None:
+        return cls.backend().get(ref)
+
+    @classmethod
+    def exists(cls, ref: str) -> bool:
+        return cls.backend().exists(ref)
+
+    @classmethod
+    def delete(cls, ref: str):
+        cls.backend().delete(ref)
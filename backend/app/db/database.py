@@ -14,30 +14,46 @@ class Database:
     load_dotenv()  
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Sin credenciales no se crea el cliente (p. ej. con DB_BACKEND=sqlite)
+    client = (create_client(SUPABASE_URL, SUPABASE_KEY)
+              if SUPABASE_URL and SUPABASE_KEY else None)
 
     # Metodos para la tabla de trabajadores
+
+    @staticmethod
+    def _with_base64_photo(payload):
+        # Asegurar que la foto esté en base64 (acepta bytes o memoryview)
+        if isinstance(payload.get('photo'), (bytes, bytearray, memoryview)):
+            payload['photo'] = ImageUtils.binary_to_base64(payload['photo'])
+        return payload
     
     @classmethod
     def create_worker(cls, payload):
-        # Asegurar que la foto esté en base64
-        if 'photo' in payload and payload['photo']:
-            if isinstance(payload['photo'], bytes):
-                payload['photo'] = ImageUtils.binary_to_base64(payload['photo'])
+        payload = cls._with_base64_photo(payload)
         
         return (cls.client.table(cls.workers_table)
                 .insert(payload).execute()) 
     
     @classmethod
     def update_worker(cls, worker_id, payload):
-        # Asegurar que la foto esté en base64
-        if 'photo' in payload and payload['photo']:
-            if isinstance(payload['photo'], bytes):
-                payload['photo'] = ImageUtils.binary_to_base64(payload['photo'])
+        payload = cls._with_base64_photo(payload)
         
         return (cls.client.table(cls.workers_table)
                 .update(payload).eq("id", worker_id).execute())
     
+    @classmethod
+    def update_worker_if_version(cls, worker_id, payload, version):
+        """
+        Actualiza solo las columnas de `payload` si la fila sigue en la
+        versión `version` (concurrencia optimista). Si otra petición la
+        modificó antes, no se actualiza nada y `data` queda vacío.
+        """
+        payload = cls._with_base64_photo(payload)
+        payload = {**payload, "version": version + 1}
+        return (cls.client.table(cls.workers_table)
+                .update(payload).eq("id", worker_id).eq("version", version)
+                .execute())
+
     @classmethod
     def delete_worker(cls, worker_id):
         return (cls.client.table(cls.workers_table)
@@ -57,6 +73,18 @@ class Database:
         # Las fotos ya vienen en base64 desde la DB
         return result
     
+    @classmethod
+    def list_workers(cls, columns, after_id=None, limit=100):
+        """
+        Página de trabajadores ordenada por id (paginación por cursor):
+        solo las columnas pedidas y con id mayor que `after_id`.
+        """
+        query = (cls.client.table(cls.workers_table)
+                 .select(",".join(columns)))
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute()
+
     @classmethod
     def get_workers_by_document(cls, document):
         return (cls.client.table(cls.workers_table)
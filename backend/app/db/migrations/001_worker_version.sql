@@ -0,0 +1,3 @@
+-- Columna de versión para la concurrencia optimista de WorkerManager.update
+-- (ver Database.update_worker_if_version). Ejecutar en el editor SQL de Supabase.
+ALTER TABLE "Worker" ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 0;
@@ -0,0 +1,4 @@
+-- Las fotos se guardan en el BlobStore; la fila solo conserva la referencia
+-- (hash SHA-256 del contenido). Ejecutar luego: python -m db.photoMigration
+ALTER TABLE "Worker" ADD COLUMN IF NOT EXISTS photo_ref text;
+ALTER TABLE "Worker" ALTER COLUMN photo DROP NOT NULL;
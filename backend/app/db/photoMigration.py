@@ -0,0 +1,76 @@
+"""
+Mueve las fotos guardadas en base64 en la tabla Worker al BlobStore.
+
+Cada foto se decodifica, se guarda por su hash y la fila queda solo con la
+referencia (`photo_ref`) y `photo` en NULL. Es idempotente: las filas ya
+migradas se omiten, así que se puede interrumpir y volver a ejecutar.
+Requiere BLOB_BACKEND (y un BLOB_ROOT persistente y compartido).
+
+Uso (después de aplicar migrations/002_worker_photo_ref.sql):
+    cd backend/app
+    BLOB_BACKEND=local BLOB_ROOT=/ruta/persistente \
+        python -m db.photoMigration [--batch-size 100]
+"""
+import argparse
+import asyncio
+from core.executor import ComputeExecutor
+from db.blobStore import BlobStore
+from db.repository import AsyncDatabase
+from services.imageUtils import ImageDecodeError, ImageUtils
+
+
+async def migrate_photos(batch_size: int = 100) -> dict:
+    """Migra todas las filas pendientes y retorna los contadores."""
+    if not BlobStore.enabled():
+        raise RuntimeError(
+            "BLOB_BACKEND no está configurado: las fotos no se migran.")
+
+    counts = {"migrated": 0, "skipped": 0, "invalid": 0}
+    after = None
+    while True:
+        page = (await AsyncDatabase.list_workers(
+            ["id", "photo", "photo_ref"], after, batch_size)).data
+        if not page:
+            break
+        after = page[-1]["id"]
+
+        for worker in page:
+            photo = worker.get("photo")
+            if worker.get("photo_ref") or not photo:
+                counts["skipped"] += 1
+                continue
+            try:
+                photo_bytes = ImageUtils.decode_base64(photo, max_bytes=0)
+            except ImageDecodeError:
+                counts["invalid"] += 1
+                continue
+
+            ref = await ComputeExecutor.run_io(BlobStore.put, photo_bytes)
+            # La foto solo sale de la fila cuando el blob ya está guardado
+            if not await ComputeExecutor.run_io(BlobStore.exists, ref):
+                raise RuntimeError(f"No se pudo guardar el blob: {ref}")
+            await AsyncDatabase.update_worker(
+                worker["id"], {"photo_ref": ref, "photo": None})
+            counts["migrated"] += 1
+
+        if len(page) < batch_size:
+            break
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        counts = asyncio.run(migrate_photos(args.batch_size))
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    print(f"Fotos migradas: {counts['migrated']}, "
+          f"omitidas: {counts['skipped']}, inválidas: {counts['invalid']}")
+    ComputeExecutor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
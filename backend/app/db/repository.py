@@ -0,0 +1,402 @@
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from core.executor import ComputeExecutor
+from core.singleFlight import SingleFlight
+from db.database import Database
+from services.imageUtils import ImageUtils
+
+
+class QueryResult:
+    """Resultado de una consulta con la misma forma que la respuesta de
+    Supabase: las filas quedan en `data`."""
+
+    def __init__(self, data: list):
+        self.data = data
+
+
+class Repository(ABC):
+    """
+    Operaciones asíncronas sobre las tablas de trabajadores y roles.
+    Los métodos replican los de Database y retornan objetos con `.data`.
+    """
+
+    # Metodos para la tabla de trabajadores
+
+    @abstractmethod
+    async def create_worker(self, payload): ...
+
+    @abstractmethod
+    async def update_worker(self, worker_id, payload): ...
+
+    @abstractmethod
+    async def update_worker_if_version(self, worker_id, payload, version): ...
+
+    @abstractmethod
+    async def delete_worker(self, worker_id): ...
+
+    @abstractmethod
+    async def get_worker(self, worker_id): ...
+
+    @abstractmethod
+    async def get_worker_list(self): ...
+
+    @abstractmethod
+    async def list_workers(self, columns, after_id=None, limit=100): ...
+
+    @abstractmethod
+    async def get_workers_by_document(self, document): ...
+
+    # Metodos para la tabla de roles
+
+    @abstractmethod
+    async def create_role(self, payload): ...
+
+    @abstractmethod
+    async def get_role_list(self): ...
+
+    @abstractmethod
+    async def get_role(self, role_id): ...
+
+    @abstractmethod
+    async def delete_role(self, role_id): ...
+
+    @abstractmethod
+    async def update_role(self, role_id, payload): ...
+
+
+# ============================================================
+# SUPABASE → cliente síncrono ejecutado en el pool de hilos
+# ============================================================
+class SupabaseRepository(Repository):
+
+    def __init__(self):
+        if Database.client is None:
+            raise ValueError(
+                "Las variables SUPABASE_URL y SUPABASE_KEY "
+                "deben estar definidas en el entorno."
+            )
+
+    async def create_worker(self, payload):
+        return await ComputeExecutor.run_io(Database.create_worker, payload)
+
+    async def update_worker(self, worker_id, payload):
+        return await ComputeExecutor.run_io(Database.update_worker,
+                                            worker_id, payload)
+
+    async def update_worker_if_version(self, worker_id, payload, version):
+        return await ComputeExecutor.run_io(Database.update_worker_if_version,
+                                            worker_id, payload, version)
+
+    async def delete_worker(self, worker_id):
+        return await ComputeExecutor.run_io(Database.delete_worker, worker_id)
+
+    async def get_worker(self, worker_id):
+        return await ComputeExecutor.run_io(Database.get_worker, worker_id)
+
+    async def get_worker_list(self):
+        return await ComputeExecutor.run_io(Database.get_worker_list)
+
+    async def list_workers(self, columns, after_id=None, limit=100):
+        return await ComputeExecutor.run_io(Database.list_workers,
+                                            columns, after_id, limit)
+
+    async def get_workers_by_document(self, document):
+        return await ComputeExecutor.run_io(Database.get_workers_by_document,
+                                            document)
+
+    async def create_role(self, payload):
+        return await ComputeExecutor.run_io(Database.create_role, payload)
+
+    async def get_role_list(self):
+        return await ComputeExecutor.run_io(Database.get_role_list)
+
+    async def get_role(self, role_id):
+        return await ComputeExecutor.run_io(Database.get_role, role_id)
+
+    async def delete_role(self, role_id):
+        return await ComputeExecutor.run_io(Database.delete_role, role_id)
+
+    async def update_role(self, role_id, payload):
+        return await ComputeExecutor.run_io(Database.update_role,
+                                            role_id, payload)
+
+
+# ============================================================
+# SQLITE → backend local (archivo o memoria), sin Supabase
+# ============================================================
+class SQLiteRepository(Repository):
+
+    SCHEMA = {
+        Database.workers_table: ("id", "name", "document", "role", "photo",
+                                 "photo_ref", "version"),
+        Database.roles_table: ("id", "name", "color"),
+    }
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{Database.workers_table}" ('
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, "
+                "document TEXT, role INTEGER, photo TEXT, photo_ref TEXT, "
+                "version INTEGER NOT NULL DEFAULT 0)")
+            # Archivos creados antes de guardar las fotos en el BlobStore
+            columns = {row["name"] for row in self._conn.execute(
+                f'PRAGMA table_info("{Database.workers_table}")')}
+            if "photo_ref" not in columns:
+                self._conn.execute(
+                    f'ALTER TABLE "{Database.workers_table}" '
+                    "ADD COLUMN photo_ref TEXT")
+            self._conn.execute(
+                f'CREATE INDEX IF NOT EXISTS worker_document ON '
+                f'"{Database.workers_table}" (document)')
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{Database.roles_table}" ('
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, "
+                "color TEXT)")
+
+    # Metodos para la tabla de trabajadores
+
+    async def create_worker(self, payload):
+        return await self._run(self._insert, Database.workers_table,
+                               self._with_base64_photo(payload))
+
+    async def update_worker(self, worker_id, payload):
+        return await self._run(self._update, Database.workers_table,
+                               worker_id, self._with_base64_photo(payload))
+
+    async def update_worker_if_version(self, worker_id, payload, version):
+        return await self._run(self._update_if_version,
+                               Database.workers_table, worker_id,
+                               self._with_base64_photo(payload), version)
+
+    async def delete_worker(self, worker_id):
+        return await self._run(self._delete, Database.workers_table,
+                               worker_id)
+
+    async def get_worker(self, worker_id):
+        return await self._run(self._select, Database.workers_table,
+                               "id", worker_id)
+
+    async def get_worker_list(self):
+        return await self._run(self._select, Database.workers_table)
+
+    async def list_workers(self, columns, after_id=None, limit=100):
+        return await self._run(self._page, Database.workers_table,
+                               columns, after_id, limit)
+
+    async def get_workers_by_document(self, document):
+        return await self._run(self._select, Database.workers_table,
+                               "document", document)
+
+    # Metodos para la tabla de roles
+
+    async def create_role(self, payload):
+        return await self._run(self._insert, Database.roles_table, payload)
+
+    async def get_role_list(self):
+        return await self._run(self._select, Database.roles_table)
+
+    async def get_role(self, role_id):
+        return await self._run(self._select, Database.roles_table,
+                               "id", role_id)
+
+    async def delete_role(self, role_id):
+        return await self._run(self._delete, Database.roles_table, role_id)
+
+    async def update_role(self, role_id, payload):
+        return await self._run(self._update, Database.roles_table,
+                               role_id, payload)
+
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _with_base64_photo(payload: dict) -> dict:
+        # Igual que Database: la foto se guarda en base64
+        if isinstance(payload.get("photo"), (bytes, bytearray, memoryview)):
+            payload = dict(payload,
+                           photo=ImageUtils.binary_to_base64(payload["photo"]))
+        return payload
+
+    async def _run(self, fn, *args):
+        return await ComputeExecutor.run_io(self._locked, fn, *args)
+
+    def _locked(self, fn, *args) -> QueryResult:
+        with self._lock, self._conn:
+            return QueryResult(fn(*args))
+
+    def _columns(self, table: str, payload) -> list:
+        unknown = set(payload) - set(self.SCHEMA[table])
+        if unknown:
+            raise ValueError(f"Columnas desconocidas en {table}: {unknown}")
+        return list(payload)
+
+    def _select(self, table: str, column: str | None = None, value=None):
+        query = f'SELECT * FROM "{table}"'
+        params = ()
+        if column is not None:
+            query += f" WHERE {column} = ?"
+            params = (value,)
+        rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def _page(self, table: str, columns, after_id, limit: int):
+        columns = self._columns(table, columns)
+        rows = self._conn.execute(
+            f'SELECT {", ".join(columns)} FROM "{table}" '
+            "WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id if after_id is not None else -1, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def _insert(self, table: str, payload: dict):
+        columns = self._columns(table, payload)
+        placeholders = ", ".join("?" for _ in columns)
+        cursor = self._conn.execute(
+            f'INSERT INTO "{table}" ({", ".join(columns)}) '
+            f"VALUES ({placeholders})",
+            [payload[c] for c in columns])
+        return self._select(table, "id", cursor.lastrowid)
+
+    def _update(self, table: str, row_id, payload: dict):
+        columns = self._columns(table, payload)
+        if columns:
+            assignments = ", ".join(f"{c} = ?" for c in columns)
+            self._conn.execute(
+                f'UPDATE "{table}" SET {assignments} WHERE id = ?',
+                [payload[c] for c in columns] + [row_id])
+        return self._select(table, "id", payload.get("id", row_id))
+
+    def _update_if_version(self, table: str, row_id, payload: dict,
+                           version: int):
+        columns = self._columns(table, payload)
+        assignments = "".join(f"{c} = ?, " for c in columns)
+        cursor = self._conn.execute(
+            f'UPDATE "{table}" SET {assignments}version = version + 1 '
+            "WHERE id = ? AND version = ?",
+            [payload[c] for c in columns] + [row_id, version])
+        if cursor.rowcount == 0:
+            return []
+        return self._select(table, "id", row_id)
+
+    def _delete(self, table: str, row_id):
+        rows = self._select(table, "id", row_id)
+        self._conn.execute(f'DELETE FROM "{table}" WHERE id = ?', (row_id,))
+        return rows
+
+
+# ============================================================
+# FACHADA ASÍNCRONA → usada por los managers
+# ============================================================
+class AsyncDatabase:
+    """
+    Punto de acceso asíncrono a los datos. Delega en el backend configurado
+    con DB_BACKEND: "supabase" (por defecto) o "sqlite" (DB_PATH, por
+    defecto en memoria).
+
+    Las lecturas por clave (get_worker, get_workers_by_document, get_role y
+    get_role_list) pasan por un SingleFlight: las consultas idénticas y
+    concurrentes comparten una sola ida a la base de datos.
+    """
+
+    _backend: Repository | None = None
+    _lock = threading.Lock()
+    _reads = SingleFlight()
+
+    @classmethod
+    def backend(cls) -> Repository:
+        with cls._lock:
+            if cls._backend is None:
+                cls._backend = cls._create_backend()
+            return cls._backend
+
+    @classmethod
+    def use(cls, backend: Repository | None):
+        """Reemplaza el backend (útil para pruebas y benchmarks)."""
+        with cls._lock:
+            cls._backend = backend
+
+    @classmethod
+    def coalescing_stats(cls) -> dict:
+        return cls._reads.stats()
+
+    @classmethod
+    async def _coalesced(cls, method: str, *args):
+        backend = cls.backend()
+        result, shared = await cls._reads.do(
+            (id(backend), method, args), getattr(backend, method), *args)
+        if shared:
+            # Copia de las filas: quien la reciba puede modificarlas
+            return QueryResult([dict(row) for row in result.data])
+        return result
+
+    @staticmethod
+    def _create_backend() -> Repository:
+        kind = os.getenv("DB_BACKEND", "supabase").lower()
+        if kind == "sqlite":
+            return SQLiteRepository(os.getenv("DB_PATH", ":memory:"))
+        if kind == "supabase":
+            return SupabaseRepository()
+        raise ValueError(f"DB_BACKEND no soportado: {kind}")
+
+    # Metodos para la tabla de trabajadores
+
+    @classmethod
+    async def create_worker(cls, payload):
+        return await cls.backend().create_worker(payload)
+
+    @classmethod
+    async def update_worker(cls, worker_id, payload):
+        return await cls.backend().update_worker(worker_id, payload)
+
+    @classmethod
+    async def update_worker_if_version(cls, worker_id, payload, version):
+        return await cls.backend().update_worker_if_version(
+            worker_id, payload, version)
+
+    @classmethod
+    async def delete_worker(cls, worker_id):
+        return await cls.backend().delete_worker(worker_id)
+
+    @classmethod
+    async def get_worker(cls, worker_id):
+        return await cls._coalesced("get_worker", worker_id)
+
+    @classmethod
+    async def get_worker_list(cls):
+        return await cls.backend().get_worker_list()
+
+    @classmethod
+    async def list_workers(cls, columns, after_id=None, limit=100):
+        return await cls.backend().list_workers(columns, after_id, limit)
+
+    @classmethod
+    async def get_workers_by_document(cls, document):
+        return await cls._coalesced("get_workers_by_document", document)
+
+    # Metodos para la tabla de roles
+
+    @classmethod
+    async def create_role(cls, payload):
+        return await cls.backend().create_role(payload)
+
+    @classmethod
+    async def get_role_list(cls):
+        # Recarga de la caché de RoleManager: también se agrupa
+        return await cls._coalesced("get_role_list")
+
+    @classmethod
+    async def get_role(cls, role_id):
+        return await cls._coalesced("get_role", role_id)
+
+    @classmethod
+    async def delete_role(cls, role_id):
+        return await cls.backend().delete_role(role_id)
+
+    @classmethod
+    async def update_role(cls, role_id, payload):
+        return await cls.backend().update_role(role_id, payload)
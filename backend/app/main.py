@@ -1,8 +1,49 @@
+from contextlib import asynccontextmanager
 from core.CORS import setup_cors
+from core.executor import ComputeExecutor
+from services.speechService import SpeechService
+from services.workerIndex import WorkerIndex
+from services.workerManager import WorkerManager
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 import os
-from api import monitoringApi, adminApi, RoleApi, WorkerApi
+from api import (monitoringApi, adminApi, RoleApi, WorkerApi, audioApi,
+                 speechApi)
+
+# ------------------------------------------------------------------------------
+# Lifespan (arranque / apagado)
+# ------------------------------------------------------------------------------
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Levanta y precalienta los pools de cómputo, el índice de trabajadores,
+    las conexiones con el servicio de voz y el audio de las respuestas fijas
+    antes de recibir tráfico, y cierra los pools al apagar el servidor.
+    """
+    ComputeExecutor.start()
+    if WorkerIndex.preload_enabled:
+        try:
+            loaded = await WorkerManager.preload_index()
+            print(f"Índice de trabajadores precargado: {loaded}")
+        except Exception as e:
+            # Sin precarga el índice se llena con las verificaciones
+            print(f"No se pudo precargar el índice de trabajadores: {e}")
+    try:
+        opened = await ComputeExecutor.run_io(SpeechService.precalentar)
+        print(f"Conexiones de voz precalentadas: {opened}")
+    except Exception as e:
+        # Sin precalentar, cada sintetizador conecta en su primer uso
+        print(f"No se pudo precalentar el servicio de voz: {e}")
+    try:
+        await WorkerManager.prerender_messages()
+    except Exception as e:
+        # Sin prerenderizado los mensajes se sintetizan al primer uso
+        print(f"No se pudo prerenderizar el audio de las respuestas: {e}")
+    yield
+    await WorkerManager.drain_background()
+    ComputeExecutor.shutdown()
 
 # ------------------------------------------------------------------------------
 # Application Metadata
@@ -21,6 +62,7 @@ app = FastAPI(
         "url": "https://github.com/your-org/worker-management-app",
         "email": "support@yourorg.com",
     },
+    lifespan=lifespan,
 )
 
 setup_cors(app)
@@ -41,6 +83,8 @@ app.include_router(monitoringApi.router)
 app.include_router(adminApi.router)
 app.include_router(RoleApi.router)
 app.include_router(WorkerApi.router)
+app.include_router(audioApi.router)
+app.include_router(speechApi.router)
 
 
 # ------------------------------------------------------------------------------
@@ -0,0 +1,274 @@
+import hashlib
+import inspect
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from core.executor import ComputeExecutor
+from core.singleFlight import SingleFlight
+
+
+class AudioCache:
+    """
+    Caché persistente de audio sintetizado, direccionada por contenido: la
+    clave es el hash de (texto, voz, formato de salida), así que el mismo
+    mensaje nunca se vuelve a pedir al servicio de voz.
+
+    - Memoria: LRU acotada en bytes (AUDIO_CACHE_MEMORY_BYTES).
+    - Disco: AUDIO_CACHE_DIR, acotado en bytes (AUDIO_CACHE_DISK_BYTES);
+      al llenarse se borran los clips usados hace más tiempo. El orden de
+      uso y los tamaños se llevan en memoria (_disk_index): el directorio
+      solo se recorre una vez, fuera del lock.
+    Las frases fijas se marcan como permanentes (pinned) y no se expulsan.
+    """
+
+    memory_bytes: int = int(os.getenv("AUDIO_CACHE_MEMORY_BYTES",
+                                      str(32 * 1024 * 1024)))
+    disk_bytes: int = int(os.getenv("AUDIO_CACHE_DISK_BYTES",
+                                    str(512 * 1024 * 1024)))
+    root: str = os.getenv("AUDIO_CACHE_DIR", "data/audio")
+
+    _memory: OrderedDict = OrderedDict()
+    _memory_used: int = 0
+    _pinned: set = set()
+    _disk_used: int | None = None  # se calcula en la primera escritura
+    # Clips en disco: clave → tamaño, del usado hace más tiempo al último
+    _disk_index: OrderedDict | None = None
+    _lock = threading.Lock()
+    _renders = SingleFlight()
+    _KEY = re.compile(r"[0-9a-f]{64}")
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+
+    @staticmethod
+    def key(text: str, voice: str, output_format: str) -> str:
+        material = f"{voice}\x00{output_format}\x00{text}".encode("utf-8")
+        return hashlib.sha256(material).hexdigest()
+
+    # ============================================================
+    # LECTURA → memoria, disco y, si no está, el sintetizador
+    # ============================================================
+    @classmethod
+    async def render(cls, text: str, voice: str, output_format: str,
+                     synthesize, pinned: bool = False) -> bytes:
+        """
+        Audio de `text`; solo si no está en caché llama a
+        `synthesize(text)`: se espera si es asíncrona y, si es bloqueante,
+        se ejecuta en el pool de E/S.
+        Las peticiones concurrentes del mismo clip comparten la síntesis.
+        """
+        key = cls.key(text, voice, output_format)
+        if pinned:
+            with cls._lock:
+                cls._pinned.add(key)
+
+        audio = cls._from_memory(key)
+        if audio is not None:
+            return audio
+
+        audio, _ = await cls._renders.do(key, cls._load_or_synthesize,
+                                         key, text, synthesize)
+        return audio
+
+    @classmethod
+    def is_key(cls, key: str) -> bool:
+        return bool(cls._KEY.fullmatch(key or ""))
+
+    @classmethod
+    def get(cls, key: str) -> bytes | None:
+        """Clip ya renderizado (memoria o disco), sin sintetizar."""
+        if not cls.is_key(key):
+            return None
+        audio = cls._from_memory(key)
+        if audio is None:
+            audio = cls._read_disk(key)
+            if audio is not None:
+                cls._to_memory(key, audio)
+        return audio
+
+    @staticmethod
+    def mime_type(audio: bytes) -> str:
+        """Tipo MIME de un clip según su cabecera."""
+        if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+            return "audio/wav"
+        if audio.startswith(b"OggS"):
+            return "audio/ogg"
+        if audio.startswith(b"ID3") or audio[:2] in (b"\xff\xfb", b"\xff\xf3",
+                                                      b"\xff\xf2"):
+            return "audio/mpeg"
+        if audio.startswith(b"\x1aE\xdf\xa3"):
+            return "audio/webm"
+        return "application/octet-stream"
+
+    # ============================================================
+    # ADMINISTRACIÓN
+    # ============================================================
+    @classmethod
+    def clear(cls, root: str | None = None):
+        """Vacía la memoria y los contadores (el disco se conserva)."""
+        with cls._lock:
+            cls._memory.clear()
+            cls._memory_used = 0
+            cls._pinned.clear()
+            cls._disk_used = None
+            cls._disk_index = None
+            if root is not None:
+                cls.root = root
+            cls.memory_hits = cls.disk_hits = cls.misses = 0
+            cls.memory_evictions = cls.disk_evictions = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "memory_entries": len(cls._memory),
+                "memory_bytes": cls._memory_used,
+                "max_memory_bytes": cls.memory_bytes,
+                "disk_bytes": cls._disk_used,
+                "max_disk_bytes": cls.disk_bytes,
+                "pinned": len(cls._pinned),
+                "memory_hits": cls.memory_hits,
+                "disk_hits": cls.disk_hits,
+                "misses": cls.misses,
+                "memory_evictions": cls.memory_evictions,
+                "disk_evictions": cls.disk_evictions,
+            }
+
+    # ------------------------------------------------------------
+
+    @classmethod
+    async def _load_or_synthesize(cls, key: str, text: str, synthesize):
+        audio = await ComputeExecutor.run_io(cls._read_disk, key)
+        if audio is None:
+            with cls._lock:
+                cls.misses += 1
+            if inspect.iscoroutinefunction(synthesize):
+                audio = await synthesize(text)
+            else:
+                audio = await ComputeExecutor.run_io(synthesize, text)
+            await ComputeExecutor.run_io(cls._write_disk, key, audio)
+        cls._to_memory(key, audio)
+        return audio
+
+    @classmethod
+    def _from_memory(cls, key: str) -> bytes | None:
+        with cls._lock:
+            audio = cls._memory.get(key)
+            if audio is not None:
+                cls._memory.move_to_end(key)
+                cls.memory_hits += 1
+            return audio
+
+    @classmethod
+    def _to_memory(cls, key: str, audio: bytes):
+        with cls._lock:
+            if key in cls._memory or len(audio) > cls.memory_bytes:
+                return
+            cls._memory[key] = audio
+            cls._memory_used += len(audio)
+            # Se expulsan primero los menos usados que no son permanentes
+            for candidate in list(cls._memory):
+                if cls._memory_used <= cls.memory_bytes:
+                    break
+                if candidate in cls._pinned or candidate == key:
+                    continue
+                cls._memory_used -= len(cls._memory.pop(candidate))
+                cls.memory_evictions += 1
+
+    @classmethod
+    def _path(cls, key: str) -> str:
+        return os.path.join(cls.root, key[:2], key)
+
+    @classmethod
+    def _read_disk(cls, key: str) -> bytes | None:
+        path = cls._path(key)
+        try:
+            with open(path, "rb") as clip:
+                audio = clip.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # la fecha de modificación marca el último uso
+        with cls._lock:
+            cls.disk_hits += 1
+            cls._index_locked(key, len(audio))
+        return audio
+
+    @classmethod
+    def _write_disk(cls, key: str, audio: bytes):
+        path = cls._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if cls._disk_index is None:
+            # Primera escritura: se recorre el disco sin bloquear el lock
+            scanned = sorted(cls._disk_files(), key=lambda f: f[1])
+            with cls._lock:
+                if cls._disk_index is None:
+                    cls._disk_index = OrderedDict(
+                        (os.path.basename(p), size) for p, _, size in scanned)
+                    cls._disk_used = sum(cls._disk_index.values())
+
+        with cls._lock:
+            cls._index_locked(key, len(audio))
+            evicted = cls._evict_disk_locked(keep=key) \
+                if cls._disk_used > cls.disk_bytes else []
+
+        for name in evicted:
+            try:
+                os.unlink(cls._path(name))
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def _disk_files(cls):
+        for folder, _, files in os.walk(cls.root):
+            for name in files:
+                if not cls.is_key(name):
+                    continue  # temporales de escrituras en curso
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    @classmethod
+    def _index_locked(cls, key: str, size: int):
+        """Marca el clip como el último usado (si el índice ya existe)."""
+        if cls._disk_index is None:
+            return
+        if key in cls._disk_index:
+            cls._disk_index.move_to_end(key)
+            return
+        cls._disk_index[key] = size
+        cls._disk_used += size
+
+    @classmethod
+    def _evict_disk_locked(cls, keep: str) -> list[str]:
+        """
+        Saca del índice los clips usados hace más tiempo hasta volver al
+        límite y retorna sus claves; los archivos se borran fuera del lock.
+        """
+        evicted = []
+        for name, size in list(cls._disk_index.items()):
+            if cls._disk_used <= cls.disk_bytes:
+                break
+            if name in cls._pinned or name == keep:
+                continue
+            del cls._disk_index[name]
+            cls._disk_used -= size
+            cls.disk_evictions += 1
+            evicted.append(name)
+        return evicted
@@ -1,28 +1,244 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
 import cv2
 import numpy as np
 
 
+def _parse_size(value: str | None) -> tuple[int, int] | None:
+    """Convierte "ANCHOxALTO" (p. ej. "320x240") en una tupla (ancho, alto)."""
+    if not value:
+        return None
+    width, height = (int(x) for x in value.lower().split("x"))
+    return width, height
+
+
+def _pyramid(img: np.ndarray, levels: int) -> list[np.ndarray]:
+    """Pirámide gaussiana: [original, 1/2, 1/4, ...] con `levels` reducciones."""
+    pyramid = [img]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+class FaceTemplate:
+    """
+    Foto registrada de un trabajador ya decodificada y en escala de grises.
+
+    Guarda además la última versión redimensionada, ya que las cámaras de
+    un mismo punto de acceso suelen enviar siempre el mismo tamaño.
+    """
+
+    def __init__(self, gray: np.ndarray):
+        self.gray = gray
+        self._resized = gray
+        self._pyramid = (None, None)
+
+    def resized(self, shape: tuple) -> np.ndarray:
+        """Retorna la plantilla con el alto y ancho de `shape`."""
+        resized = self._resized
+        if resized.shape[:2] != shape[:2]:
+            resized = cv2.resize(self.gray, (shape[1], shape[0]))
+            self._resized = resized
+        return resized
+
+    def pyramid(self, shape: tuple, levels: int) -> list[np.ndarray]:
+        """Pirámide de la plantilla redimensionada a `shape` (ver _pyramid)."""
+        key = (shape[:2], levels)
+        cached_key, pyramid = self._pyramid
+        if cached_key != key:
+            pyramid = _pyramid(self.resized(shape), levels)
+            self._pyramid = (key, pyramid)
+        return pyramid
+
+    def for_shape(self, shape: tuple, levels: int = 0) -> "FaceTemplate":
+        """
+        Copia liviana con solo la plantilla redimensionada a `shape` (y su
+        pirámide): es lo que viaja al pool de procesos, en lugar de la foto
+        a resolución completa. El redimensionado queda en esta plantilla.
+        """
+        slim = FaceTemplate(self.resized(shape))
+        if levels > 0:
+            slim._pyramid = ((shape[:2], levels), self.pyramid(shape, levels))
+        return slim
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por la plantilla y sus versiones derivadas."""
+        arrays = {id(a): a for a in (self.gray, self._resized,
+                                     *(self._pyramid[1] or ()))}
+        return sum(a.nbytes for a in arrays.values())
+
+
+class VerificationContext:
+    """
+    Imagen recibida en una verificación, decodificada una sola vez.
+
+    Los planos derivados (escala de grises y ROI de la camiseta en HSV) se
+    calculan de forma perezosa y se comparten entre check_face y check_role.
+    """
+
+    # Región de la camiseta: tercio inferior-central (fracciones de alto/ancho)
+    SHIRT_REGION = (0.55, 0.90, 0.25, 0.75)
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self._pyramid = None
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+
+    def pyramid(self, levels: int) -> list[np.ndarray]:
+        """Pirámide del plano en grises (ver _pyramid)."""
+        pyramid = self._pyramid
+        if pyramid is None or len(pyramid) <= levels:
+            pyramid = _pyramid(self.gray, levels)
+            self._pyramid = pyramid
+        return pyramid[:levels + 1]
+
+    @cached_property
+    def shirt_hsv(self) -> np.ndarray:
+        h, w = self.image.shape[:2]
+        top, bottom, left, right = self.SHIRT_REGION
+
+        shirt_region = self.image[int(h * top):int(h * bottom),
+                                  int(w * left):int(w * right)]
+
+        return cv2.cvtColor(shirt_region, cv2.COLOR_BGR2HSV)
+
+
 class ImageService:
     """Servicio estático para procesamiento de imágenes."""
 
+    # Resolución canónica de trabajo (ancho, alto). Si está definida, tanto
+    # la imagen recibida como la foto registrada se normalizan a ese tamaño
+    # y los JPEG se decodifican directamente a escala reducida.
+    # None conserva el comportamiento original (tamaño de la imagen recibida).
+    working_size: tuple[int, int] | None = _parse_size(
+        os.getenv("IMAGE_WORKING_SIZE"))
+
+    # Flags de decodificación reducida de OpenCV por factor de escala
+    _REDUCED_FLAGS = (
+        (8, cv2.IMREAD_REDUCED_COLOR_8),
+        (4, cv2.IMREAD_REDUCED_COLOR_4),
+        (2, cv2.IMREAD_REDUCED_COLOR_2),
+    )
+
     @staticmethod
-    def _bytes_to_image(img_bytes: bytes):
-        """Convierte bytes a un arreglo de imagen usando OpenCV."""
+    def _bytes_to_image(img_bytes: bytes, size: tuple[int, int] | None = None):
+        """
+        Convierte bytes a un arreglo de imagen usando OpenCV.
+
+        size: (ancho, alto) opcional. Si se indica, la imagen se entrega con
+        ese tamaño; en JPEG se usa el mayor factor de reducción que no quede
+        por debajo del tamaño pedido, sin materializar la resolución completa.
+        """
         if not img_bytes:
             raise ValueError("La imagen recibida está vacía.")
 
+        flags = cv2.IMREAD_COLOR
+        if size is not None:
+            flags = ImageService._reduced_flag(img_bytes, size)
+
         img_array = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        img = cv2.imdecode(img_array, flags)
 
         if img is None:
             raise ValueError("Los bytes no corresponden a una imagen válida.")
 
+        if size is not None and (img.shape[1], img.shape[0]) != size:
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
         return img
 
+    @classmethod
+    def probe_shape(cls, img_bytes: bytes) -> tuple[int, int] | None:
+        """
+        (alto, ancho) que tendrá la imagen recibida al decodificarla, sin
+        decodificarla: IMAGE_WORKING_SIZE o la cabecera del JPEG. None si no
+        se puede saber (si la orientación EXIF lo cambia, la comparación
+        redimensiona igual).
+        """
+        if cls.working_size is not None:
+            return cls.working_size[1], cls.working_size[0]
+        dimensions = cls._jpeg_dimensions(img_bytes)
+        if dimensions is None:
+            return None
+        return dimensions[1], dimensions[0]
+
+    @staticmethod
+    def _reduced_flag(img_bytes: bytes, size: tuple[int, int]) -> int:
+        """Elige el flag IMREAD_REDUCED_* adecuado para llegar a `size`."""
+        dimensions = ImageService._jpeg_dimensions(img_bytes)
+        if dimensions is None:
+            return cv2.IMREAD_COLOR
+
+        # Se comparan lado corto con lado corto para no depender de la
+        # orientación EXIF, que OpenCV aplica después de decodificar.
+        short_side, long_side = sorted(dimensions)
+        target_short, target_long = sorted(size)
+
+        for factor, flag in ImageService._REDUCED_FLAGS:
+            if (short_side // factor >= target_short
+                    and long_side // factor >= target_long):
+                return flag
+
+        return cv2.IMREAD_COLOR
+
+    @staticmethod
+    def _jpeg_dimensions(img_bytes: bytes) -> tuple[int, int] | None:
+        """
+        Lee (ancho, alto) de la cabecera SOF de un JPEG sin decodificarlo.
+        Retorna None si los bytes no son un JPEG reconocible.
+        """
+        data = memoryview(img_bytes)
+        if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+            return None
+
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:
+                # Relleno entre segmentos
+                i += 1
+                continue
+            # SOF0..SOF15, excepto DHT (C4), JPG (C8) y DAC (CC)
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height = (data[i + 5] << 8) | data[i + 6]
+                width = (data[i + 7] << 8) | data[i + 8]
+                return width, height
+            length = (data[i + 2] << 8) | data[i + 3]
+            i += 2 + length
+
+        return None
+
     # ----------------------------------------------------------------------
     # MÉTODO 1: Comparar dos imágenes (exactas o casi iguales)
     # ----------------------------------------------------------------------
 
+    @classmethod
+    def prepare_template(cls, worker_image: bytes) -> FaceTemplate:
+        """
+        Preprocesa la foto registrada de un trabajador (decodificación y
+        escala de grises) para reutilizarla en verificaciones posteriores.
+        """
+        img = cls._bytes_to_image(worker_image, cls.working_size)
+        return FaceTemplate(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+
+    @classmethod
+    def load_probe(cls, compared_image: bytes) -> VerificationContext:
+        """
+        Decodifica la imagen recibida una sola vez para usarla en
+        match_face y match_role.
+        """
+        return VerificationContext(
+            cls._bytes_to_image(compared_image, cls.working_size))
+
     @classmethod
     def check_face(
         cls, compared_image: bytes, worker_image: bytes, *,
@@ -34,22 +250,239 @@ class ImageService:
 
         tolerance: Valor entre 0 y 1, donde 1 es igualdad absoluta.
         """
-        img1 = cls._bytes_to_image(compared_image)
-        img2 = cls._bytes_to_image(worker_image)
+        template = cls.prepare_template(worker_image)
+        return cls.match_face(cls.load_probe(compared_image), template,
+                              tolerance=tolerance)
 
-        # Redimensionamos para poder comparar
-        img2_resized = cv2.resize(img2, (img1.shape[1], img1.shape[0]))
+    @classmethod
+    def match_face(
+        cls, probe: VerificationContext, template: FaceTemplate, *,
+        tolerance: float = 0.75
+            ) -> bool:
+        """
+        Igual que check_face, pero sobre una imagen ya decodificada
+        (ver load_probe) y una plantilla ya preprocesada
+        (ver prepare_template).
+        """
+        match, level = cls._cascade_match(probe, template, tolerance)
+        cls.record_cascade_decision(level)
+        return match
 
-        # Convertimos a escala de grises
-        img1_gray = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-        img2_gray = cv2.cvtColor(img2_resized, cv2.COLOR_BGR2GRAY)
+    @classmethod
+    def run_stages(
+        cls, compared_image: bytes, stages: list[str],
+        template: FaceTemplate | None, hex_color: str | None, *,
+        face_tolerance: float = 0.75,
+        role_tolerance: int = 80
+    ) -> dict:
+        """
+        Ejecuta en orden las etapas de imagen dadas ("quality", "uniform",
+        "face") con una sola decodificación y se detiene en el primer
+        rechazo. Pensada para el pool de procesos: retorna la etapa que
+        rechazó (o None), el nivel de la cascada del rostro y el tiempo de
+        la decodificación y de cada etapa, para contabilizarlos en el
+        proceso principal. Si la imagen no se puede decodificar (o es más
+        pequeña que la ventana del SSIM) la etapa que rechaza es "validity".
+        """
+        started = time.perf_counter()
+        try:
+            probe = cls.load_probe(compared_image)
+        except ValueError:
+            probe = None
+        result = {"failed": None, "cascade_level": None,
+                  "decode": time.perf_counter() - started, "timings": {}}
+        if probe is None or min(probe.image.shape[:2]) < cls.SSIM_WIN_SIZE:
+            result["failed"] = "validity"
+            return result
+
+        for stage in stages:
+            started = time.perf_counter()
+            if stage == "quality":
+                ok = cls.match_quality(probe)
+            elif stage == "uniform":
+                ok = cls.match_role(probe, hex_color, tolerance=role_tolerance)
+            elif stage == "face":
+                ok, result["cascade_level"] = cls._cascade_match(
+                    probe, template, face_tolerance)
+            else:
+                raise ValueError(f"Etapa de imagen desconocida: {stage}")
+            result["timings"][stage] = time.perf_counter() - started
+
+            if not ok:
+                result["failed"] = stage
+                break
+        return result
+
+    # ----------------------------------------------------------------------
+    # Cascada multiescala: decidir en baja resolución cuando es evidente
+    # ----------------------------------------------------------------------
+
+    # Niveles de pirámide que se prueban antes de la resolución completa
+    # (0 desactiva la cascada) y margen alrededor de `tolerance` dentro del
+    # cual el resultado se considera dudoso y se pasa al siguiente nivel.
+    cascade_levels: int = int(os.getenv("FACE_CASCADE_LEVELS", "0"))
+    cascade_margin: float = float(os.getenv("FACE_CASCADE_MARGIN", "0.15"))
+
+    # Decisiones tomadas en cada nivel (0 = resolución completa)
+    _cascade_hits: dict[int, int] = {}
+    _cascade_lock = threading.Lock()
+
+    @classmethod
+    def _cascade_match(
+        cls, probe: VerificationContext, template: FaceTemplate,
+        tolerance: float
+    ) -> tuple[bool, int]:
+        """
+        Compara de la resolución más gruesa a la más fina. Retorna el
+        resultado y el nivel de la pirámide en el que se decidió.
+        """
+        levels = cls.cascade_levels
+        shape = probe.gray.shape
+
+        if levels > 0:
+            probe_pyramid = probe.pyramid(levels)
+            template_pyramid = template.pyramid(shape, levels)
+            min_side = 2 * cls.SSIM_WIN_SIZE
+
+            for level in range(levels, 0, -1):
+                img1 = probe_pyramid[level]
+                if min(img1.shape[:2]) < min_side:
+                    continue
+
+                score = cls.ssim(img1, template_pyramid[level])
+                if score >= tolerance + cls.cascade_margin:
+                    return True, level
+                if score <= tolerance - cls.cascade_margin:
+                    return False, level
+
+        # Redimensionamos la plantilla para poder comparar
+        score = cls.ssim(probe.gray, template.resized(shape))
+
+        return bool(score >= tolerance), 0
+
+    @classmethod
+    def record_cascade_decision(cls, level: int):
+        with cls._cascade_lock:
+            cls._cascade_hits[level] = cls._cascade_hits.get(level, 0) + 1
+
+    @classmethod
+    def cascade_stats(cls) -> dict:
+        with cls._cascade_lock:
+            hits = dict(sorted(cls._cascade_hits.items()))
+        return {
+            "levels": cls.cascade_levels,
+            "margin": cls.cascade_margin,
+            "decisions_by_level": hits,
+        }
+
+    @classmethod
+    def reset_cascade_stats(cls):
+        with cls._cascade_lock:
+            cls._cascade_hits.clear()
+
+    # ----------------------------------------------------------------------
+    # SSIM escalar con filtros separables de OpenCV
+    # ----------------------------------------------------------------------
+
+    # Parámetros por defecto de skimage.metrics.structural_similarity
+    # para imágenes uint8: ventana uniforme 7x7, covarianza muestral y
+    # rango de datos 255.
+    SSIM_WIN_SIZE = 7
+    SSIM_K1 = 0.01
+    SSIM_K2 = 0.03
+    SSIM_DATA_RANGE = 255.0
+
+    # Buffers de trabajo float32 por tamaño, uno por hilo. Solo se guardan
+    # los de los últimos SSIM_BUFFER_SHAPES tamaños: sin IMAGE_WORKING_SIZE
+    # cada resolución de cámara tendría los suyos (8 float32 por píxel).
+    ssim_buffer_shapes: int = int(os.getenv("SSIM_BUFFER_SHAPES", "2"))
+    _ssim_scratch = threading.local()
+
+    @classmethod
+    def _ssim_buffers(cls, shape: tuple) -> list:
+        buffers = getattr(cls._ssim_scratch, "by_shape", None)
+        if buffers is None:
+            buffers = cls._ssim_scratch.by_shape = OrderedDict()
 
-        # Importar aquí evita dependencias globales
-        from skimage.metrics import structural_similarity as ssim
+        scratch = buffers.get(shape)
+        if scratch is None:
+            scratch = [np.empty(shape, np.float32) for _ in range(8)]
+            if cls.ssim_buffer_shapes > 0:
+                buffers[shape] = scratch
+            while len(buffers) > max(cls.ssim_buffer_shapes, 0):
+                buffers.popitem(last=False)
+        else:
+            buffers.move_to_end(shape)
+        return scratch
 
-        score, _ = ssim(img1_gray, img2_gray, full=True)
+    @classmethod
+    def ssim(cls, img1: np.ndarray, img2: np.ndarray) -> float:
+        """
+        Calcula el SSIM medio entre dos imágenes en escala de grises (uint8)
+        del mismo tamaño. Equivale a structural_similarity de skimage con sus
+        parámetros por defecto, pero solo produce el valor escalar y reutiliza
+        buffers preasignados en lugar de construir el mapa completo.
+        """
+        if img1.shape != img2.shape:
+            raise ValueError("Las imágenes deben tener el mismo tamaño.")
+
+        win = cls.SSIM_WIN_SIZE
+        if min(img1.shape[:2]) < win:
+            raise ValueError(
+                f"Las imágenes deben medir al menos {win}x{win} píxeles.")
+
+        ksize = (win, win)
+        border = cv2.BORDER_REFLECT
+        cov_norm = win * win / (win * win - 1.0)
+        c1 = (cls.SSIM_K1 * cls.SSIM_DATA_RANGE) ** 2
+        c2 = (cls.SSIM_K2 * cls.SSIM_DATA_RANGE) ** 2
+
+        x, y, ux, uy, uxx, uyy, uxy, t = cls._ssim_buffers(img1.shape)
+        np.copyto(x, img1)
+        np.copyto(y, img2)
+
+        # Medias locales de x, y, x², y² y x·y
+        cv2.blur(x, ksize, ux, borderType=border)
+        cv2.blur(y, ksize, uy, borderType=border)
+        np.multiply(x, x, out=t)
+        cv2.blur(t, ksize, uxx, borderType=border)
+        np.multiply(y, y, out=t)
+        cv2.blur(t, ksize, uyy, borderType=border)
+        np.multiply(x, y, out=t)
+        cv2.blur(t, ksize, uxy, borderType=border)
+
+        # A partir de aquí x, y y t se reutilizan como temporales
+        np.multiply(ux, ux, out=x)
+        np.multiply(uy, uy, out=y)
+        np.multiply(ux, uy, out=t)
 
-        return bool(score >= tolerance)
+        # Varianzas y covarianza muestrales
+        np.subtract(uxx, x, out=uxx)
+        uxx *= cov_norm
+        np.subtract(uyy, y, out=uyy)
+        uyy *= cov_norm
+        np.subtract(uxy, t, out=uxy)
+        uxy *= cov_norm
+
+        # A1 = 2·ux·uy + C1, A2 = 2·vxy + C2
+        t *= 2.0
+        t += c1
+        uxy *= 2.0
+        uxy += c2
+        # B1 = ux² + uy² + C1, B2 = vx + vy + C2
+        np.add(x, y, out=x)
+        x += c1
+        np.add(uxx, uyy, out=uxx)
+        uxx += c2
+
+        # S = (A1·A2) / (B1·B2)
+        np.multiply(t, uxy, out=t)
+        np.multiply(x, uxx, out=x)
+        np.divide(t, x, out=t)
+
+        # Igual que skimage, se descartan los bordes afectados por el relleno
+        pad = (win - 1) // 2
+        return float(cv2.mean(t[pad:-pad, pad:-pad])[0])
 
     # ----------------------------------------------------------------------
     # MÉTODO 2: Detectar si el color de la camiseta coincide con un color hex
@@ -69,24 +502,22 @@ class ImageService:
         - tolerance: margen permitido para H, S y V
         - match_threshold: % mínimo de píxeles que deben coincidir (0.0–1.0)
         """
+        return cls.match_role(cls.load_probe(compared_image), hex_color,
+                              tolerance=tolerance,
+                              match_threshold=match_threshold)
 
-        img = cls._bytes_to_image(compared_image)
-
-        h, w, _ = img.shape
-
-        # Tomamos el tercio inferior-central
-        y1 = int(h * 0.55)
-        y2 = int(h * 0.90)
-        x1 = int(w * 0.25)
-        x2 = int(w * 0.75)
-
-        shirt_region = img[y1:y2, x1:x2]
-
-        # Convertir ROI a HSV
-        hsv_img = cv2.cvtColor(shirt_region, cv2.COLOR_BGR2HSV)
-
-        # Convertir hex → BGR
-        hex_color = hex_color.lstrip("#")
+    @classmethod
+    def match_role(
+        cls, probe: VerificationContext, hex_color: str, *,
+        tolerance: int = 80,
+        match_threshold: float = 0.15
+    ) -> bool:
+        """
+        Igual que check_role, pero sobre una imagen ya decodificada
+        (ver load_probe).
+        """
+        # ROI de la camiseta en HSV
+        hsv_img = probe.shirt_hsv
 
         # Convertir color a HSV
         hex_color = hex_color.lstrip('#')
@@ -118,3 +549,30 @@ class ImageService:
         match_ratio = np.count_nonzero(mask) / mask.size
 
         return bool(match_ratio >= match_threshold)
+
+    # ----------------------------------------------------------------------
+    # MÉTODO 3: Calidad de la imagen (iluminación y nitidez)
+    # ----------------------------------------------------------------------
+
+    # Brillo medio aceptado (0–255) y varianza mínima del laplaciano
+    # (por debajo, la imagen está desenfocada o movida)
+    quality_min_brightness: float = float(
+        os.getenv("QUALITY_MIN_BRIGHTNESS", "40"))
+    quality_max_brightness: float = float(
+        os.getenv("QUALITY_MAX_BRIGHTNESS", "220"))
+    quality_min_sharpness: float = float(
+        os.getenv("QUALITY_MIN_SHARPNESS", "20"))
+
+    @classmethod
+    def match_quality(cls, probe: VerificationContext) -> bool:
+        """
+        True si la imagen no está muy oscura, sobreexpuesta ni borrosa
+        (sobre el plano en grises ya decodificado, ver load_probe).
+        """
+        gray = probe.gray
+        brightness = float(gray.mean())
+        if not cls.quality_min_brightness <= brightness <= \
+                cls.quality_max_brightness:
+            return False
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        return sharpness >= cls.quality_min_sharpness
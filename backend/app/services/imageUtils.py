@@ -1,17 +1,40 @@
 import base64
+import binascii
+import os
 from typing import Union
 
+# base64 recibido como texto o como buffer (sin copiar)
+Base64Data = Union[str, bytes, bytearray, memoryview]
+
+
+class ImageDecodeError(ValueError):
+    """
+    La foto recibida no se pudo decodificar. `reason` indica la causa:
+    "empty", "too_large" o "invalid".
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
 
 class ImageUtils:
     """Utilidades para manejar conversión de imágenes entre binario y base64"""
 
+    # Tamaño máximo (decodificado) de una foto recibida; 0 = sin límite
+    max_image_bytes: int = int(os.getenv("IMAGE_MAX_BYTES",
+                                         str(10 * 1024 * 1024)))
+
+    # El prefijo data URI se busca solo al inicio del string
+    _DATA_PREFIX_SCAN = 128
+
     @staticmethod
-    def binary_to_base64(binary_data: bytes) -> str:
+    def binary_to_base64(binary_data: Union[bytes, bytearray, memoryview]) -> str:
         """
         Convierte datos binarios de imagen a string base64
         
         Args:
-            binary_data: Datos binarios de la imagen
+            binary_data: Datos binarios de la imagen (bytes o memoryview)
             
         Returns:
             String en formato base64
@@ -35,11 +58,89 @@ class ImageUtils:
         if not base64_string:
             return b""
         
-        # Remover prefijo 'data:image/...;base64,' si existe
-        if ',' in base64_string and base64_string.startswith('data:'):
-            base64_string = base64_string.split(',', 1)[1]
+        return ImageUtils.decode_base64(base64_string, max_bytes=0)
+
+    @staticmethod
+    def decode_base64(data: Base64Data, max_bytes: int | None = None) -> bytes:
+        """
+        Valida y decodifica base64 en una sola pasada
+        
+        Args:
+            data: base64 como str, bytes, bytearray o memoryview, con o sin
+                prefijo 'data:image/...;base64,'
+            max_bytes: Tamaño máximo decodificado (por defecto
+                max_image_bytes; 0 sin límite). Se revisa antes de decodificar
+            
+        Returns:
+            Datos binarios de la imagen
+            
+        Raises:
+            ImageDecodeError: si está vacío, es muy grande o no es base64
+        """
+        if not data:
+            raise ImageDecodeError("empty", "La imagen recibida está vacía.")
+
+        payload = ImageUtils._strip_data_prefix(data)
+        limit = ImageUtils.max_image_bytes if max_bytes is None else max_bytes
+        # Cada 4 caracteres son 3 bytes (menos 2 de relleno como máximo)
+        if limit and len(payload) * 3 // 4 - 2 > limit:
+            raise ImageDecodeError(
+                "too_large", f"La imagen supera el máximo de {limit} bytes.")
+
+        try:
+            decoded = binascii.a2b_base64(payload)
+        except ValueError as e:  # binascii.Error o str no ASCII
+            raise ImageDecodeError(
+                "invalid", "La imagen recibida no está en base64 válido.") from e
+
+        if not decoded:
+            raise ImageDecodeError("empty", "La imagen recibida está vacía.")
+        if limit and len(decoded) > limit:
+            raise ImageDecodeError(
+                "too_large", f"La imagen supera el máximo de {limit} bytes.")
+        return decoded
+
+    @staticmethod
+    def check_size(binary_data: Union[bytes, bytearray, memoryview],
+                   max_bytes: int | None = None):
+        """
+        Valida una foto recibida en binario con el mismo límite que
+        decode_base64
         
-        return base64.b64decode(base64_string)
+        Args:
+            binary_data: Datos binarios de la imagen
+            max_bytes: Tamaño máximo (por defecto max_image_bytes; 0 sin límite)
+            
+        Raises:
+            ImageDecodeError: si está vacía o supera el tamaño máximo
+        """
+        if not binary_data:
+            raise ImageDecodeError("empty", "La imagen recibida está vacía.")
+
+        limit = ImageUtils.max_image_bytes if max_bytes is None else max_bytes
+        if limit and len(binary_data) > limit:
+            raise ImageDecodeError(
+                "too_large", f"La imagen supera el máximo de {limit} bytes.")
+
+    @staticmethod
+    def _strip_data_prefix(data: Base64Data) -> Union[str, memoryview]:
+        """
+        Quita el prefijo 'data:...;base64,' sin dividir el string completo.
+        Los buffers se recortan con memoryview (sin copiar).
+        """
+        if isinstance(data, str):
+            if data.startswith('data:'):
+                comma = data.find(',', 0, ImageUtils._DATA_PREFIX_SCAN)
+                if comma != -1:
+                    return data[comma + 1:]
+            return data
+
+        view = memoryview(data)
+        if view[:5] == b'data:':
+            comma = bytes(view[:ImageUtils._DATA_PREFIX_SCAN]).find(b',')
+            if comma != -1:
+                return view[comma + 1:]
+        return view
 
     @staticmethod
     def validate_base64(base64_string: str) -> bool:
@@ -53,19 +154,32 @@ class ImageUtils:
             True si es base64 válido, False en caso contrario
         """
         try:
-            if not base64_string:
-                return False
-            
-            # Remover prefijo si existe
-            if ',' in base64_string and base64_string.startswith('data:'):
-                base64_string = base64_string.split(',', 1)[1]
-            
-            # Intentar decodificar
-            base64.b64decode(base64_string)
+            ImageUtils.decode_base64(base64_string, max_bytes=0)
             return True
-        except Exception:
+        except ImageDecodeError:
             return False
 
+    @staticmethod
+    def guess_mime_type(binary_data: bytes) -> str:
+        """
+        Detecta el tipo MIME de una imagen por sus primeros bytes
+        
+        Args:
+            binary_data: Datos binarios de la imagen
+            
+        Returns:
+            Tipo MIME (application/octet-stream si no se reconoce)
+        """
+        if binary_data.startswith(b'\xff\xd8\xff'):
+            return "image/jpeg"
+        if binary_data.startswith(b'\x89PNG\r\n\x1a\n'):
+            return "image/png"
+        if binary_data[:4] == b'RIFF' and binary_data[8:12] == b'WEBP':
+            return "image/webp"
+        if binary_data.startswith((b'GIF87a', b'GIF89a')):
+            return "image/gif"
+        return "application/octet-stream"
+
     @staticmethod
     def ensure_base64_prefix(base64_string: str, mime_type: str = "image/jpeg") -> str:
         """
@@ -1,15 +1,33 @@
-from db.database import Database
+import os
+import time
+from db.repository import AsyncDatabase
 # Importamos tu modelo fuerte para validar los datos aquí
 # Asegúrate de que la ruta de importación sea correcta según tu estructura de carpetas
 from models.role import Role as RoleValidator 
 
 class RoleManager:
+    """
+    Los roles se leen de una caché en memoria con toda la tabla (son pocas
+    filas y casi no cambian). La caché se recarga cada ROLE_CACHE_TTL
+    segundos (0 la desactiva) y se invalida en cada escritura.
+    """
+
+    cache_ttl: float = float(os.getenv("ROLE_CACHE_TTL", "300"))
+
+    _roles: dict | None = None
+    _loaded_at: float = 0.0
+    # Cambia con cada invalidación: una carga iniciada antes no se guarda
+    _generation: int = 0
+
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
 
     # ============================================================
     # CREATE
     # ============================================================
     @classmethod
-    def create(cls, name: str, color: str):
+    async def create(cls, name: str, color: str):
         # 1. VALIDACIÓN Y LIMPIEZA
         # Creamos una instancia del modelo Role. Esto disparará:
         # - El error si el color no es Hex válido.
@@ -23,7 +41,8 @@ class RoleManager:
         }
 
         # 2. Llamada a la base de datos
-        created_role = Database.create_role(new_role).data[0]
+        created_role = (await AsyncDatabase.create_role(new_role)).data[0]
+        cls.invalidate()
 
         return created_role
 
@@ -31,15 +50,21 @@ class RoleManager:
     # READ ALL
     # ============================================================
     @classmethod
-    def read_all(cls):
-        return Database.get_role_list().data
+    async def read_all(cls):
+        roles = await cls._cached_roles()
+        return [dict(role) for role in roles.values()]
 
     # ============================================================
     # READ BY ID
     # ============================================================
     @classmethod
-    def read_by_id(cls, role_id: int):
-        response = Database.get_role(role_id).data
+    async def read_by_id(cls, role_id: int):
+        role = (await cls._cached_roles()).get(role_id)
+        if role is not None:
+            return dict(role)
+
+        # Puede ser un rol creado desde otra instancia: se consulta la BD
+        response = (await AsyncDatabase.get_role(role_id)).data
         if response:
             return response[0]
         # OJO: La API espera un modelo Role. Si retornas None, la API podría
@@ -52,8 +77,8 @@ class RoleManager:
     # UPDATE
     # ============================================================
     @classmethod
-    def update(cls, role_id: int, **changes):
-        current_data = Database.get_role(role_id).data
+    async def update(cls, role_id: int, **changes):
+        current_data = (await AsyncDatabase.get_role(role_id)).data
 
         if current_data:
             old_role = current_data[0].copy()
@@ -74,7 +99,8 @@ class RoleManager:
             if "color" in changes:
                 role_to_update["color"] = validated_obj.color
             
-            Database.update_role(role_id, role_to_update)
+            await AsyncDatabase.update_role(role_id, role_to_update)
+            cls.invalidate()
             
             # NOTA: Tu código original devuelve el 'old_role'. 
             # Generalmente en APIs REST se devuelve el objeto YA actualizado.
@@ -92,8 +118,9 @@ class RoleManager:
     # DELETE
     # ============================================================
     @classmethod
-    def delete(cls, role_id: int):
-        role = Database.delete_role(role_id).data
+    async def delete(cls, role_id: int):
+        role = (await AsyncDatabase.delete_role(role_id)).data
+        cls.invalidate()
         
         if len(role) == 0:
             return {
@@ -102,4 +129,47 @@ class RoleManager:
                 'color': '#000000' # Color dummy válido
             }
             
-        return role[0]
\ No newline at end of file
+        return role[0]
+
+    # ============================================================
+    # CACHÉ → tabla completa de roles en memoria
+    # ============================================================
+    @classmethod
+    def invalidate(cls):
+        cls._roles = None
+        cls._generation += 1
+
+    @classmethod
+    def clear(cls):
+        cls.invalidate()
+        cls.hits = cls.misses = cls.loads = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "entries": len(cls._roles) if cls._roles is not None else 0,
+            "ttl_seconds": cls.cache_ttl,
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "loads": cls.loads,
+        }
+
+    @classmethod
+    async def _cached_roles(cls) -> dict:
+        """Roles indexados por id, recargados si la caché expiró."""
+        roles = cls._roles
+        if roles is not None and \
+                time.monotonic() - cls._loaded_at < cls.cache_ttl:
+            cls.hits += 1
+            return roles
+
+        cls.misses += 1
+        generation = cls._generation
+        rows = (await AsyncDatabase.get_role_list()).data
+        cls.loads += 1
+        roles = {role["id"]: role for role in rows}
+        # Si hubo una escritura durante la carga, no se guarda lo leído
+        if cls.cache_ttl > 0 and generation == cls._generation:
+            cls._roles = roles
+            cls._loaded_at = time.monotonic()
+        return roles
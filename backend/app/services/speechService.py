@@ -1,10 +1,22 @@
+import asyncio
 import os
+import struct
+import threading
 import azure.cognitiveservices.speech as speechsdk
 from dotenv import load_dotenv
+from services.speechStream import SpeechStream
+from services.synthesizerPool import SynthesizerPool
 
 # Carga variables desde .env (solo necesario en local)
 load_dotenv()
 
+_FORMATO_ENV = os.getenv("SPEECH_OUTPUT_FORMAT", "wav")
+# Formatos que se prerenderizan además del de despliegue (alias de FORMATOS).
+# El kiosco pide audio/mpeg.
+_PRERENDER_ENV = os.getenv("SPEECH_PRERENDER_FORMATS", "mp3")
+# Formato del audio de entrada sin cabecera: (sample rate, bits, canales)
+FORMATO_PCM = (16000, 16, 1)
+
 
 class SpeechService:
     """Servicio estático para síntesis
@@ -12,13 +24,39 @@ class SpeechService:
 
     # --- Atributo de clase (compartido por todos los métodos) ---
     cliente = None
+    # Una configuración por formato de salida distinto al de despliegue
+    _clientes_formato: dict = {}
+    # Sintetizadores reutilizables: un pool por formato de salida
+    pool_size: int = int(os.getenv("SPEECH_POOL_SIZE", "4"))
+    _pools: dict = {}
+    _pools_lock = threading.Lock()
+
+    # Formatos de salida admitidos: alias → (formato del SDK, tipo MIME).
+    # Los comprimidos ocupan una fracción de los ~32 KB/s del WAV PCM.
+    FORMATOS = {
+        "wav": ("Riff16Khz16BitMonoPcm", "audio/wav"),
+        "ogg": ("Ogg16Khz16BitMonoOpus", "audio/ogg"),
+        "webm": ("Webm16Khz16BitMonoOpus", "audio/webm"),
+        "mp3": ("Audio16Khz32KBitRateMonoMp3", "audio/mpeg"),
+    }
+
+    # Voz y formato de salida (forman parte de la clave de AudioCache).
+    # SPEECH_OUTPUT_FORMAT acepta un alias de FORMATOS o un formato del SDK.
+    voz: str = os.getenv("SPEECH_VOICE", "es-CO-GonzaloNeural")
+    # Tiempo máximo (s) de las variantes asíncronas
+    timeout: float = float(os.getenv("SPEECH_TIMEOUT", "10"))
+    formato_salida: str = FORMATOS.get(_FORMATO_ENV, (_FORMATO_ENV,))[0]
 
     @classmethod
     def configurar(cls):
         """Inicializa el cliente de Azure Speech si no está configurado."""
         if cls.cliente is not None:
             return  # Ya está configurado
+        cls.cliente = cls._nuevo_cliente(cls.formato_salida)
 
+    @classmethod
+    def _nuevo_cliente(cls, formato: str):
+        """Configuración del SDK con la voz y el formato de salida dados."""
         azure_key = os.getenv("AZURE_KEY")
         azure_url = os.getenv("AZURE_URL")
 
@@ -32,34 +70,298 @@ class SpeechService:
         region = azure_url.split("//")[1].split(".")[0]
 
         # Configuración principal del servicio
-        cls.cliente = speechsdk.SpeechConfig(
+        cliente = speechsdk.SpeechConfig(
             subscription=azure_key, region=region
         )
 
         # Configuración global: voz y lenguaje
-        cls.cliente.speech_synthesis_voice_name = "es-CO-GonzaloNeural"
-        cls.cliente.speech_recognition_language = "es-CO"
+        cliente.speech_synthesis_voice_name = cls.voz
+        cliente.speech_recognition_language = "es-CO"
 
-        # Ajustamos el formato de salida a WAV
-        cls.cliente.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm
+        # Formato de salida (por defecto WAV PCM 16 kHz)
+        cliente.set_speech_synthesis_output_format(
+            getattr(speechsdk.SpeechSynthesisOutputFormat, formato)
         )
+        return cliente
+
+    @classmethod
+    def negociar_formato(cls, accept: str | None) -> str:
+        """
+        Formato del SDK para la cabecera Accept del cliente: el tipo de
+        audio admitido con mayor q. Sin preferencia de audio (o con
+        audio/* y */*) se usa el formato del despliegue.
+        """
+        por_mime = {mime: sdk for sdk, mime in cls.FORMATOS.values()}
+        elegido, mejor_q = cls.formato_salida, 0.0
+        for parte in (accept or "").split(","):
+            mime, *parametros = [p.strip() for p in parte.split(";")]
+            if mime.lower() not in por_mime:
+                continue
+            q = 1.0
+            for parametro in parametros:
+                nombre, _, valor = parametro.partition("=")
+                if nombre.strip() == "q":
+                    try:
+                        q = float(valor)
+                    except ValueError:
+                        q = 0.0
+            if q > mejor_q:
+                elegido, mejor_q = por_mime[mime.lower()], q
+        return elegido
+
+    @classmethod
+    def formatos_sdk(cls) -> set:
+        return {sdk for sdk, _ in cls.FORMATOS.values()}
+
+    @classmethod
+    def formatos_prerender(cls, spec: str = _PRERENDER_ENV) -> tuple:
+        """
+        Formatos del SDK que los clientes negocian además del de despliegue
+        ("mp3,ogg" → sus formatos del SDK, sin repetidos).
+        """
+        formatos = []
+        for alias in (a.strip().lower() for a in spec.split(",")):
+            if not alias:
+                continue
+            if alias not in cls.FORMATOS:
+                raise ValueError(f"Formato de audio no admitido: {alias}")
+            formato = cls.FORMATOS[alias][0]
+            if formato != cls.formato_salida and formato not in formatos:
+                formatos.append(formato)
+        return tuple(formatos)
+
+    @classmethod
+    def mime_type(cls, formato: str) -> str:
+        """Tipo MIME de un formato del SDK."""
+        for sdk, mime in cls.FORMATOS.values():
+            if sdk == formato:
+                return mime
+        return "application/octet-stream"
+
+    @classmethod
+    def _cliente_para(cls, formato: str | None):
+        """Configuración del SDK para `formato` (la global si es el mismo)."""
+        cls.configurar()
+        if not formato or formato == cls.formato_salida:
+            return cls.cliente
+        if formato not in cls.formatos_sdk():
+            raise ValueError(f"Formato de audio no admitido: {formato}")
+        cliente = cls._clientes_formato.get(formato)
+        if cliente is None:
+            cliente = cls._clientes_formato[formato] = \
+                cls._nuevo_cliente(formato)
+        return cliente
+
+    # --- Pool de sintetizadores ---
+
+    @classmethod
+    def precalentar(cls) -> int:
+        """
+        Llena el pool del formato del despliegue con conexiones abiertas
+        (al arrancar la app). Retorna cuántos sintetizadores se crearon.
+        """
+        return cls._pool(None).precalentar()
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        with cls._pools_lock:
+            pools = dict(cls._pools)
+        return {formato: pool.stats() for formato, pool in pools.items()}
+
+    @classmethod
+    def vaciar_pool(cls):
+        """Descarta los sintetizadores del pool (p. ej. al rotar la clave)."""
+        with cls._pools_lock:
+            cls._pools.clear()
 
     # --- Métodos de clase ---
 
     @classmethod
-    def text_to_audio(cls, text: str) -> bytes:
-        """Convierte texto a audio (WAV) y retorna binarios."""
+    def text_to_audio(cls, text: str, formato: str | None = None) -> bytes:
+        """
+        Convierte texto a audio y retorna binarios, en `formato` (del SDK)
+        o en el formato del despliegue.
+        """
+        with cls._sintetizador(text, formato) as synthesizer:
+            return cls._audio_de(synthesizer.speak_text_async(text).get())
+
+    @classmethod
+    def audio_to_text(cls, audio_bytes: bytes) -> str:
+        """Transcribe un audio (WAV) a texto."""
+        cls.configurar()
+
+        if not audio_bytes:
+            raise ValueError("El archivo de audio está vacío.")
+
+        recognizer = speechsdk.SpeechRecognizer(
+            speech_config=cls.cliente,
+            audio_config=cls._entrada_audio(audio_bytes)
+        )
+        return cls._texto_de(recognizer.recognize_once_async().get())
+
+    # --- Variantes asíncronas (no bloquean el event loop ni un hilo) ---
+
+    @classmethod
+    async def text_to_audio_async(cls, text: str, formato: str | None = None,
+                                  timeout: float | None = None) -> bytes:
+        """
+        Igual que text_to_audio, pero espera los eventos del SDK en lugar de
+        bloquear en .get(). Si vence `timeout` (TimeoutError) o se cancela
+        la tarea, detiene la síntesis.
+        """
+        with cls._sintetizador(text, formato) as synthesizer:
+            result = await cls._esperar_evento(
+                [synthesizer.synthesis_completed,
+                 synthesizer.synthesis_canceled],
+                lambda: synthesizer.speak_text_async(text),
+                synthesizer.stop_speaking_async,
+                timeout)
+            return cls._audio_de(result)
+
+    @classmethod
+    async def audio_to_text_async(cls, audio_bytes: bytes,
+                                  timeout: float | None = None) -> str:
+        """Igual que audio_to_text, sin bloquear (ver text_to_audio_async)."""
+        cls.configurar()
+
+        if not audio_bytes:
+            raise ValueError("El archivo de audio está vacío.")
+
+        recognizer = speechsdk.SpeechRecognizer(
+            speech_config=cls.cliente,
+            audio_config=cls._entrada_audio(audio_bytes)
+        )
+        result = await cls._esperar_evento(
+            [recognizer.recognized, recognizer.canceled],
+            recognizer.recognize_once_async, None, timeout)
+        return cls._texto_de(result)
+
+    @classmethod
+    async def reconocer_en_vivo(cls, sample_rate: int = 16000,
+                                bits: int = 16, channels: int = 1):
+        """
+        Abre una sesión de reconocimiento continuo (SpeechStream) que
+        recibe el audio por trozos y entrega hipótesis parciales y finales.
+        """
         cls.configurar()
+        sesion = SpeechStream(cls.cliente, sample_rate, bits, channels)
+        await sesion.iniciar()
+        return sesion
+
+    # --- Auxiliares ---
+
+    @classmethod
+    async def _esperar_evento(cls, senales, iniciar, detener, timeout):
+        """
+        Conecta las señales del SDK a un futuro de asyncio, inicia la
+        operación y espera el primer resultado (los callbacks llegan desde
+        los hilos del SDK).
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+
+        def entregar(result):
+            if not futuro.done():
+                futuro.set_result(result)
 
+        for senal in senales:
+            senal.connect(
+                lambda evt: loop.call_soon_threadsafe(entregar, evt.result))
+
+        # El ResultFuture del SDK se conserva mientras dura la operación
+        pendiente = iniciar()  # noqa: F841
+        try:
+            return await asyncio.wait_for(futuro, timeout or cls.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if detener is not None:
+                detener()
+            raise
+        finally:
+            # El objeto del SDK puede volver al pool: sin callbacks viejos
+            for senal in senales:
+                senal.disconnect_all()
+
+    @classmethod
+    def _sintetizador(cls, text: str, formato: str | None):
+        """Sintetizador prestado del pool del formato (context manager)."""
         if not text.strip():
             raise ValueError("El texto no puede estar vacío.")
+        return cls._pool(formato).prestar()
 
+    @classmethod
+    def _pool(cls, formato: str | None) -> SynthesizerPool:
+        cls.configurar()
+        formato = formato or cls.formato_salida
+        with cls._pools_lock:
+            pool = cls._pools.get(formato)
+            if pool is None:
+                cliente = cls._cliente_para(formato)
+                pool = cls._pools[formato] = SynthesizerPool(
+                    lambda: cls._nuevo_sintetizador(cliente), cls.pool_size)
+            return pool
+
+    @staticmethod
+    def _nuevo_sintetizador(cliente):
         synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=cls.cliente, audio_config=None
+            speech_config=cliente, audio_config=None
         )
-        result = synthesizer.speak_text_async(text).get()
+        # Abre la conexión (y el TLS) ahora y no en la primera síntesis
+        speechsdk.Connection.from_speech_synthesizer(synthesizer).open(True)
+        return synthesizer
+
+    @classmethod
+    def _entrada_audio(cls, audio_bytes: bytes):
+        """
+        AudioConfig del SDK alimentado desde memoria (push stream): sin
+        archivos temporales, así que las transcripciones concurrentes no
+        se pisan.
+        """
+        (sample_rate, bits, channels), pcm = cls.leer_wav(audio_bytes)
+        stream = speechsdk.audio.PushAudioInputStream(
+            stream_format=speechsdk.audio.AudioStreamFormat(
+                samples_per_second=sample_rate, bits_per_sample=bits,
+                channels=channels))
+        stream.write(bytes(pcm))
+        stream.close()  # fin del audio: el reconocedor no espera más datos
+        return speechsdk.audio.AudioConfig(stream=stream)
 
+    @staticmethod
+    def leer_wav(audio_bytes: bytes):
+        """
+        ((sample_rate, bits, canales), pcm) de un WAV PCM, leyendo la
+        cabecera directamente de los bytes. Lo que no es RIFF/WAVE se toma
+        como PCM crudo en FORMATO_PCM (16 kHz, 16 bits, mono).
+        """
+        data = memoryview(audio_bytes)
+        if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            return FORMATO_PCM, data
+
+        formato, offset = None, 12
+        while offset + 8 <= len(data):
+            chunk_id = bytes(data[offset:offset + 4])
+            (size,) = struct.unpack_from("<I", data, offset + 4)
+            inicio = offset + 8
+            if chunk_id == b"fmt " and size >= 16:
+                if inicio + 16 > len(data):
+                    break
+                tag, channels, sample_rate, _, _, bits = struct.unpack_from(
+                    "<HHIIHH", data, inicio)
+                # 1 = PCM; 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM multicanal)
+                if tag not in (1, 0xFFFE):
+                    raise ValueError("Solo se admite audio WAV PCM.")
+                formato = (sample_rate, bits, channels)
+            elif chunk_id == b"data":
+                if formato is None:
+                    break
+                # Tamaño 0 o 0xFFFFFFFF: WAV escrito en streaming, hasta el final
+                fin = inicio + size if 0 < size < 0xFFFFFFFF else len(data)
+                return formato, data[inicio:min(fin, len(data))]
+            offset = inicio + size + (size & 1)  # los chunks van alineados a 2
+
+        raise ValueError("El archivo WAV no tiene cabecera 'fmt ' o 'data'.")
+
+    @staticmethod
+    def _audio_de(result) -> bytes:
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
             return result.audio_data
         elif result.reason == speechsdk.ResultReason.Canceled:
@@ -70,40 +372,17 @@ class SpeechService:
         else:
             raise RuntimeError("Error desconocido en la síntesis de voz.")
 
-    @classmethod
-    def audio_to_text(cls, audio_bytes: bytes) -> str:
-        """Transcribe un audio (WAV) a texto."""
-        cls.configurar()
-
-        if not audio_bytes:
-            raise ValueError("El archivo de audio está vacío.")
-
-        temp_filename = "temp_audio.wav"
-        try:
-            with open(temp_filename, "wb") as f:
-                f.write(audio_bytes)
-
-            audio_input = speechsdk.AudioConfig(filename=temp_filename)
-            recognizer = speechsdk.SpeechRecognizer(
-                speech_config=cls.cliente, audio_config=audio_input
+    @staticmethod
+    def _texto_de(result) -> str:
+        if result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            return result.text
+        elif result.reason == speechsdk.ResultReason.NoMatch:
+            raise RuntimeError(
+                "No se pudo reconocer el habla en el audio.")
+        elif result.reason == speechsdk.ResultReason.Canceled:
+            raise RuntimeError(
+                f"Error en STT:"
+                f"{result.cancellation_details.error_details}"
             )
-            result = recognizer.recognize_once_async().get()
-
-            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                return result.text
-            elif result.reason == speechsdk.ResultReason.NoMatch:
-                raise RuntimeError(
-                    "No se pudo reconocer el habla en el audio.")
-            elif result.reason == speechsdk.ResultReason.Canceled:
-                raise RuntimeError(
-                    f"Error en STT:"
-                    f"{result.cancellation_details.error_details}"
-                )
-            else:
-                raise RuntimeError("Error desconocido en la transcripción.")
-        finally:
-            if os.path.exists(temp_filename):
-                try:
-                    os.remove(temp_filename)
-                except PermissionError:
-                    pass
+        else:
+            raise RuntimeError("Error desconocido en la transcripción.")
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import azure.cognitiveservices.speech as speechsdk
+from core.executor import ComputeExecutor
+
+
+class SpeechStream:
+    """
+    Sesión de reconocimiento continuo alimentada por trozos de PCM mientras
+    la persona habla (p. ej. dictar la cédula en el kiosco).
+
+    Los trozos se escriben en un push stream del SDK y las hipótesis
+    llegan como eventos:
+        {"type": "partial", "text": ...}   mientras se reconoce
+        {"type": "final", "text": ...}     al cerrar cada frase
+        {"type": "error", "message": ...}  si el servicio cancela
+    Los callbacks del SDK llegan desde sus hilos y se pasan al event loop.
+    """
+
+    # Audio máximo por sesión, en segundos
+    max_seconds: int = int(os.getenv("SPEECH_STREAM_MAX_SECONDS", "30"))
+
+    def __init__(self, cliente, sample_rate: int = 16000, bits: int = 16,
+                 channels: int = 1):
+        self._loop = asyncio.get_running_loop()
+        self._eventos: asyncio.Queue = asyncio.Queue()
+        self._cerrado = False
+        self._detenido = False
+
+        self.max_bytes = self.max_seconds * sample_rate * bits // 8 * channels
+        self.recibidos = 0
+
+        self._stream = speechsdk.audio.PushAudioInputStream(
+            stream_format=speechsdk.audio.AudioStreamFormat(
+                samples_per_second=sample_rate, bits_per_sample=bits,
+                channels=channels))
+        self._recognizer = speechsdk.SpeechRecognizer(
+            speech_config=cliente,
+            audio_config=speechsdk.audio.AudioConfig(stream=self._stream))
+
+        self._recognizer.recognizing.connect(self._parcial)
+        self._recognizer.recognized.connect(self._final)
+        self._recognizer.canceled.connect(self._cancelado)
+        self._recognizer.session_stopped.connect(
+            lambda evt: self._emitir(None))
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    async def iniciar(self):
+        await ComputeExecutor.run_io(
+            lambda: self._recognizer.start_continuous_recognition_async().get())
+
+    def escribir(self, chunk: bytes):
+        """Agrega audio a la sesión (no bloquea: el SDK lo encola)."""
+        if self._cerrado:
+            raise ValueError("La sesión de audio ya terminó.")
+        self.recibidos += len(chunk)
+        if self.recibidos > self.max_bytes:
+            raise ValueError("Se superó la duración máxima del audio.")
+        self._stream.write(chunk)
+
+    def terminar(self):
+        """Fin del audio: el SDK entrega lo pendiente y cierra la sesión."""
+        if not self._cerrado:
+            self._cerrado = True
+            self._stream.close()
+
+    async def eventos(self):
+        """Hipótesis en orden de llegada, hasta que la sesión se cierra."""
+        while True:
+            evento = await self._eventos.get()
+            if evento is None:
+                return
+            yield evento
+
+    async def detener(self):
+        """Detiene el reconocimiento y suelta los callbacks (idempotente)."""
+        if self._detenido:
+            return
+        self._detenido = True
+        self.terminar()
+        for senal in (self._recognizer.recognizing, self._recognizer.recognized,
+                      self._recognizer.canceled,
+                      self._recognizer.session_stopped):
+            senal.disconnect_all()
+        await ComputeExecutor.run_io(
+            lambda: self._recognizer.stop_continuous_recognition_async().get())
+
+    # ------------------------------------------------------------
+
+    def _emitir(self, evento: dict | None):
+        self._loop.call_soon_threadsafe(self._eventos.put_nowait, evento)
+
+    def _parcial(self, evt):
+        if evt.result.text:
+            self._emitir({"type": "partial", "text": evt.result.text})
+
+    def _final(self, evt):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            self._emitir({"type": "final", "text": evt.result.text})
+
+    def _cancelado(self, evt):
+        # El fin del stream también llega como cancelación: no es un error
+        if evt.cancellation_details.reason == \
+                speechsdk.CancellationReason.Error:
+            self._emitir({"type": "error",
+                          "message": evt.cancellation_details.error_details})
+            self._emitir(None)
@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+
+
+class SynthesizerPool:
+    """
+    Pool acotado de sintetizadores de voz de larga vida (uno por formato de
+    salida, ver SpeechService). Reutilizarlos evita pagar la conexión y el
+    TLS con el servicio de voz en cada respuesta.
+
+    - Se prestan con `prestar()` desde cualquier hilo o corrutina; cada
+      sintetizador lo usa una sola operación a la vez.
+    - Si se piden más de `size` a la vez se crean temporales, que se
+      descartan al devolverse (el pool nunca crece más allá de `size`).
+    - Un sintetizador cuya operación falla o se cancela se descarta y el
+      siguiente préstamo crea uno nuevo en su lugar.
+    """
+
+    def __init__(self, crear, size: int):
+        self._crear = crear
+        self.size = size
+        self._libres: list = []
+        self._lock = threading.Lock()
+
+        self.creados = 0  # sintetizadores vivos que pertenecen al pool
+        self.prestamos = 0
+        self.reutilizados = 0
+        self.temporales = 0
+        self.descartados = 0
+
+    @contextmanager
+    def prestar(self):
+        synthesizer, propio = self._tomar()
+        try:
+            yield synthesizer
+        except BaseException:
+            # La conexión puede haber quedado rota: no vuelve al pool
+            self._soltar(propio, descartado=True)
+            raise
+        if propio:
+            with self._lock:
+                self._libres.append(synthesizer)
+
+    def precalentar(self) -> int:
+        """Crea los sintetizadores que faltan para llenar el pool."""
+        with self._lock:
+            faltan = max(self.size - self.creados, 0)
+            self.creados += faltan
+
+        nuevos = []
+        try:
+            for _ in range(faltan):
+                nuevos.append(self._crear())
+        finally:
+            with self._lock:
+                self.creados -= faltan - len(nuevos)
+                self._libres.extend(nuevos)
+        return len(nuevos)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self.creados,
+                "idle": len(self._libres),
+                "checkouts": self.prestamos,
+                "reused": self.reutilizados,
+                "overflow": self.temporales,
+                "discarded": self.descartados,
+            }
+
+    # ------------------------------------------------------------
+
+    def _tomar(self):
+        with self._lock:
+            self.prestamos += 1
+            if self._libres:
+                self.reutilizados += 1
+                return self._libres.pop(), True
+            propio = self.creados < self.size
+            if propio:
+                self.creados += 1
+            else:
+                self.temporales += 1
+
+        try:
+            return self._crear(), propio
+        except BaseException:
+            self._soltar(propio)
+            raise
+
+    def _soltar(self, propio: bool, descartado: bool = False):
+        with self._lock:
+            if propio:
+                self.creados -= 1
+            if descartado:
+                self.descartados += 1
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from core.executor import ComputeExecutor
+from db.blobStore import BlobStore
+from services.imageService import ImageService, FaceTemplate
+from services.imageUtils import ImageUtils
+
+
+class TemplateStore:
+    """
+    Caché acotada (LRU) de plantillas faciales de los trabajadores.
+
+    Cada entrada se indexa por el id del trabajador y guarda la versión de
+    la foto con la que se calculó; si la foto cambia, la plantilla se
+    recalcula. Así la verificación solo procesa la imagen recibida.
+
+    Se acota por entradas (TEMPLATE_CACHE_SIZE) y por bytes
+    (TEMPLATE_CACHE_BYTES): las fotos a resolución completa ocupan varios
+    MB cada una.
+    """
+
+    max_entries: int = int(os.getenv("TEMPLATE_CACHE_SIZE", "1024"))
+    max_bytes: int = int(os.getenv("TEMPLATE_CACHE_BYTES",
+                                   str(256 * 1024 * 1024)))
+
+    _entries: OrderedDict = OrderedDict()  # id → (versión, plantilla, bytes)
+    _bytes_used: int = 0
+    _lock = threading.Lock()
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @staticmethod
+    def photo_version(photo) -> str:
+        """Huella corta de la foto (str base64 o bytes) usada como versión."""
+        if isinstance(photo, str):
+            photo = photo.encode("utf-8")
+        return hashlib.blake2b(photo or b"", digest_size=16).hexdigest()
+
+    # ============================================================
+    # LECTURA → plantilla de la caché o calculada al vuelo
+    # ============================================================
+    @classmethod
+    def get(cls, worker_id: int, photo) -> FaceTemplate:
+        version = cls.photo_version(photo)
+        template = cls._lookup(worker_id, version)
+        if template is not None:
+            return template
+
+        return cls._compute(worker_id, photo, version)
+
+    @classmethod
+    def lookup(cls, worker_id: int, version: str | None) -> FaceTemplate | None:
+        """Plantilla en caché para esa versión de la foto, sin calcularla."""
+        if version is None:
+            return None
+        return cls._lookup(worker_id, version)
+
+    @classmethod
+    async def fetch(cls, worker_id: int, photo) -> FaceTemplate:
+        """Igual que get, pero calcula las plantillas faltantes en el pool."""
+        version = cls.photo_version(photo)
+        template = cls._lookup(worker_id, version)
+        if template is not None:
+            return template
+
+        template = await ComputeExecutor.run_cpu(cls._prepare, photo)
+        cls._put(worker_id, version, template)
+        return template
+
+    @classmethod
+    async def fetch_blob(cls, worker_id: int, ref: str) -> FaceTemplate:
+        """
+        Igual que fetch, para fotos guardadas en el BlobStore: la referencia
+        (hash del contenido) es la versión y los bytes se leen sin base64.
+        """
+        template = cls._lookup(worker_id, ref)
+        if template is not None:
+            return template
+
+        photo = await ComputeExecutor.run_io(BlobStore.get, ref)
+        if photo is None:
+            raise ValueError(f"No existe el blob de la foto: {ref}")
+        template = await ComputeExecutor.run_cpu(cls._prepare, photo)
+        cls._put(worker_id, ref, template)
+        return template
+
+    # ============================================================
+    # ESCRITURA → precalcular al crear/actualizar un trabajador
+    # ============================================================
+    @classmethod
+    def store(cls, worker_id: int, photo) -> FaceTemplate:
+        return cls._compute(worker_id, photo, cls.photo_version(photo))
+
+    @classmethod
+    async def refresh(cls, worker_id: int, photo,
+                      version: str | None = None) -> FaceTemplate:
+        """
+        Igual que store, pero calcula la plantilla en el pool. `version`
+        permite usar la referencia del BlobStore en lugar de la huella.
+        """
+        template = await ComputeExecutor.run_cpu(cls._prepare, photo)
+        cls._put(worker_id, version or cls.photo_version(photo), template)
+        return template
+
+    @classmethod
+    def invalidate(cls, worker_id: int):
+        with cls._lock:
+            entry = cls._entries.pop(worker_id, None)
+            if entry is not None:
+                cls._bytes_used -= entry[2]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._bytes_used = 0
+            cls.hits = cls.misses = cls.evictions = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "entries": len(cls._entries),
+                "max_entries": cls.max_entries,
+                "bytes": cls._bytes_used,
+                "max_bytes": cls.max_bytes,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+            }
+
+    # ------------------------------------------------------------
+
+    @classmethod
+    def _lookup(cls, worker_id: int, version: str) -> FaceTemplate | None:
+        with cls._lock:
+            entry = cls._entries.get(worker_id)
+            if entry is not None and entry[0] == version:
+                cls._entries.move_to_end(worker_id)
+                cls.hits += 1
+                return entry[1]
+            cls.misses += 1
+        return None
+
+    @staticmethod
+    def _prepare(photo) -> FaceTemplate:
+        if isinstance(photo, bytes):
+            photo_bytes = photo
+        else:
+            photo_bytes = ImageUtils.decode_base64(photo, max_bytes=0)
+
+        return ImageService.prepare_template(photo_bytes)
+
+    @classmethod
+    def _compute(cls, worker_id: int, photo, version: str) -> FaceTemplate:
+        template = cls._prepare(photo)
+        cls._put(worker_id, version, template)
+        return template
+
+    @classmethod
+    def _put(cls, worker_id: int, version: str, template: FaceTemplate):
+        size = template.nbytes
+        if cls.max_entries <= 0 or (cls.max_bytes and size > cls.max_bytes):
+            cls.invalidate(worker_id)
+            return
+
+        with cls._lock:
+            previous = cls._entries.pop(worker_id, None)
+            if previous is not None:
+                cls._bytes_used -= previous[2]
+            cls._entries[worker_id] = (version, template, size)
+            cls._bytes_used += size
+            while len(cls._entries) > cls.max_entries or \
+                    (cls.max_bytes and cls._bytes_used > cls.max_bytes):
+                _, (_, _, evicted) = cls._entries.popitem(last=False)
+                cls._bytes_used -= evicted
+                cls.evictions += 1
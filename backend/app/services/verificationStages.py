@@ -0,0 +1,122 @@
+import os
+import threading
+
+
+class VerificationStages:
+    """
+    Orden configurable de las etapas de check_worker y sus contadores.
+
+    Etapas:
+    - validity: tamaño y contenido de la imagen recibida.
+    - document: búsqueda del trabajador por cédula.
+    - quality:  brillo y nitidez de la imagen (opcional).
+    - uniform:  color de la camiseta contra el color del rol (opcional).
+    - face:     rostro contra la foto registrada (SSIM).
+
+    VERIFY_STAGES define el orden. Por defecto van primero las etapas
+    baratas que más rechazan: el uniforme (HSV sobre un recorte) antes que
+    el rostro (SSIM sobre la imagen completa). Las etapas de imagen
+    consecutivas se ejecutan en una sola tarea del pool de procesos, con
+    una sola decodificación.
+    """
+
+    ALL = ("validity", "document", "quality", "uniform", "face")
+    # Etapas que se ejecutan sobre la imagen en el pool de procesos
+    IMAGE = ("quality", "uniform", "face")
+    # Etapas que necesitan al trabajador (van después de "document")
+    NEED_WORKER = ("uniform", "face")
+    REQUIRED = ("validity", "document", "face")
+    DEFAULT = "validity,document,uniform,face"
+
+    _lock = threading.Lock()
+    _counters: dict = {}
+    _decode: list = [0, 0.0]  # [decodificaciones, segundos]
+
+    @classmethod
+    def parse(cls, spec: str) -> tuple:
+        """Valida un orden como "validity,document,uniform,face"."""
+        order = tuple(s.strip() for s in spec.split(",") if s.strip())
+
+        unknown = [s for s in order if s not in cls.ALL]
+        if unknown:
+            raise ValueError(f"Etapas de verificación desconocidas: {unknown}")
+        if len(set(order)) != len(order):
+            raise ValueError("Hay etapas de verificación repetidas.")
+        missing = [s for s in cls.REQUIRED if s not in order]
+        if missing:
+            raise ValueError(f"Faltan etapas obligatorias: {missing}")
+        if order[0] != "validity":
+            raise ValueError("La etapa 'validity' debe ir primero.")
+        document = order.index("document")
+        if any(order.index(s) < document for s in cls.NEED_WORKER
+               if s in order):
+            raise ValueError(
+                "'uniform' y 'face' deben ir después de 'document'.")
+        return order
+
+    order: tuple = ()  # se asigna al final del módulo
+
+    @classmethod
+    def steps(cls, order: tuple | None = None) -> list[tuple]:
+        """
+        Pasos de ejecución: cada etapa del proceso principal por separado y
+        las etapas de imagen consecutivas agrupadas (una decodificación).
+        """
+        steps = []
+        for stage in order or cls.order:
+            if stage in cls.IMAGE and steps and steps[-1][0] in cls.IMAGE:
+                steps[-1] += (stage,)
+            else:
+                steps.append((stage,))
+        return steps
+
+    # ============================================================
+    # CONTADORES
+    # ============================================================
+    @classmethod
+    def record(cls, stage: str, seconds: float, rejected: bool):
+        with cls._lock:
+            counter = cls._counters.setdefault(stage, [0, 0, 0.0])
+            counter[0] += 1
+            counter[1] += int(rejected)
+            counter[2] += seconds
+
+    @classmethod
+    def record_decode(cls, seconds: float):
+        with cls._lock:
+            cls._decode[0] += 1
+            cls._decode[1] += seconds
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            stages = {
+                stage: {
+                    "runs": runs,
+                    "rejections": rejections,
+                    "rejection_rate": round(rejections / runs, 4),
+                    "avg_ms": round(seconds / runs * 1000, 3),
+                }
+                for stage, (runs, rejections, seconds) in cls._counters.items()
+                if runs
+            }
+            decodes, decode_seconds = cls._decode
+        return {
+            "order": list(cls.order),
+            "stages": stages,
+            "decode": {
+                "runs": decodes,
+                "avg_ms": round(decode_seconds / decodes * 1000, 3)
+                if decodes else 0.0,
+            },
+        }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters.clear()
+            cls._decode[:] = [0, 0.0]
+
+
+VerificationStages.order = VerificationStages.parse(
+    os.getenv("VERIFY_STAGES", VerificationStages.DEFAULT))
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from services.templateStore import TemplateStore
+
+
+class WorkerIndex:
+    """
+    Índice en memoria documento → trabajador para la verificación.
+
+    Se llena al arrancar (WorkerManager.preload_index) y se mantiene al día
+    en cada create/update/delete. Es una LRU acotada: si la tabla no cabe,
+    los documentos menos usados se expulsan y se vuelven a leer de la BD.
+    Las filas no guardan la foto: solo su referencia en el BlobStore o, si
+    está en base64 en la fila, su huella (`photo_version`, la misma versión
+    con la que TemplateStore guarda la plantilla facial).
+
+    Las entradas vencen a los WORKER_INDEX_TTL segundos y se vuelven a leer
+    de la BD: así llegan también las escrituras hechas por otras
+    instancias. Las lecturas de la BD entran con `fill`, que no guarda nada
+    si hubo una escritura local mientras se leía (ver generation).
+    """
+
+    max_entries: int = int(os.getenv("WORKER_INDEX_SIZE", "10000"))
+    preload_enabled: bool = os.getenv("WORKER_INDEX_PRELOAD", "1") != "0"
+    ttl: float = float(os.getenv("WORKER_INDEX_TTL", "300"))
+
+    _by_document: OrderedDict = OrderedDict()  # documento → (vence, fila)
+    _document_of: dict = {}
+    _lock = threading.Lock()
+    # Cambia con cada escritura: una lectura iniciada antes no se guarda
+    _generation: int = 0
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    stale_fills: int = 0
+    preloaded: int = 0
+
+    # ============================================================
+    # LECTURA
+    # ============================================================
+    @classmethod
+    def get(cls, document: str) -> dict | None:
+        with cls._lock:
+            entry = cls._by_document.get(document)
+            if entry is not None and entry[0] <= time.monotonic():
+                cls._by_document.pop(document)
+                cls._document_of.pop(entry[1]["id"], None)
+                cls.expirations += 1
+                entry = None
+            if entry is None:
+                cls.misses += 1
+                return None
+            cls._by_document.move_to_end(document)
+            cls.hits += 1
+            return dict(entry[1])
+
+    @classmethod
+    def generation(cls) -> int:
+        """Se toma antes de leer de la BD y se pasa a `fill`."""
+        return cls._generation
+
+    # ============================================================
+    # ESCRITURA → mantener el índice al día
+    # ============================================================
+    @classmethod
+    def put(cls, worker: dict):
+        """Fila recién escrita (create/update) por esta instancia."""
+        with cls._lock:
+            cls._generation += 1
+            cls._put_locked(worker)
+
+    @classmethod
+    def fill(cls, worker: dict, generation: int) -> bool:
+        """
+        Fila leída de la BD. Si hubo una escritura desde `generation`, la
+        fila puede estar vencida (p. ej. un trabajador recién eliminado) y
+        no se guarda.
+        """
+        with cls._lock:
+            if generation != cls._generation:
+                cls.stale_fills += 1
+                return False
+            cls._put_locked(worker)
+            return True
+
+    @classmethod
+    def discard(cls, worker_id: int):
+        with cls._lock:
+            cls._generation += 1
+            cls._discard_locked(worker_id)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._by_document.clear()
+            cls._document_of.clear()
+            cls._generation += 1
+            cls.hits = cls.misses = cls.evictions = cls.preloaded = 0
+            cls.expirations = cls.stale_fills = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "entries": len(cls._by_document),
+                "max_entries": cls.max_entries,
+                "preloaded": cls.preloaded,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+                "expirations": cls.expirations,
+                "stale_fills": cls.stale_fills,
+                "ttl": cls.ttl,
+            }
+
+    # ------------------------------------------------------------
+
+    @classmethod
+    def _put_locked(cls, worker: dict):
+        if cls.max_entries <= 0:
+            return
+
+        document = str(worker.get("document"))
+        entry = dict(worker)
+        photo = entry.pop("photo", None)
+        if photo and not entry.get("photo_ref"):
+            entry["photo_version"] = TemplateStore.photo_version(photo)
+
+        # Si cambió el documento, la entrada anterior ya no aplica
+        cls._discard_locked(entry["id"])
+
+        current = cls._by_document.get(document)
+        # Documento duplicado: se conserva el de menor id, como la BD
+        if current is not None:
+            if current[1]["id"] < entry["id"]:
+                return
+            cls._document_of.pop(current[1]["id"], None)
+
+        expires = time.monotonic() + cls.ttl if cls.ttl > 0 else float("inf")
+        cls._by_document[document] = (expires, entry)
+        cls._document_of[entry["id"]] = document
+        while len(cls._by_document) > cls.max_entries:
+            _, (_, evicted) = cls._by_document.popitem(last=False)
+            cls._document_of.pop(evicted["id"], None)
+            cls.evictions += 1
+
+    @classmethod
+    def _discard_locked(cls, worker_id: int):
+        document = cls._document_of.pop(worker_id, None)
+        if document is not None:
+            cls._by_document.pop(document, None)
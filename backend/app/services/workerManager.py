@@ -1,65 +1,207 @@
-from db.database import Database
+import asyncio
+import os
+import time
+from core.executor import ComputeExecutor
+from db.blobStore import BlobStore
+from db.repository import AsyncDatabase
 from services.imageService import ImageService
+from services.roleManager import RoleManager
 from services.speechService import SpeechService
-from services.imageUtils import ImageUtils
+from services.audioCache import AudioCache
+from services.imageUtils import ImageDecodeError, ImageUtils
+from services.templateStore import TemplateStore
+from services.verificationStages import VerificationStages
+from services.workerIndex import WorkerIndex
 import base64
+import functools
 
-def render_audio(message):
-    audio_bytes = SpeechService.text_to_audio(message)
+async def render_audio(message, pinned: bool = False,
+                       reference: bool = False, audio_format: str | None = None):
+    """
+    Audio del mensaje en base64, o solo su id en AudioCache si
+    `reference` (el cliente lo descarga de GET /audio/{id}). `audio_format`
+    es un formato del SDK; por defecto el del despliegue.
+    """
+    # Variante asíncrona: la síntesis no ocupa un hilo mientras espera
+    synthesize = SpeechService.text_to_audio_async
+    if audio_format and audio_format != SpeechService.formato_salida:
+        synthesize = functools.partial(synthesize, formato=audio_format)
+    else:
+        audio_format = SpeechService.formato_salida
+
+    # Un mensaje repetido sale de AudioCache sin llamar al servicio de voz
+    audio_bytes = await AudioCache.render(message, SpeechService.voz,
+                                          audio_format, synthesize,
+                                          pinned=pinned)
+    if reference:
+        return AudioCache.key(message, SpeechService.voz, audio_format)
     return base64.b64encode(audio_bytes).decode('utf-8')
 
+class WorkerUpdateConflict(Exception):
+    """El trabajador fue modificado por otra petición durante la edición."""
+
+    def __init__(self, worker_id: int):
+        super().__init__(
+            f"El trabajador {worker_id} fue modificado por otra petición. "
+            "Vuelva a cargarlo e intente de nuevo.")
+        self.worker_id = worker_id
+
+
 class WorkerManager:
 
+    # Columnas que se pueden pedir en el listado paginado
+    LIST_COLUMNS = ("id", "name", "document", "role", "photo", "photo_ref",
+                    "version")
+    # Por defecto el listado no incluye la foto (ver photo_url)
+    DEFAULT_LIST_COLUMNS = ("id", "name", "document", "role")
+    MAX_PAGE_SIZE = 200
+
+    # Renderizar el saludo personalizado al crear/renombrar un trabajador
+    greeting_prerender: bool = os.getenv("GREETING_PRERENDER", "1") != "0"
+    # Formatos del SDK que se prerenderizan además del de despliegue
+    prerender_formats: tuple = SpeechService.formatos_prerender()
+    _background_tasks: set = set()
+    # Etapas de imagen consecutivas en paralelo en lugar de en secuencia
+    concurrent_checks: bool = os.getenv("VERIFY_CONCURRENT", "0") == "1"
 
     # ============================================================
     # CREATE → Crear un trabajador con validación de duplicados
     # ============================================================
     @classmethod
-    def create(cls, name: str, document: str, role: int, photo: str):
+    async def create(cls, name: str, document: str, role: int,
+                     photo: str | bytes):
+
+        photo_columns, photo_bytes = cls._photo_columns(photo)
+        if photo_columns.get("photo_ref"):
+            await ComputeExecutor.run_io(BlobStore.put, photo_bytes)
 
         new_worker = {"name": name,
                       "document": document,
                       "role": role,
-                      "photo": photo}
+                      **photo_columns}
 
-        new_worker = Database.create_worker(new_worker).data[0]
+        new_worker = (await AsyncDatabase.create_worker(new_worker)).data[0]
+        await cls._refresh_template(new_worker, photo_bytes)
+        WorkerIndex.put(new_worker)
+        cls._schedule_greeting(new_worker.get("name"))
 
-        return new_worker
+        return await cls._with_photo(new_worker)
 
     # ============================================================
     # READ ALL → Obtener todos los trabajadores
     # ============================================================
     @classmethod
-    def read_all(cls):
-        return Database.get_worker_list().data
+    async def read_all(cls):
+        return (await AsyncDatabase.get_worker_list()).data
+
+    # ============================================================
+    # LIST → Página de trabajadores (proyección + cursor por id)
+    # ============================================================
+    @classmethod
+    async def list_page(cls, fields: list | None = None,
+                        after: int | None = None, limit: int = 50):
+        """
+        Retorna (trabajadores, siguiente_cursor). El cursor es el id del
+        último trabajador de la página, o None si no hay más páginas.
+        Si la foto no se pide, cada fila trae `photo_url` en su lugar.
+        """
+        columns = list(fields or cls.DEFAULT_LIST_COLUMNS)
+        unknown = set(columns) - set(cls.LIST_COLUMNS)
+        if unknown:
+            raise ValueError(f"Columnas no permitidas: {sorted(unknown)}")
+        if "id" not in columns:
+            columns.insert(0, "id")  # necesario para el cursor
+        if "photo" in columns and "photo_ref" not in columns:
+            columns.append("photo_ref")  # la foto puede estar en el BlobStore
+
+        limit = max(1, min(limit, cls.MAX_PAGE_SIZE))
+        workers = (await AsyncDatabase.list_workers(columns, after, limit)).data
+
+        if "photo" not in columns:
+            for worker in workers:
+                worker["photo_url"] = f"/workers/{worker['id']}/photo"
+        else:
+            workers = [await cls._with_photo(worker) for worker in workers]
+
+        next_cursor = workers[-1]["id"] if len(workers) == limit else None
+        return workers, next_cursor
+
+    # ============================================================
+    # READ PHOTO → Foto registrada en binario
+    # ============================================================
+    @classmethod
+    async def read_photo(cls, worker_id: int) -> bytes | None:
+        result = (await AsyncDatabase.get_worker(worker_id)).data
+        if not result:
+            return None
+        if result[0].get("photo_ref"):
+            return await ComputeExecutor.run_io(BlobStore.get,
+                                                result[0]["photo_ref"])
+        try:
+            return ImageUtils.decode_base64(result[0].get("photo"), max_bytes=0)
+        except ImageDecodeError:
+            return None
 
     # ============================================================
     # READ BY ID → Obtener trabajador por ID
     # ============================================================
     @classmethod
-    def read_by_id(cls, worker_id: int):
-        return Database.get_worker(worker_id).data[0]
+    async def read_by_id(cls, worker_id: int):
+        return await cls._with_photo(
+            (await AsyncDatabase.get_worker(worker_id)).data[0])
 
     # ============================================================
     # UPDATE → Actualizar trabajador
-    # (Incluye validación de duplicado si se cambia "document")
+    # (Lectura-modificación-escritura por id con control de versión)
     # ============================================================
     @classmethod
-    def update(cls, worker_id: int, **changes):
-        workers = Database.get_worker_list().data
+    async def update(cls, worker_id: int, expected_version: int | None = None,
+                     **changes):
+        """
+        `expected_version` es la versión de la fila que el cliente editó (la
+        que recibió en GET /workers/{id}). Si otra edición llegó antes, se
+        lanza WorkerUpdateConflict en lugar de sobrescribirla. Sin ella solo
+        se protege la lectura-escritura de esta misma petición.
+        """
+        current = (await AsyncDatabase.get_worker(worker_id)).data
+
+        if current:
+            old_worker = current[0]
+            version = old_worker.get("version") or 0
+            if expected_version is not None and expected_version != version:
+                raise WorkerUpdateConflict(worker_id)
+
+            # La foto se compara por su referencia en el BlobStore
+            photo_bytes = None
+            if changes.get("photo") is not None:
+                photo_columns, photo_bytes = cls._photo_columns(
+                    changes.pop("photo"))
+                changes.update(photo_columns)
 
-        for w in workers:
-            if w["id"] == worker_id:
+            # Solo se escriben las columnas que realmente cambian
+            changed = {key: value for key, value in changes.items()
+                       if (key in old_worker or key == "photo_ref")
+                       and key not in ("id", "version")
+                       and old_worker.get(key) != value}
 
-                old_worker = w.copy()
+            if changed:
+                if "photo_ref" in changed:
+                    await ComputeExecutor.run_io(BlobStore.put, photo_bytes)
 
-                # Aplicar cambios
-                for key, value in changes.items():
-                    if key in w:
-                        w[key] = value
+                # Concurrencia optimista: solo se actualiza si nadie más
+                # modificó la fila desde la versión esperada
+                updated = (await AsyncDatabase.update_worker_if_version(
+                    worker_id, changed, version)).data
+                if not updated:
+                    raise WorkerUpdateConflict(worker_id)
 
-                Database.update_worker(worker_id, w)
-                return old_worker
+                if "photo" in changed or "photo_ref" in changed:
+                    await cls._refresh_template(updated[0], photo_bytes)
+                WorkerIndex.put(updated[0])
+                if "name" in changed:
+                    cls._schedule_greeting(changed["name"])
+
+            return await cls._with_photo(old_worker)
 
         return {"id": -1,
                 "name": "None",
@@ -71,62 +213,405 @@ class WorkerManager:
     # DELETE → Eliminar trabajador
     # ============================================================
     @classmethod
-    def delete(cls, worker_id: int):
-        worker = Database.delete_worker(worker_id).data
+    async def delete(cls, worker_id: int):
+        worker = (await AsyncDatabase.delete_worker(worker_id)).data
+        TemplateStore.invalidate(worker_id)
+        WorkerIndex.discard(worker_id)
         if len(worker) == 0:
             return {'id': worker_id,
                     'name': 'Null',
                     'document': 'Null',
                     'role': 0,
                     'photo': 'Null'}
-        return worker[0]
+        return await cls._with_photo(worker[0])
+
+    # ============================================================
+    # ÍNDICE → documento → trabajador, cargado al arrancar
+    # ============================================================
+    INDEX_COLUMNS = ["id", "name", "document", "role", "photo", "photo_ref",
+                     "version"]
+
+    @classmethod
+    async def preload_index(cls, batch_size: int = 50) -> int:
+        """
+        Carga en WorkerIndex los trabajadores (hasta su capacidad) y
+        precalcula sus plantillas (hasta la capacidad de TemplateStore).
+        Las páginas traen la foto para calcular la plantilla y su huella:
+        se leen de a pocas filas y la foto no queda en el índice.
+        """
+        after, loaded = None, 0
+        while loaded < WorkerIndex.max_entries:
+            generation = WorkerIndex.generation()
+            page = (await AsyncDatabase.list_workers(
+                cls.INDEX_COLUMNS, after, batch_size)).data
+            if not page:
+                break
+
+            for worker in page:
+                WorkerIndex.fill(worker, generation)
+            warm = page[:max(TemplateStore.max_entries - loaded, 0)]
+            await asyncio.gather(*(cls._template_for(worker) for worker in warm),
+                                 return_exceptions=True)
+
+            loaded += len(page)
+            after = page[-1]["id"]
+            if len(page) < batch_size:
+                break
+
+        WorkerIndex.preloaded = min(loaded, WorkerIndex.max_entries)
+        return WorkerIndex.preloaded
+
+    @staticmethod
+    async def _worker_by_document(document: str) -> dict | None:
+        """Trabajador desde el índice; solo si no está se consulta la BD."""
+        worker = WorkerIndex.get(document)
+        if worker is not None:
+            return worker
+
+        # Si se edita o elimina un trabajador durante la consulta, la fila
+        # leída no entra al índice
+        generation = WorkerIndex.generation()
+        result = (await AsyncDatabase.get_workers_by_document(document)).data
+        if not result:
+            return None
+        WorkerIndex.fill(result[0], generation)
+        return result[0]
+
+    @staticmethod
+    def _cached_template(worker: dict):
+        """Plantilla del trabajador si ya está en caché, sin leer la foto."""
+        if worker.get("photo_ref"):
+            version = worker["photo_ref"]
+        elif "photo" in worker:
+            version = TemplateStore.photo_version(worker["photo"])
+        else:
+            version = worker.get("photo_version")
+        return TemplateStore.lookup(worker["id"], version)
+
+    @classmethod
+    async def _template_for(cls, worker: dict):
+        if worker.get("photo_ref"):
+            # Los bytes se leen directo del BlobStore, sin pasar por base64
+            return await TemplateStore.fetch_blob(worker["id"],
+                                                  worker["photo_ref"])
+        if "photo" in worker:
+            return await TemplateStore.fetch(worker["id"], worker["photo"])
+
+        # Fila de WorkerIndex: solo la huella; la foto se lee por id si la
+        # plantilla no está en caché
+        template = cls._cached_template(worker)
+        if template is not None:
+            return template
+        current = (await AsyncDatabase.get_worker(worker["id"])).data
+        if current and (current[0].get("photo_ref") or
+                        current[0].get("photo")):
+            return await cls._template_for(current[0])
+        raise ValueError(f"El trabajador {worker['id']} no tiene foto.")
+
+    # ============================================================
+    # FOTO → bytes en el BlobStore, referencia en la fila
+    # ============================================================
+    @staticmethod
+    def _photo_columns(photo: str | bytes) -> tuple[dict, bytes | None]:
+        """
+        Columnas de la fila para una foto (base64 o binaria) y sus bytes. Si
+        la foto no se puede decodificar se conserva tal cual en `photo`; si
+        supera el tamaño máximo se lanza ImageDecodeError. Sin BlobStore
+        configurado la foto se guarda en base64 en la fila.
+        """
+        try:
+            if isinstance(photo, (bytes, bytearray, memoryview)):
+                ImageUtils.check_size(photo)
+                photo_bytes = bytes(photo)
+            else:
+                photo_bytes = ImageUtils.decode_base64(photo)
+        except ImageDecodeError as e:
+            if e.reason == "too_large":
+                raise
+            return {"photo": photo}, None
+
+        if not BlobStore.enabled():
+            if not isinstance(photo, str):
+                photo = ImageUtils.binary_to_base64(photo_bytes)
+            return {"photo": photo}, photo_bytes
+
+        return {"photo": None,
+                "photo_ref": BlobStore.ref_for(photo_bytes)}, photo_bytes
+
+    @staticmethod
+    async def _with_photo(worker: dict) -> dict:
+        """Completa `photo` (base64) desde el BlobStore para la API."""
+        if not worker.get("photo_ref") or worker.get("photo"):
+            return worker
+
+        photo = await ComputeExecutor.run_io(BlobStore.get, worker["photo_ref"])
+        return dict(worker, photo=ImageUtils.binary_to_base64(photo or b""))
+
+    # ============================================================
+    # PLANTILLA FACIAL → precalcular la foto registrada
+    # ============================================================
+    @staticmethod
+    async def _refresh_template(worker: dict, photo_bytes: bytes | None = None):
+        try:
+            if worker.get("photo_ref") and photo_bytes is not None:
+                await TemplateStore.refresh(worker["id"], photo_bytes,
+                                            version=worker["photo_ref"])
+            else:
+                await TemplateStore.refresh(worker["id"], worker.get("photo"))
+        except ValueError:
+            # Foto inválida: se reintentará (y fallará) en la verificación
+            TemplateStore.invalidate(worker["id"])
+
 
 
 # ============================================================
 # CHECK WORKER SERVICE → Verificación de identidad por imagen
 # ============================================================
 
+    # Respuestas fijas: se prerenderizan al arrancar (prerender_messages)
+    MESSAGES = {
+        "invalid_image": "La imagen recibida no es válida o no está en el "
+                         "formato correcto.",
+        "too_large": "La imagen recibida supera el tamaño máximo permitido.",
+        "not_found": "No existe ningún trabajador con esa cédula.",
+        "face_mismatch": "El rostro no coincide con el trabajador registrado.",
+        "uniform_mismatch": "El uniforme no coincide con el color asignado "
+                            "al rol.",
+        "low_quality": "La imagen está muy oscura, sobreexpuesta o borrosa. "
+                       "Intente de nuevo.",
+    }
+
+    @classmethod
+    async def prerender_messages(cls) -> int:
+        """
+        Sintetiza (o carga del disco) el audio de las respuestas fijas en el
+        formato del despliegue y en cada uno de `prerender_formats`.
+        """
+        rendered = 0
+        for audio_format in (None, *cls.prerender_formats):
+            for message in cls.MESSAGES.values():
+                await render_audio(message, pinned=True,
+                                   audio_format=audio_format)
+                rendered += 1
+        return rendered
+
+    @staticmethod
+    def greeting(name: str) -> str:
+        """Mensaje de verificación exitosa (personalizado con el nombre)."""
+        return (f"Trabajador {name} verificado correctamente. "
+                "Identidad y uniforme coinciden.")
+
+    @classmethod
+    def _schedule_greeting(cls, name: str | None):
+        """
+        Renderiza el saludo en segundo plano: así la verificación lo toma
+        de AudioCache en lugar de sintetizarlo en la ruta crítica.
+        """
+        if not cls.greeting_prerender or not name:
+            return
+        task = asyncio.get_running_loop().create_task(
+            cls._render_greeting(name))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+    @classmethod
+    async def _render_greeting(cls, name: str):
+        try:
+            for audio_format in (None, *cls.prerender_formats):
+                await render_audio(cls.greeting(name),
+                                   audio_format=audio_format)
+        except Exception as e:
+            # Si falla, la verificación lo sintetiza en vivo
+            print(f"No se pudo prerenderizar el saludo de {name}: {e}")
+
+    @classmethod
+    async def drain_background(cls):
+        """Espera los saludos pendientes (p. ej. antes de apagar)."""
+        if cls._background_tasks:
+            await asyncio.gather(*cls._background_tasks,
+                                 return_exceptions=True)
+
     @staticmethod
-    def check_worker(cc: int, photo_base64: str) -> dict:
-        if not photo_base64 or not ImageUtils.validate_base64(photo_base64):
-            message = "La imagen recibida no es válida o no está en el formato correcto."
-            return {"match": False, "message": render_audio(message)}
-
-        user_img_bytes = ImageUtils.base64_to_binary(photo_base64)
-
-        # Obtener worker por documento
-        result = Database.get_workers_by_document(str(cc)).data
-        if len(result) == 0:
-            message = "No existe ningún trabajador con esa cédula."
-            return {"match": False, "message": render_audio(message)}
-
-        worker = result[0]
-        worker_photo_b64 = worker.get("photo")
-        worker_img_bytes = ImageUtils.base64_to_binary(worker_photo_b64)
-
-        # Comparar rostro
-        face_match = ImageService.check_face(compared_image=user_img_bytes,
-                                             worker_image=worker_img_bytes,
-                                             tolerance=0.30)
-        if not face_match:
-            message = "El rostro no coincide con el trabajador registrado."
-            return {"match": False, "message": render_audio(message)}
-
-        # Validar uniforme según rol
-        role_id = worker.get("role")
-        role_result = Database.get_role(role_id)
-        role_data = role_result.data[0] if hasattr(role_result, "data") and role_result.data else {}
-        role_color = role_data.get("color", "#000000")
-
-        uniform_ok = ImageService.check_role(compared_image=user_img_bytes,
-                                             hex_color=role_color,
-                                             tolerance=30)
-        if not uniform_ok:
-            message = (f"Rostro verificado, pero el uniforme no coincide con el color "
-                       f"asignado al rol.")
-            return {"match": False, "message": render_audio(message)}
-
-        # Todo correcto
-        message = (f"Trabajador {worker.get('name')} verificado correctamente. "
-                   "Identidad y uniforme coinciden.")
-        return {"match": True, "message": render_audio(message)}
\ No newline at end of file
+    async def _reply(match: bool, message: str, audio_ref: bool,
+                     audio_format: str | None = None) -> dict:
+        """
+        Respuesta de la verificación: el audio va en base64 en `message`,
+        o, si `audio_ref`, `message` es el id del clip en GET /audio/{id}.
+        """
+        if audio_ref:
+            audio_id = await render_audio(message, reference=True,
+                                          audio_format=audio_format)
+            return {"match": match, "message": audio_id,
+                    "audio_url": f"/audio/{audio_id}"}
+        return {"match": match,
+                "message": await render_audio(message,
+                                              audio_format=audio_format)}
+
+    @classmethod
+    async def _rejected_image(cls, error: ImageDecodeError,
+                              audio_ref: bool = False,
+                              audio_format: str | None = None) -> dict:
+        message = cls.MESSAGES.get(error.reason, cls.MESSAGES["invalid_image"])
+        return await cls._reply(False, message, audio_ref, audio_format)
+
+    @classmethod
+    async def check_worker(cls, cc: int, photo_base64: str,
+                           audio_ref: bool = False,
+                           audio_format: str | None = None) -> dict:
+        # Una sola decodificación: validar y convertir a la vez
+        started = time.perf_counter()
+        try:
+            user_img_bytes = ImageUtils.decode_base64(photo_base64)
+        except ImageDecodeError as e:
+            # Cuenta como rechazo de la etapa "validity"
+            VerificationStages.record("validity",
+                                      time.perf_counter() - started, True)
+            return await cls._rejected_image(e, audio_ref, audio_format)
+        return await cls.check_worker_bytes(cc, user_img_bytes, audio_ref,
+                                            audio_format)
+
+    @classmethod
+    async def check_worker_bytes(cls, cc: int, user_img_bytes: bytes | None,
+                                 audio_ref: bool = False,
+                                 audio_format: str | None = None) -> dict:
+        """
+        Igual que check_worker, con la imagen recibida en binario. Las
+        etapas se ejecutan en el orden de VerificationStages y la primera
+        que rechaza define la respuesta.
+        """
+        failure, worker = await cls._run_stages(str(cc), user_img_bytes)
+        if failure is not None:
+            return await cls._reply(False, cls.MESSAGES[failure], audio_ref,
+                                    audio_format)
+
+        # Todo correcto (el saludo suele estar ya renderizado en AudioCache)
+        message = cls.greeting(worker.get('name'))
+        return await cls._reply(True, message, audio_ref, audio_format)
+
+    # ============================================================
+    # ETAPAS DE VERIFICACIÓN
+    # ============================================================
+    # Clave de MESSAGES para el rechazo de cada etapa
+    STAGE_FAILURES = {"validity": "invalid_image", "document": "not_found",
+                      "quality": "low_quality", "uniform": "uniform_mismatch",
+                      "face": "face_mismatch"}
+
+    @classmethod
+    async def _run_stages(cls, document: str, user_img_bytes: bytes | None
+                          ) -> tuple[str | None, dict | None]:
+        """
+        Ejecuta los pasos de VerificationStages en orden. Retorna la clave
+        del mensaje de rechazo (o None) y el trabajador encontrado.
+        """
+        worker = None
+        validity = None  # segundos de "validity" pendientes de registrar
+        for step in VerificationStages.steps():
+            stage = step[0]
+            if stage in VerificationStages.IMAGE:
+                failure = await cls._image_stages(step, worker, user_img_bytes)
+                if validity is not None:
+                    # La validez termina de comprobarse al decodificar: un
+                    # solo registro por solicitud, con el resultado final
+                    VerificationStages.record("validity", validity,
+                                              failure == "validity")
+                    validity = None
+                if failure is not None:
+                    return cls.STAGE_FAILURES[failure], worker
+                continue
+
+            started = time.perf_counter()
+            if stage == "validity":
+                failure = None
+                try:
+                    ImageUtils.check_size(user_img_bytes)
+                except ImageDecodeError as e:
+                    failure = e.reason if e.reason in cls.MESSAGES \
+                        else "invalid_image"
+            else:
+                # Obtener worker por documento (índice en memoria o BD)
+                worker = await cls._worker_by_document(document)
+                failure = None if worker is not None else "not_found"
+
+            elapsed = time.perf_counter() - started
+            if stage == "validity" and failure is None:
+                validity = elapsed
+            else:
+                VerificationStages.record(stage, elapsed, failure is not None)
+            if failure is not None:
+                if validity is not None:
+                    VerificationStages.record("validity", validity, False)
+                return failure, worker
+        return None, worker
+
+    @classmethod
+    async def _image_stages(cls, stages: tuple, worker: dict | None,
+                            user_img_bytes: bytes) -> str | None:
+        """
+        Etapas de imagen consecutivas. Por defecto van en una sola tarea del
+        pool de procesos (una decodificación, se detiene en el primer
+        rechazo). Con VERIFY_CONCURRENT cada etapa es una tarea propia y
+        arranca en cuanto tiene sus datos; el primer rechazo cancela lo
+        pendiente, así la respuesta de audio no espera a las demás (más
+        CPU, menos latencia). Retorna la etapa que rechazó o None.
+        """
+        if len(stages) == 1:
+            return await cls._stage_task(stages, worker, user_img_bytes)
+        if not cls.concurrent_checks:
+            face = stages.index("face") if "face" in stages else 0
+            if face and cls._cached_template(worker) is None:
+                # Sin plantilla en caché el rostro va en una tarea aparte:
+                # si una etapa anterior rechaza, la foto registrada no se
+                # decodifica
+                failure = await cls._image_stages(stages[:face], worker,
+                                                  user_img_bytes)
+                if failure is not None:
+                    return failure
+                return await cls._image_stages(stages[face:], worker,
+                                               user_img_bytes)
+            return await cls._stage_task(stages, worker, user_img_bytes)
+
+        tasks = [asyncio.create_task(
+                    cls._stage_task((stage,), worker, user_img_bytes))
+                 for stage in stages]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                failure = await finished
+                if failure is not None:
+                    return failure
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @classmethod
+    async def _stage_task(cls, stages: tuple, worker: dict | None,
+                          user_img_bytes: bytes) -> str | None:
+        """Una tarea de ImageService.run_stages con los datos que necesita."""
+        template = None
+        if "face" in stages:
+            template = await cls._template_for(worker)
+            # Al pool de procesos solo viaja la plantilla ya reducida al
+            # tamaño de la imagen recibida; la reducción queda en caché
+            shape = ImageService.probe_shape(user_img_bytes)
+            if shape is not None and min(shape) >= ImageService.SSIM_WIN_SIZE:
+                template = template.for_shape(shape,
+                                              ImageService.cascade_levels)
+        role_color = None
+        if "uniform" in stages:
+            # Color del uniforme según rol
+            role_data = await RoleManager.read_by_id(worker.get("role")) or {}
+            role_color = role_data.get("color", "#000000")
+
+        result = await ComputeExecutor.run_cpu(ImageService.run_stages,
+                                               user_img_bytes, list(stages),
+                                               template, role_color,
+                                               face_tolerance=0.30,
+                                               role_tolerance=30)
+
+        VerificationStages.record_decode(result["decode"])
+        for stage, seconds in result["timings"].items():
+            VerificationStages.record(stage, seconds,
+                                      stage == result["failed"])
+        if result["cascade_level"] is not None:
+            ImageService.record_cascade_decision(result["cascade_level"])
+        return result["failed"]
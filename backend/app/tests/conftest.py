@@ -0,0 +1,95 @@
+import base64
+import cv2
+import numpy as np
+import pytest
+from db.blobStore import BlobStore, LocalBlobStore
+from db.repository import AsyncDatabase, SQLiteRepository
+from services.audioCache import AudioCache
+from services.roleManager import RoleManager
+from services.verificationStages import VerificationStages
+from services.workerIndex import WorkerIndex
+
+
+@pytest.fixture(autouse=True)
+def sin_blob_store():
+    """Por defecto las fotos se guardan en la fila, como sin BLOB_BACKEND."""
+    BlobStore.use(None)
+    yield
+    BlobStore.reset()
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    """BlobStore local en un directorio temporal."""
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    BlobStore.use(store)
+    yield store
+    BlobStore.use(None)
+
+
+@pytest.fixture
+def repo():
+    """Backend SQLite en memoria, sin Supabase."""
+    backend = SQLiteRepository(":memory:")
+    AsyncDatabase.use(backend)
+    yield backend
+    AsyncDatabase.use(None)
+
+
+def _jpeg(bgr_color) -> bytes:
+    img = np.full((120, 120, 3), bgr_color, dtype=np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+@pytest.fixture
+def jpeg():
+    """Imagen JPEG de un solo color (BGR), en bytes."""
+    return _jpeg
+
+
+@pytest.fixture
+def jpeg_base64():
+    """Igual que jpeg, codificada en base64 como la envía el cliente."""
+    return lambda bgr_color: base64.b64encode(_jpeg(bgr_color)).decode()
+
+
+@pytest.fixture(autouse=True)
+def sin_procesos(monkeypatch):
+    """El cómputo de imágenes corre en hilos y con la caché vacía."""
+    from core.executor import ComputeExecutor
+    from services.templateStore import TemplateStore
+    monkeypatch.setattr(ComputeExecutor, "processes", 0)
+    TemplateStore.clear()
+    yield
+    TemplateStore.clear()
+
+
+@pytest.fixture(autouse=True)
+def role_cache():
+    """Cada test arranca con las cachés y los contadores de etapas vacíos."""
+    RoleManager.clear()
+    WorkerIndex.clear()
+    VerificationStages.reset()
+    yield
+    RoleManager.clear()
+    WorkerIndex.clear()
+    VerificationStages.reset()
+
+
+@pytest.fixture(autouse=True)
+def audio_cache(tmp_path):
+    """Caché de audio vacía y en un directorio temporal."""
+    AudioCache.clear(root=str(tmp_path / "audio"))
+    yield AudioCache
+    AudioCache.clear()
+
+
+@pytest.fixture(autouse=True)
+def sin_saludos_en_segundo_plano(monkeypatch):
+    """
+    Los tests que lo necesitan activan el prerenderizado del saludo y de
+    los formatos adicionales.
+    """
+    from services.workerManager import WorkerManager
+    monkeypatch.setattr(WorkerManager, "greeting_prerender", False)
+    monkeypatch.setattr(WorkerManager, "prerender_formats", ())
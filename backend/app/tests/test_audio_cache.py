@@ -0,0 +1,131 @@
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+from services.audioCache import AudioCache
+
+
+def synth(audio=b"AUDIO"):
+    return MagicMock(side_effect=lambda text: audio + text.encode())
+
+
+async def test_mensaje_repetido_no_llega_al_sintetizador():
+    fake = synth()
+
+    first = await AudioCache.render("Hola", "voz", "wav", fake)
+    second = await AudioCache.render("Hola", "voz", "wav", fake)
+
+    assert first == second == b"AUDIOHola"
+    fake.assert_called_once_with("Hola")
+    assert AudioCache.stats()["memory_hits"] == 1
+    assert AudioCache.stats()["misses"] == 1
+
+
+async def test_la_clave_incluye_voz_y_formato():
+    fake = synth()
+
+    await AudioCache.render("Hola", "voz", "wav", fake)
+    await AudioCache.render("Hola", "voz", "mp3", fake)
+    await AudioCache.render("Hola", "otra", "wav", fake)
+
+    assert fake.call_count == 3
+
+
+async def test_disco_persiste_entre_reinicios(audio_cache):
+    fake = synth()
+    await AudioCache.render("Hola", "voz", "wav", fake)
+
+    AudioCache.clear(root=AudioCache.root)  # memoria vacía, disco intacto
+    audio = await AudioCache.render("Hola", "voz", "wav", fake)
+
+    assert audio == b"AUDIOHola"
+    fake.assert_called_once()
+    assert AudioCache.stats()["disk_hits"] == 1
+    assert AudioCache.get(AudioCache.key("Hola", "voz", "wav")) == audio
+
+
+async def test_memoria_acotada_respeta_las_frases_fijas(monkeypatch):
+    monkeypatch.setattr(AudioCache, "memory_bytes", 30)
+    fake = synth(b"x" * 10)
+
+    await AudioCache.render("fija", "v", "f", fake, pinned=True)
+    for name in ("uno", "dos", "tres"):
+        await AudioCache.render(name, "v", "f", fake)
+
+    stats = AudioCache.stats()
+    assert stats["memory_bytes"] <= 30
+    assert stats["memory_evictions"] >= 1
+    await AudioCache.render("fija", "v", "f", fake)
+    assert AudioCache.stats()["memory_hits"] == 1
+
+
+async def test_disco_expulsa_los_clips_personalizados(monkeypatch):
+    monkeypatch.setattr(AudioCache, "disk_bytes", 80)
+    fake = synth(b"y" * 20)
+
+    await AudioCache.render("fija", "v", "f", fake, pinned=True)
+    for i in range(4):
+        await AudioCache.render(f"Trabajador {i}", "v", "f", fake)
+
+    files = [f for _, _, fs in os.walk(AudioCache.root) for f in fs]
+    assert AudioCache.key("fija", "v", "f") in files
+    assert AudioCache.stats()["disk_evictions"] >= 2
+    assert AudioCache.stats()["disk_bytes"] <= 80
+
+
+async def test_disco_se_recorre_una_sola_vez(monkeypatch):
+    monkeypatch.setattr(AudioCache, "disk_bytes", 42)
+    fake = synth(b"z" * 20)  # clips de 21 bytes
+    scans = []
+    disk_files = AudioCache._disk_files
+    monkeypatch.setattr(AudioCache, "_disk_files",
+                        lambda: scans.append(1) or disk_files())
+
+    await AudioCache.render("A", "v", "f", fake)
+    await AudioCache.render("B", "v", "f", fake)
+    AudioCache._read_disk(AudioCache.key("A", "v", "f"))  # "A", el más reciente
+    await AudioCache.render("C", "v", "f", fake)  # expulsa a "B"
+
+    files = [f for _, _, fs in os.walk(AudioCache.root) for f in fs]
+    assert sorted(files) == sorted(AudioCache.key(t, "v", "f")
+                                   for t in ("A", "C"))
+    assert AudioCache.stats()["disk_bytes"] == 42
+    assert len(scans) == 1
+
+
+async def test_sintesis_concurrente_se_comparte():
+    import time
+    fake = MagicMock(side_effect=lambda text: time.sleep(0.05) or b"A")
+
+    results = await asyncio.gather(*(AudioCache.render("Hola", "v", "f", fake)
+                                     for _ in range(5)))
+
+    assert results == [b"A"] * 5
+    fake.assert_called_once()
+
+
+@patch("services.workerManager.SpeechService")
+async def test_prerender_messages(mock_speech):
+    from services.workerManager import WorkerManager
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    count = await WorkerManager.prerender_messages()
+    await WorkerManager.check_worker(123, "")
+
+    assert count == len(WorkerManager.MESSAGES)
+    assert mock_speech.text_to_audio_async.await_count == count
+    assert AudioCache.stats()["pinned"] == count
+
+
+@patch("services.workerManager.SpeechService")
+async def test_prerender_en_los_formatos_negociados(mock_speech, monkeypatch):
+    from services.workerManager import WorkerManager
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    mp3 = "Audio16Khz32KBitRateMonoMp3"
+    monkeypatch.setattr(WorkerManager, "prerender_formats", (mp3,))
+
+    count = await WorkerManager.prerender_messages()
+    # El kiosco pide audio/mpeg: la respuesta sale de la caché
+    await WorkerManager.check_worker(123, "", audio_format=mp3)
+
+    assert count == 2 * len(WorkerManager.MESSAGES)
+    assert mock_speech.text_to_audio_async.await_count == count
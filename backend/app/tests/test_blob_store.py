@@ -0,0 +1,117 @@
+import base64
+import pytest
+from unittest.mock import AsyncMock, patch
+from db.blobStore import BlobStore
+from db.photoMigration import migrate_photos
+from services.workerManager import WorkerManager
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+# ======================
+#     LOCAL BACKEND
+# ======================
+
+def test_put_y_get_por_contenido(blob_store):
+    ref = BlobStore.put(b"foto")
+
+    assert ref == BlobStore.ref_for(b"foto")
+    assert BlobStore.get(ref) == b"foto"
+    assert BlobStore.put(b"foto") == ref  # misma foto → mismo blob
+
+
+def test_get_inexistente_y_delete(blob_store):
+    ref = BlobStore.put(b"x")
+    BlobStore.delete(ref)
+
+    assert BlobStore.get(ref) is None
+    assert not BlobStore.exists(ref)
+
+
+def test_referencia_invalida(blob_store):
+    with pytest.raises(ValueError):
+        BlobStore.get("../../etc/passwd")
+
+
+def test_sin_blob_backend_esta_desactivado(monkeypatch):
+    monkeypatch.delenv("BLOB_BACKEND", raising=False)
+    BlobStore.reset()
+
+    assert not BlobStore.enabled()
+    with pytest.raises(RuntimeError):
+        BlobStore.put(b"foto")
+
+
+# ======================
+#   WORKERS + BLOBS
+# ======================
+
+async def test_sin_blob_store_la_foto_queda_en_la_fila(repo, jpeg_base64):
+    photo = jpeg_base64((0, 0, 255))
+
+    worker = await WorkerManager.create("Alex", "123", 1, photo)
+
+    row = (await repo.get_worker(worker["id"])).data[0]
+    assert row["photo"] == photo and row["photo_ref"] is None
+    assert await WorkerManager.read_photo(worker["id"]) == base64.b64decode(photo)
+
+
+async def test_update_misma_foto_no_escribe(repo, blob_store, jpeg_base64):
+    photo = jpeg_base64((0, 0, 255))
+    worker = await WorkerManager.create("Alex", "123", 1, photo)
+
+    await WorkerManager.update(worker["id"], photo=photo)
+
+    assert (await repo.get_worker(worker["id"])).data[0]["version"] == 0
+
+
+@patch("services.workerManager.SpeechService")
+async def test_check_worker_lee_el_blob(mock_speech, repo, blob_store,
+                                        jpeg_base64):
+    from services.templateStore import TemplateStore
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    await repo.create_role({"name": "Operario", "color": "#FF0000"})
+    photo = jpeg_base64((0, 0, 255))
+    await WorkerManager.create("Alex", "123", 1, photo)
+    TemplateStore.clear()
+
+    with patch.object(TemplateStore, "fetch",
+                      new_callable=AsyncMock) as legacy_fetch:
+        result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is True
+    legacy_fetch.assert_not_called()
+
+
+# ======================
+#      MIGRACIÓN
+# ======================
+
+async def test_migrate_photos(repo, blob_store, jpeg_base64):
+    photo = jpeg_base64((0, 255, 0))
+    for i in range(3):
+        await repo.create_worker({"name": f"W{i}", "document": str(i),
+                                  "role": 1, "photo": photo})
+    await repo.create_worker({"name": "Sin foto", "document": "9", "role": 1})
+
+    counts = await migrate_photos(batch_size=2)
+
+    assert counts == {"migrated": 3, "skipped": 1, "invalid": 0}
+    rows = (await repo.get_worker_list()).data
+    assert all(row["photo"] is None for row in rows)
+    assert BlobStore.get(rows[0]["photo_ref"]) == base64.b64decode(photo)
+    # Idempotente
+    assert (await migrate_photos())["migrated"] == 0
+
+
+async def test_migrate_photos_requiere_blob_backend(repo, jpeg_base64):
+    await repo.create_worker({"name": "W", "document": "1", "role": 1,
+                              "photo": jpeg_base64((0, 255, 0))})
+
+    with pytest.raises(RuntimeError):
+        await migrate_photos()
+
+    assert (await repo.get_worker_list()).data[0]["photo"]
@@ -85,6 +85,19 @@ def test_get_workers_by_document(mock_client):
     mock_table.select.return_value.eq.return_value.execute.assert_called_once()
 
 
+def test_list_workers(mock_client):
+    mock_table = mock_client.table.return_value
+
+    Database.list_workers(["id", "name"], after_id=10, limit=25)
+
+    mock_client.table.assert_called_once_with("Worker")
+    mock_table.select.assert_called_once_with("id,name")
+    mock_select = mock_table.select.return_value
+    mock_select.gt.assert_called_once_with("id", 10)
+    mock_select.gt.return_value.order.assert_called_once_with("id")
+    mock_select.gt.return_value.order.return_value.limit.assert_called_once_with(25)
+
+
 # ======================
 #        ROLES
 # ======================
@@ -145,3 +158,16 @@ def test_update_role(mock_client):
     mock_table.update.assert_called_once_with(payload)
     mock_table.update.return_value.eq.assert_called_once_with("id", role_id)
     mock_table.update.return_value.eq.return_value.execute.assert_called_once()
+
+
+def test_update_worker_if_version(mock_client):
+    mock_table = mock_client.table.return_value
+    payload = {"name": "Nuevo"}
+
+    Database.update_worker_if_version(7, payload, 3)
+
+    mock_client.table.assert_called_once_with("Worker")
+    mock_table.update.assert_called_once_with({"name": "Nuevo", "version": 4})
+    mock_table.update.return_value.eq.assert_called_once_with("id", 7)
+    mock_table.update.return_value.eq.return_value.eq.assert_called_once_with(
+        "version", 3)
@@ -0,0 +1,49 @@
+import os
+import pytest
+from core.executor import ComputeExecutor
+from services.imageService import ImageService
+import numpy as np
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """Pools nuevos para cada test, cerrados al terminar."""
+    ComputeExecutor.shutdown()
+    yield ComputeExecutor
+    ComputeExecutor.shutdown()
+
+
+async def test_run_io_ejecuta_en_hilo(executor):
+    result = await executor.run_io(sum, [1, 2, 3])
+
+    assert result == 6
+    stats = executor.stats()["io"]
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+async def test_run_cpu_usa_otro_proceso(executor, monkeypatch):
+    monkeypatch.setattr(executor, "processes", 1)
+
+    pid = await executor.run_cpu(os.getpid)
+    img = np.zeros((20, 20), dtype=np.uint8)
+    score = await executor.run_cpu(ImageService.ssim, img, img)
+
+    assert pid != os.getpid()
+    assert score == pytest.approx(1.0)
+    assert executor.stats()["cpu"]["completed"] == 2
+
+
+async def test_run_cpu_sin_procesos_usa_hilos(executor, monkeypatch):
+    monkeypatch.setattr(executor, "processes", 0)
+
+    pid = await executor.run_cpu(os.getpid)
+
+    assert pid == os.getpid()
+
+
+async def test_excepciones_se_propagan_y_se_cuentan(executor):
+    with pytest.raises(ValueError):
+        await executor.run_io(int, "no-es-numero")
+
+    assert executor.stats()["io"]["failed"] == 1
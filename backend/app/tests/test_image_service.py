@@ -92,3 +92,262 @@ def test_check_shirt_color_lanza_error_si_bytes_invalidos():
     """Debe lanzar ValueError si los bytes no corresponden a una imagen."""
     with pytest.raises(ValueError):
         ImageService.check_role(b"NO_ES_IMAGEN", "#00FF00")
+
+
+# --- Tests del contexto de verificación (decodificación única) ---
+
+
+def test_load_probe_decodifica_una_sola_vez(monkeypatch):
+    """match_face y match_role deben compartir una única decodificación."""
+    img = np.full((200, 200, 3), (0, 0, 255), dtype=np.uint8)
+    img_bytes = img_to_bytes(img)
+    template = ImageService.prepare_template(img_bytes)
+
+    calls = []
+    original = cv2.imdecode
+
+    def counting_imdecode(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "imdecode", counting_imdecode)
+
+    probe = ImageService.load_probe(img_bytes)
+    assert ImageService.match_face(probe, template) is True
+    assert ImageService.match_role(probe, "#FF0000") is True
+    assert len(calls) == 1
+
+
+def test_match_role_equivale_a_check_role():
+    img = np.full((200, 200, 3), (255, 0, 0), dtype=np.uint8)
+    img_bytes = img_to_bytes(img)
+    probe = ImageService.load_probe(img_bytes)
+
+    assert ImageService.match_role(probe, "#0000FF") == \
+        ImageService.check_role(img_bytes, "#0000FF")
+    assert ImageService.match_role(probe, "#FF0000") == \
+        ImageService.check_role(img_bytes, "#FF0000")
+
+
+# --- Tests de la resolución canónica de trabajo ---
+
+
+def test_jpeg_dimensions_lee_la_cabecera():
+    img = np.zeros((96, 128, 3), dtype=np.uint8)
+    assert ImageService._jpeg_dimensions(img_to_bytes(img)) == (128, 96)
+    assert ImageService._jpeg_dimensions(b"NO_ES_JPEG") is None
+
+
+def test_working_size_normaliza_y_decodifica_reducido(monkeypatch):
+    """Un JPEG grande se decodifica a escala reducida y se normaliza."""
+    monkeypatch.setattr(ImageService, "working_size", (320, 240))
+    img = np.full((960, 1280, 3), 120, dtype=np.uint8)
+    img_bytes = img_to_bytes(img)
+
+    flags_used = []
+    original = cv2.imdecode
+
+    def spy_imdecode(buf, flags):
+        flags_used.append(flags)
+        return original(buf, flags)
+
+    monkeypatch.setattr(cv2, "imdecode", spy_imdecode)
+
+    probe = ImageService.load_probe(img_bytes)
+
+    assert probe.image.shape == (240, 320, 3)
+    assert flags_used == [cv2.IMREAD_REDUCED_COLOR_4]
+
+
+def test_working_size_en_png_redimensiona(monkeypatch):
+    """Formatos sin decodificación reducida se decodifican y redimensionan."""
+    monkeypatch.setattr(ImageService, "working_size", (64, 48))
+    success, buffer = cv2.imencode(".png", np.zeros((100, 100, 3), np.uint8))
+
+    probe = ImageService.load_probe(buffer.tobytes())
+    template = ImageService.prepare_template(buffer.tobytes())
+
+    assert probe.gray.shape == (48, 64)
+    assert template.gray.shape == (48, 64)
+
+
+def test_check_face_con_working_size(monkeypatch):
+    """La comparación sigue funcionando con imágenes de distinto tamaño."""
+    monkeypatch.setattr(ImageService, "working_size", (64, 48))
+    img1 = img_to_bytes(np.full((300, 400, 3), 200, dtype=np.uint8))
+    img2 = img_to_bytes(np.full((60, 80, 3), 200, dtype=np.uint8))
+
+    assert ImageService.check_face(img1, img2) is True
+
+
+# --- Tests del SSIM propio (validación numérica contra skimage) ---
+
+
+@pytest.mark.parametrize("shape", [(50, 50), (240, 320), (97, 131)])
+def test_ssim_coincide_con_skimage(shape):
+    from skimage.metrics import structural_similarity
+
+    rng = np.random.default_rng(42)
+    img1 = rng.integers(0, 256, shape, dtype=np.uint8)
+    ruido = rng.integers(-25, 25, shape)
+    candidates = [
+        img1,
+        cv2.GaussianBlur(img1, (5, 5), 1.5),
+        np.clip(img1.astype(int) + ruido, 0, 255).astype(np.uint8),
+        np.full(shape, 128, dtype=np.uint8),
+    ]
+
+    for img2 in candidates:
+        expected = structural_similarity(img1, img2)
+        assert ImageService.ssim(img1, img2) == pytest.approx(expected, abs=1e-5)
+
+
+def test_ssim_reutiliza_buffers():
+    """Dos llamadas con el mismo tamaño comparten los buffers de trabajo."""
+    img = np.zeros((30, 40), dtype=np.uint8)
+    ImageService.ssim(img, img)
+    first = ImageService._ssim_buffers((30, 40))
+    ImageService.ssim(img, img)
+
+    assert ImageService._ssim_buffers((30, 40)) is first
+
+
+def test_ssim_buffers_acotados(monkeypatch):
+    """Solo se conservan los buffers de los últimos tamaños usados."""
+    monkeypatch.setattr(ImageService, "ssim_buffer_shapes", 2)
+    first = ImageService._ssim_buffers((30, 40))
+    ImageService._ssim_buffers((31, 40))
+    ImageService._ssim_buffers((30, 40))  # el más reciente
+    ImageService._ssim_buffers((32, 40))  # expulsa (31, 40)
+
+    assert ImageService._ssim_buffers((30, 40)) is first
+    assert len(ImageService._ssim_scratch.by_shape) == 2
+    assert (31, 40) not in ImageService._ssim_scratch.by_shape
+
+
+def test_ssim_lanza_error_si_tamanos_distintos():
+    with pytest.raises(ValueError):
+        ImageService.ssim(np.zeros((10, 10), np.uint8),
+                          np.zeros((10, 12), np.uint8))
+
+
+# --- Tests de la cascada multiescala ---
+
+
+@pytest.fixture
+def cascada(monkeypatch):
+    monkeypatch.setattr(ImageService, "cascade_levels", 2)
+    monkeypatch.setattr(ImageService, "cascade_margin", 0.15)
+    ImageService.reset_cascade_stats()
+    yield
+    ImageService.reset_cascade_stats()
+
+
+def _textura(seed, shape=(200, 200, 3)):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, shape, dtype=np.uint8)
+    return cv2.GaussianBlur(img, (9, 9), 3)
+
+
+def test_cascada_acepta_en_el_nivel_grueso(cascada):
+    img_bytes = img_to_bytes(_textura(1))
+
+    assert ImageService.check_face(img_bytes, img_bytes) is True
+    assert ImageService.cascade_stats()["decisions_by_level"] == {2: 1}
+
+
+def test_cascada_rechaza_en_el_nivel_grueso(cascada):
+    textura = _textura(1)
+    img1 = img_to_bytes(textura)
+    img2 = img_to_bytes(255 - textura)  # estructura invertida
+
+    assert ImageService.check_face(img1, img2) is False
+    assert ImageService.cascade_stats()["decisions_by_level"] == {2: 1}
+
+
+def test_cascada_baja_de_nivel_si_es_dudoso(cascada, monkeypatch):
+    """Un puntaje cercano a la tolerancia obliga a usar resolución completa."""
+    img_bytes = img_to_bytes(_textura(1))
+    monkeypatch.setattr(ImageService, "ssim", classmethod(lambda cls, a, b: 0.75))
+
+    assert ImageService.check_face(img_bytes, img_bytes, tolerance=0.75) is True
+    assert ImageService.cascade_stats()["decisions_by_level"] == {0: 1}
+
+
+# --- Tests de run_stages y de la calidad de imagen ---
+
+def _textured(brightness):
+    rng = np.random.default_rng(0)
+    noise = rng.integers(-30, 30, (120, 120, 3))
+    return np.clip(brightness + noise, 0, 255).astype(np.uint8)
+
+
+def test_match_quality_rechaza_imagenes_oscuras_y_borrosas():
+    ok = ImageService.load_probe(img_to_bytes(_textured(128)))
+    dark = ImageService.load_probe(img_to_bytes(_textured(10)))
+    flat = ImageService.load_probe(
+        img_to_bytes(np.full((120, 120, 3), 128, dtype=np.uint8)))
+
+    assert ImageService.match_quality(ok) is True
+    assert ImageService.match_quality(dark) is False
+    assert ImageService.match_quality(flat) is False
+
+
+def test_run_stages_se_detiene_en_el_primer_rechazo():
+    img = np.zeros((120, 120, 3), dtype=np.uint8)
+    img[:, :] = (0, 0, 255)  # rojo
+    img_bytes = img_to_bytes(img)
+    template = ImageService.prepare_template(img_bytes)
+
+    result = ImageService.run_stages(img_bytes, ["uniform", "face"],
+                                     template, "#00FF00", role_tolerance=30)
+
+    assert result["failed"] == "uniform"
+    assert list(result["timings"]) == ["uniform"]
+    assert result["cascade_level"] is None
+
+    result = ImageService.run_stages(img_bytes, ["uniform", "face"],
+                                     template, "#FF0000", role_tolerance=30)
+
+    assert result["failed"] is None
+    assert list(result["timings"]) == ["uniform", "face"]
+    assert result["cascade_level"] == 0
+
+
+def test_run_stages_imagen_invalida_la_rechaza_validity():
+    for img_bytes in (b"no es una imagen",
+                      img_to_bytes(np.zeros((4, 4, 3), dtype=np.uint8))):
+        result = ImageService.run_stages(img_bytes, ["uniform", "face"],
+                                         None, "#FF0000")
+
+        assert result["failed"] == "validity"
+        assert result["timings"] == {}
+
+
+
+# --- Plantilla enviada al pool de procesos ---
+
+def test_probe_shape_sin_decodificar(monkeypatch):
+    img_bytes = img_to_bytes(np.zeros((48, 64, 3), dtype=np.uint8))
+
+    assert ImageService.probe_shape(img_bytes) == (48, 64)
+    assert ImageService.probe_shape(b"no es jpeg") is None
+    monkeypatch.setattr(ImageService, "working_size", (32, 24))
+    assert ImageService.probe_shape(b"no es jpeg") == (24, 32)
+
+
+def test_for_shape_envia_solo_la_plantilla_reducida():
+    import pickle
+    rng = np.random.default_rng(1)
+    photo = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    template = ImageService.prepare_template(img_to_bytes(photo))
+    probe_bytes = img_to_bytes(cv2.resize(photo, (160, 120)))
+
+    slim = template.for_shape((120, 160), levels=2)
+
+    assert slim.gray.shape == (120, 160)
+    assert template.resized((120, 160)) is slim.gray  # queda en caché
+    assert len(pickle.dumps(slim)) < len(pickle.dumps(template)) / 4
+    full = ImageService.run_stages(probe_bytes, ["face"], template, None)
+    reduced = ImageService.run_stages(probe_bytes, ["face"], slim, None)
+    assert reduced["failed"] == full["failed"]
@@ -0,0 +1,61 @@
+import base64
+import pytest
+from services.imageUtils import ImageDecodeError, ImageUtils
+
+RAW = bytes(range(256)) * 4
+ENCODED = base64.b64encode(RAW).decode()
+
+
+def test_decode_base64_con_y_sin_prefijo():
+    assert ImageUtils.decode_base64(ENCODED) == RAW
+    assert ImageUtils.decode_base64(
+        "data:image/jpeg;base64," + ENCODED) == RAW
+
+
+def test_decode_base64_acepta_memoryview():
+    buffer = ("data:image/png;base64," + ENCODED).encode()
+
+    assert ImageUtils.decode_base64(memoryview(buffer)) == RAW
+    assert ImageUtils.decode_base64(bytearray(ENCODED, "ascii")) == RAW
+
+
+@pytest.mark.parametrize("data, reason", [
+    ("", "empty"),
+    (None, "empty"),
+    ("img.jpg", "invalid"),
+    ("ñandú", "invalid"),
+])
+def test_decode_base64_errores(data, reason):
+    with pytest.raises(ImageDecodeError) as error:
+        ImageUtils.decode_base64(data)
+
+    assert error.value.reason == reason
+
+
+def test_limite_se_revisa_antes_de_decodificar():
+    # Ni siquiera es base64 válido: se rechaza por tamaño sin decodificar
+    oversized = "!" * 4000
+
+    with pytest.raises(ImageDecodeError) as error:
+        ImageUtils.decode_base64(oversized, max_bytes=1000)
+
+    assert error.value.reason == "too_large"
+    assert ImageUtils.decode_base64(ENCODED, max_bytes=len(RAW)) == RAW
+
+
+def test_limite_por_defecto(monkeypatch):
+    monkeypatch.setattr(ImageUtils, "max_image_bytes", 100)
+
+    with pytest.raises(ImageDecodeError):
+        ImageUtils.decode_base64(ENCODED)
+    with pytest.raises(ImageDecodeError):
+        ImageUtils.check_size(RAW)
+    assert ImageUtils.decode_base64(ENCODED, max_bytes=0) == RAW
+
+
+def test_funciones_existentes_mantienen_su_contrato():
+    assert ImageUtils.base64_to_binary("") == b""
+    assert ImageUtils.base64_to_binary(ENCODED) == RAW
+    assert ImageUtils.validate_base64(ENCODED) is True
+    assert ImageUtils.validate_base64("img.jpg") is False
+    assert ImageUtils.binary_to_base64(memoryview(RAW)) == ENCODED
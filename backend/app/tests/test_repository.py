@@ -0,0 +1,151 @@
+import pytest
+from db.repository import AsyncDatabase, SQLiteRepository
+from services.roleManager import RoleManager
+from services.workerManager import WorkerManager
+
+
+# ======================
+#      WORKERS
+# ======================
+
+async def test_create_and_get_worker(repo):
+    created = (await repo.create_worker(
+        {"name": "Juan", "document": "123", "role": 1, "photo": "abc"})).data
+
+    assert created[0]["id"] == 1
+    fetched = (await repo.get_worker(1)).data
+    assert fetched == created
+
+
+async def test_photo_bytes_se_guarda_en_base64(repo):
+    created = (await repo.create_worker(
+        {"name": "Ana", "document": "9", "role": 1, "photo": b"\x01\x02"})).data
+
+    assert created[0]["photo"] == "AQI="
+
+
+async def test_update_y_delete_worker(repo):
+    await repo.create_worker({"name": "Juan", "document": "123", "role": 1})
+
+    updated = (await repo.update_worker(1, {"name": "Pedro"})).data
+    deleted = (await repo.delete_worker(1)).data
+
+    assert updated[0]["name"] == "Pedro"
+    assert deleted[0]["id"] == 1
+    assert (await repo.get_worker_list()).data == []
+
+
+async def test_update_if_version_detecta_conflicto(repo):
+    await repo.create_worker({"name": "Juan", "document": "123", "role": 1})
+
+    first = (await repo.update_worker_if_version(1, {"name": "A"}, 0)).data
+    stale = (await repo.update_worker_if_version(1, {"name": "B"}, 0)).data
+
+    assert first[0]["version"] == 1
+    assert stale == []
+    assert (await repo.get_worker(1)).data[0]["name"] == "A"
+
+
+async def test_get_workers_by_document(repo):
+    await repo.create_worker({"name": "A", "document": "111", "role": 1})
+    await repo.create_worker({"name": "B", "document": "222", "role": 1})
+
+    result = (await repo.get_workers_by_document("222")).data
+
+    assert [w["name"] for w in result] == ["B"]
+
+
+async def test_list_workers_pagina_por_cursor(repo):
+    for i in range(5):
+        await repo.create_worker({"name": f"W{i}", "document": str(i),
+                                  "role": 1, "photo": "x" * 100})
+
+    first = (await repo.list_workers(["id", "name"], None, 2)).data
+    second = (await repo.list_workers(["id", "name"], first[-1]["id"], 2)).data
+
+    assert [w["id"] for w in first] == [1, 2]
+    assert [w["id"] for w in second] == [3, 4]
+    assert "photo" not in first[0]
+
+
+async def test_columnas_desconocidas_se_rechazan(repo):
+    with pytest.raises(ValueError):
+        await repo.create_worker({"name": "A", "drop table": 1})
+
+
+# ======================
+#   MANAGERS + SQLITE
+# ======================
+
+async def test_role_manager_sobre_sqlite(repo):
+    role = await RoleManager.create(name="operario", color="#f00")
+    old = await RoleManager.update(role["id"], color="#00ff00")
+
+    assert old["color"] == "#FF0000"
+    assert (await RoleManager.read_by_id(role["id"]))["color"] == "#00FF00"
+    assert len(await RoleManager.read_all()) == 1
+
+
+async def test_worker_manager_sobre_sqlite(repo):
+    worker = await WorkerManager.create("Alex", "123", 2, "img.jpg")
+    await WorkerManager.update(worker["id"], name="Alejandro")
+
+    assert (await WorkerManager.read_by_id(worker["id"]))["name"] == "Alejandro"
+    assert (await WorkerManager.delete(worker["id"]))["id"] == worker["id"]
+    assert await WorkerManager.read_all() == []
+
+
+# ======================
+#     SINGLE-FLIGHT
+# ======================
+
+class SlowRepository(SQLiteRepository):
+    """Cuenta las consultas y las demora para que se solapen."""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.queries = 0
+
+    async def get_worker(self, worker_id):
+        import asyncio
+        self.queries += 1
+        await asyncio.sleep(0.05)
+        if worker_id < 0:
+            raise ValueError("id inválido")
+        return await super().get_worker(worker_id)
+
+
+@pytest.fixture
+def slow_repo():
+    backend = SlowRepository()
+    AsyncDatabase.use(backend)
+    yield backend
+    AsyncDatabase.use(None)
+
+
+async def test_lecturas_concurrentes_se_agrupan(slow_repo):
+    import asyncio
+    await slow_repo.create_worker({"name": "Juan", "document": "1", "role": 1})
+    before = AsyncDatabase.coalescing_stats()["coalesced"]
+
+    results = await asyncio.gather(*(AsyncDatabase.get_worker(1)
+                                     for _ in range(5)))
+    other = await AsyncDatabase.get_worker(1)
+
+    assert slow_repo.queries == 2  # 5 concurrentes = 1 consulta, + 1 después
+    assert AsyncDatabase.coalescing_stats()["coalesced"] - before == 4
+    assert all(r.data[0]["name"] == "Juan" for r in results + [other])
+    # Cada llamada recibe sus propias filas
+    results[1].data[0]["name"] = "Otro"
+    assert results[2].data[0]["name"] == "Juan"
+
+
+async def test_error_se_comparte_y_no_queda_en_curso(slow_repo):
+    import asyncio
+    results = await asyncio.gather(AsyncDatabase.get_worker(-1),
+                                   AsyncDatabase.get_worker(-1),
+                                   return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert slow_repo.queries == 1
+    assert AsyncDatabase.coalescing_stats()["in_flight"] == 0
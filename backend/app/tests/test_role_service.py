@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from services.roleManager import RoleManager
 from pydantic import ValidationError
 
@@ -14,8 +14,8 @@ class FakeResponse:
 # =========================================================
 # CREATE
 # =========================================================
-@patch("services.roleManager.Database")
-def test_create_role_success(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_create_role_success(mock_db):
     """
     Prueba que al crear un rol:
     1. Se llame a la BD.
@@ -28,7 +28,7 @@ def test_create_role_success(mock_db):
     ])
 
     # INTENCIÓN: Enviamos datos "sucios" (minúsculas, espacios, hex corto)
-    role = RoleManager.create(name="  admin  ", color="#fff")
+    role = await RoleManager.create(name="  admin  ", color="#fff")
 
     # VERIFICACIÓN 1: El retorno es correcto
     assert role["id"] == 10
@@ -41,13 +41,13 @@ def test_create_role_success(mock_db):
         "color": "#FFFFFF"
     })
 
-@patch("services.roleManager.Database")
-def test_create_role_invalid_color(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_create_role_invalid_color(mock_db):
     """
     Prueba de validación: Si el color es inválido, debe fallar ANTES de llamar a la BD.
     """
     with pytest.raises(ValidationError):
-        RoleManager.create(name="Admin", color="azul-patata")
+        await RoleManager.create(name="Admin", color="azul-patata")
     
     # La base de datos NUNCA debió ser llamada
     mock_db.create_role.assert_not_called()
@@ -55,15 +55,15 @@ def test_create_role_invalid_color(mock_db):
 # =========================================================
 # READ ALL
 # =========================================================
-@patch("services.roleManager.Database")
-def test_read_all_roles(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_read_all_roles(mock_db):
     
     mock_db.get_role_list.return_value = FakeResponse([
         {"id": 1, "name": "Admin", "color": "#FF0000"},
         {"id": 2, "name": "User", "color": "#0000FF"}
     ])
 
-    roles = RoleManager.read_all()
+    roles = await RoleManager.read_all()
 
     assert len(roles) == 2
     mock_db.get_role_list.assert_called_once()
@@ -71,24 +71,25 @@ def test_read_all_roles(mock_db):
 # =========================================================
 # READ BY ID
 # =========================================================
-@patch("services.roleManager.Database")
-def test_read_by_id(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_read_by_id(mock_db):
     
-    mock_db.get_role.return_value = FakeResponse([
+    mock_db.get_role_list.return_value = FakeResponse([
         {"id": 5, "name": "Supervisor", "color": "#00FF00"}
     ])
 
-    role = RoleManager.read_by_id(5)
+    role = await RoleManager.read_by_id(5)
 
     assert role["id"] == 5
     assert role["name"] == "Supervisor"
-    mock_db.get_role.assert_called_once_with(5)
+    mock_db.get_role_list.assert_called_once()
+    mock_db.get_role.assert_not_called()
 
 # =========================================================
 # UPDATE
 # =========================================================
-@patch("services.roleManager.Database")
-def test_update_role_success(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_role_success(mock_db):
     """
     Prueba actualizar un rol existente.
     Verifica que se mezclen los datos viejos con los nuevos y se validen.
@@ -102,7 +103,7 @@ def test_update_role_success(mock_db):
     mock_db.update_role.return_value = None
 
     # LLAMADA: Cambiamos solo el color (y lo enviamos en minúsculas para probar validación)
-    old_role_returned = RoleManager.update(1, color="#abc")
+    old_role_returned = await RoleManager.update(1, color="#abc")
 
     # VERIFICACIÓN:
     # El método retorna el estado ANTERIOR del objeto (según tu lógica actual)
@@ -117,13 +118,13 @@ def test_update_role_success(mock_db):
 # =========================================================
 # UPDATE NOT FOUND
 # =========================================================
-@patch("services.roleManager.Database")
-def test_update_role_not_found(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_role_not_found(mock_db):
     
     # Simulamos que no encuentra el rol (lista vacía)
     mock_db.get_role.return_value = FakeResponse([])
 
-    result = RoleManager.update(99, name="Nuevo")
+    result = await RoleManager.update(99, name="Nuevo")
 
     # Verificamos el objeto "sentinel" de error que definiste
     assert result["id"] == -1
@@ -135,15 +136,15 @@ def test_update_role_not_found(mock_db):
 # =========================================================
 # DELETE
 # =========================================================
-@patch("services.roleManager.Database")
-def test_delete_role(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_delete_role(mock_db):
     
     # Simulamos que la BD devuelve el rol eliminado
     mock_db.delete_role.return_value = FakeResponse([
         {"id": 1, "name": "Admin", "color": "#000"}
     ])
 
-    deleted_role = RoleManager.delete(1)
+    deleted_role = await RoleManager.delete(1)
 
     assert deleted_role["id"] == 1
     mock_db.delete_role.assert_called_once_with(1)
@@ -151,15 +152,88 @@ def test_delete_role(mock_db):
 # =========================================================
 # DELETE NOT FOUND
 # =========================================================
-@patch("services.roleManager.Database")
-def test_delete_role_not_found(mock_db):
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_delete_role_not_found(mock_db):
     
     # Simulamos respuesta vacía al intentar borrar
     mock_db.delete_role.return_value = FakeResponse([])
 
-    result = RoleManager.delete(7)
+    result = await RoleManager.delete(7)
 
     assert result["id"] == 7
     assert result["name"] == "Null"
     # Nota: validamos también el color dummy que agregamos para evitar errores de validación
-    assert result["color"] == "#000000"
\ No newline at end of file
+    assert result["color"] == "#000000"
+
+
+# =========================================================
+# CACHÉ DE ROLES
+# =========================================================
+ROLES = [
+    {"id": 1, "name": "Admin", "color": "#FF0000"},
+    {"id": 2, "name": "User", "color": "#0000FF"},
+]
+
+
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_cache_sirve_lecturas_desde_memoria(mock_db):
+    mock_db.get_role_list.return_value = FakeResponse(ROLES)
+
+    await RoleManager.read_all()
+    role = await RoleManager.read_by_id(2)
+    await RoleManager.read_by_id(1)
+
+    assert role["color"] == "#0000FF"
+    mock_db.get_role_list.assert_called_once()
+    mock_db.get_role.assert_not_called()
+    assert RoleManager.stats()["hits"] == 2
+    assert RoleManager.stats()["misses"] == 1
+
+
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_cache_se_invalida_al_escribir(mock_db):
+    mock_db.get_role_list.return_value = FakeResponse(ROLES)
+    mock_db.delete_role.return_value = FakeResponse([ROLES[0]])
+
+    await RoleManager.read_all()
+    await RoleManager.delete(1)
+    mock_db.get_role_list.return_value = FakeResponse(ROLES[1:])
+
+    assert len(await RoleManager.read_all()) == 1
+    assert mock_db.get_role_list.call_count == 2
+
+
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_cache_expira_con_ttl(mock_db, monkeypatch):
+    mock_db.get_role_list.return_value = FakeResponse(ROLES)
+    await RoleManager.read_all()
+
+    # Simula que pasó más tiempo que el TTL desde la carga
+    monkeypatch.setattr(RoleManager, "_loaded_at",
+                        RoleManager._loaded_at - RoleManager.cache_ttl - 1)
+    await RoleManager.read_all()
+
+    assert mock_db.get_role_list.call_count == 2
+
+
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_lecturas_no_modifican_la_cache(mock_db):
+    mock_db.get_role_list.return_value = FakeResponse([dict(r) for r in ROLES])
+
+    role = await RoleManager.read_by_id(1)
+    role["color"] = "#123456"
+
+    assert (await RoleManager.read_by_id(1))["color"] == "#FF0000"
+
+
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_rol_fuera_de_la_cache_se_lee_de_la_bd(mock_db):
+    mock_db.get_role_list.return_value = FakeResponse(ROLES)
+    mock_db.get_role.return_value = FakeResponse([
+        {"id": 5, "name": "Supervisor", "color": "#00FF00"}
+    ])
+
+    role = await RoleManager.read_by_id(5)
+
+    assert role["name"] == "Supervisor"
+    mock_db.get_role.assert_called_once_with(5)
@@ -1,5 +1,7 @@
 import pytest
 import io
+import threading
+import wave
 from unittest.mock import patch, MagicMock
 from app.services.speechService import SpeechService
 
@@ -12,6 +14,8 @@ def setup_env(monkeypatch):
         "AZURE_URL", "https://fake-region.api.cognitive.microsoft.com/")
     # Reinicia la configuración del cliente entre tests
     SpeechService.cliente = None
+    SpeechService._clientes_formato.clear()
+    SpeechService.vaciar_pool()
 
 
 # --- Pruebas de text_to_audio ---
@@ -108,3 +112,222 @@ def test_configurar_lanza_error_sin_variables(monkeypatch):
 
     with pytest.raises(ValueError):
         SpeechService.configurar()
+
+
+# --- Pruebas de formatos de salida ---
+
+def test_negociar_formato_por_accept():
+    assert SpeechService.negociar_formato(None) == SpeechService.formato_salida
+    assert SpeechService.negociar_formato(
+        "application/json") == SpeechService.formato_salida
+    assert SpeechService.negociar_formato(
+        "application/json, audio/ogg") == "Ogg16Khz16BitMonoOpus"
+    assert SpeechService.negociar_formato(
+        "audio/ogg;q=0.5, audio/mpeg;q=0.8") == "Audio16Khz32KBitRateMonoMp3"
+    assert SpeechService.mime_type("Ogg16Khz16BitMonoOpus") == "audio/ogg"
+
+
+def test_formatos_prerender(monkeypatch):
+    monkeypatch.setattr(SpeechService, "formato_salida",
+                        "Riff16Khz16BitMonoPcm")
+
+    assert SpeechService.formatos_prerender("mp3, wav,ogg,mp3") == (
+        "Audio16Khz32KBitRateMonoMp3", "Ogg16Khz16BitMonoOpus")
+    assert SpeechService.formatos_prerender("") == ()
+    with pytest.raises(ValueError):
+        SpeechService.formatos_prerender("flac")
+
+
+@patch("app.services.speechService.speechsdk")
+def test_text_to_audio_en_otro_formato_usa_su_propia_configuracion(
+        mock_speechsdk):
+    mock_speechsdk.ResultReason.SynthesizingAudioCompleted = "OK"
+    result = MagicMock(reason="OK", audio_data=b"OGG")
+    synth = mock_speechsdk.SpeechSynthesizer.return_value
+    synth.speak_text_async.return_value.get.return_value = result
+
+    SpeechService.text_to_audio("Hola", formato="Ogg16Khz16BitMonoOpus")
+    SpeechService.text_to_audio("Hola", formato="Ogg16Khz16BitMonoOpus")
+
+    # Global + una por formato, reutilizada en la segunda llamada
+    assert mock_speechsdk.SpeechConfig.call_count == 2
+    with pytest.raises(ValueError):
+        SpeechService.text_to_audio("Hola", formato="Inexistente")
+
+
+# --- Pruebas de las variantes asíncronas ---
+
+class FakeSignal:
+    """Señal del SDK: los callbacks se disparan desde otro hilo."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+    def disconnect_all(self):
+        self.callbacks = []
+
+    def fire(self, result):
+        evt = MagicMock(result=result)
+        callbacks = list(self.callbacks)
+        threading.Thread(target=lambda: [cb(evt) for cb in callbacks]).start()
+
+
+@patch("app.services.speechService.speechsdk")
+async def test_text_to_audio_async_espera_el_evento(mock_speechsdk):
+    mock_speechsdk.ResultReason.SynthesizingAudioCompleted = "OK"
+    synth = mock_speechsdk.SpeechSynthesizer.return_value
+    synth.synthesis_completed = FakeSignal()
+    synth.synthesis_canceled = FakeSignal()
+    synth.speak_text_async.side_effect = lambda text: \
+        synth.synthesis_completed.fire(MagicMock(reason="OK",
+                                                 audio_data=b"AUDIO"))
+
+    output = await SpeechService.text_to_audio_async("Hola")
+
+    assert output == b"AUDIO"
+    # Nunca se bloquea en el futuro del SDK
+    synth.speak_text_async.return_value.get.assert_not_called()
+
+
+@patch("app.services.speechService.speechsdk")
+async def test_text_to_audio_async_timeout_detiene_la_sintesis(mock_speechsdk):
+    synth = mock_speechsdk.SpeechSynthesizer.return_value
+    synth.synthesis_completed = FakeSignal()
+    synth.synthesis_canceled = FakeSignal()
+
+    with pytest.raises(TimeoutError):
+        await SpeechService.text_to_audio_async("Hola", timeout=0.05)
+
+    synth.stop_speaking_async.assert_called_once()
+
+
+@patch("app.services.speechService.speechsdk")
+async def test_audio_to_text_async_retorna_texto(mock_speechsdk):
+    mock_speechsdk.ResultReason.RecognizedSpeech = "OK"
+    recognizer = mock_speechsdk.SpeechRecognizer.return_value
+    recognizer.recognized = FakeSignal()
+    recognizer.canceled = FakeSignal()
+    recognizer.recognize_once_async.side_effect = lambda: \
+        recognizer.recognized.fire(MagicMock(reason="OK", text="Hola mundo"))
+
+    output = await SpeechService.audio_to_text_async(b"FakeWavData")
+
+    assert output == "Hola mundo"
+
+
+# --- Pruebas del pool de sintetizadores ---
+
+def _sintesis(mock_speechsdk, *reasons):
+    mock_speechsdk.ResultReason.SynthesizingAudioCompleted = "OK"
+    synth = mock_speechsdk.SpeechSynthesizer.return_value
+    synth.speak_text_async.return_value.get.side_effect = [
+        MagicMock(reason=reason, audio_data=b"AUDIO") for reason in reasons]
+
+
+@patch("app.services.speechService.speechsdk")
+def test_pool_reutiliza_el_sintetizador(mock_speechsdk):
+    _sintesis(mock_speechsdk, "OK", "OK", "OK")
+
+    for _ in range(3):
+        SpeechService.text_to_audio("Hola")
+
+    assert mock_speechsdk.SpeechSynthesizer.call_count == 1
+    stats = SpeechService.pool_stats()[SpeechService.formato_salida]
+    assert stats["reused"] == 2 and stats["idle"] == 1
+
+
+@patch("app.services.speechService.speechsdk")
+def test_pool_reemplaza_el_sintetizador_que_falla(mock_speechsdk):
+    mock_speechsdk.ResultReason.Canceled = "CANCEL"
+    _sintesis(mock_speechsdk, "CANCEL", "OK")
+
+    with pytest.raises(RuntimeError):
+        SpeechService.text_to_audio("Hola")
+    SpeechService.text_to_audio("Hola")
+
+    assert mock_speechsdk.SpeechSynthesizer.call_count == 2
+    stats = SpeechService.pool_stats()[SpeechService.formato_salida]
+    assert stats["discarded"] == 1 and stats["created"] == 1
+
+
+@patch("app.services.speechService.speechsdk")
+def test_precalentar_abre_las_conexiones(mock_speechsdk, monkeypatch):
+    monkeypatch.setattr(SpeechService, "pool_size", 3)
+
+    assert SpeechService.precalentar() == 3
+    assert SpeechService.precalentar() == 0
+
+    connection = mock_speechsdk.Connection.from_speech_synthesizer
+    assert connection.return_value.open.call_count == 3
+
+
+def test_pool_acotado_usa_temporales():
+    from services.synthesizerPool import SynthesizerPool
+    pool = SynthesizerPool(MagicMock, size=1)
+
+    with pool.prestar() as primero, pool.prestar() as segundo:
+        assert primero is not segundo
+    with pool.prestar() as tercero:
+        assert tercero is primero
+
+    stats = pool.stats()
+    assert stats["overflow"] == 1 and stats["created"] == 1
+
+
+# --- Pruebas de la entrada de audio en memoria ---
+
+def _wav(frames: bytes, sample_rate=8000, channels=1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+def test_leer_wav_usa_la_cabecera():
+    formato, pcm = SpeechService.leer_wav(_wav(b"\x01\x02" * 10,
+                                               sample_rate=8000, channels=2))
+
+    assert formato == (8000, 16, 2)
+    assert bytes(pcm) == b"\x01\x02" * 10
+
+
+def test_leer_wav_sin_cabecera_es_pcm_crudo():
+    formato, pcm = SpeechService.leer_wav(b"FakeWavData")
+
+    assert formato == (16000, 16, 1)
+    assert bytes(pcm) == b"FakeWavData"
+
+
+def test_leer_wav_rechaza_formatos_no_pcm():
+    wav = bytearray(_wav(b"\x00" * 8))
+    wav[20:22] = (3).to_bytes(2, "little")  # IEEE float
+
+    with pytest.raises(ValueError):
+        SpeechService.leer_wav(bytes(wav))
+
+
+@patch("app.services.speechService.speechsdk")
+def test_audio_to_text_no_usa_archivos(mock_speechsdk, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock_speechsdk.ResultReason.RecognizedSpeech = "OK"
+    recognizer = mock_speechsdk.SpeechRecognizer.return_value
+    recognizer.recognize_once_async.return_value.get.return_value = \
+        MagicMock(reason="OK", text="uno dos tres")
+
+    assert SpeechService.audio_to_text(_wav(b"\x00\x01" * 4)) == \
+        "uno dos tres"
+
+    audio = mock_speechsdk.audio
+    audio.AudioStreamFormat.assert_called_once_with(
+        samples_per_second=8000, bits_per_sample=16, channels=1)
+    audio.PushAudioInputStream.return_value.write.assert_called_once_with(
+        b"\x00\x01" * 4)
+    audio.PushAudioInputStream.return_value.close.assert_called_once()
+    assert list(tmp_path.iterdir()) == []
+
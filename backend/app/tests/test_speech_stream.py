@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from services.speechService import SpeechService
+
+client = TestClient(app)
+
+
+class Signal:
+    """Señal del SDK que dispara los callbacks en el mismo hilo."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+    def disconnect_all(self):
+        self.callbacks = []
+
+    def fire(self, **fields):
+        for callback in list(self.callbacks):
+            callback(MagicMock(**fields))
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    """Reconocedor simulado: una hipótesis parcial por trozo y la final
+    al cerrar el stream."""
+    monkeypatch.setenv("AZURE_KEY", "fake_key")
+    monkeypatch.setenv(
+        "AZURE_URL", "https://fake-region.api.cognitive.microsoft.com/")
+    SpeechService.cliente = None
+    with patch("services.speechService.speechsdk"), \
+            patch("services.speechStream.speechsdk") as mock_sdk:
+        mock_sdk.ResultReason.RecognizedSpeech = "OK"
+        recognizer = mock_sdk.SpeechRecognizer.return_value
+        for name in ("recognizing", "recognized", "canceled",
+                     "session_stopped"):
+            setattr(recognizer, name, Signal())
+
+        stream = mock_sdk.audio.PushAudioInputStream.return_value
+        heard = []
+
+        def write(chunk):
+            heard.append(chunk)
+            recognizer.recognizing.fire(result=MagicMock(text=f"{len(heard)}"))
+
+        def close():
+            recognizer.recognized.fire(
+                result=MagicMock(reason="OK", text="uno dos tres"))
+            recognizer.session_stopped.fire()
+
+        stream.write.side_effect = write
+        stream.close.side_effect = close
+        yield mock_sdk
+    SpeechService.cliente = None
+
+
+def test_stream_entrega_parciales_y_final(sdk):
+    with client.websocket_connect("/speech/stream?sample_rate=16000") as ws:
+        ws.send_bytes(b"\x00\x01" * 160)
+        assert ws.receive_json() == {"type": "partial", "text": "1"}
+        ws.send_bytes(b"\x00\x01" * 160)
+        assert ws.receive_json() == {"type": "partial", "text": "2"}
+        ws.send_text("end")
+
+        assert ws.receive_json() == {"type": "final", "text": "uno dos tres"}
+        assert ws.receive_json() == {"type": "end"}
+
+    recognizer = sdk.SpeechRecognizer.return_value
+    recognizer.stop_continuous_recognition_async.assert_called_once()
+    sdk.audio.AudioStreamFormat.assert_called_once_with(
+        samples_per_second=16000, bits_per_sample=16, channels=1)
+
+
+def test_stream_rechaza_audio_demasiado_largo(sdk, monkeypatch):
+    from services.speechStream import SpeechStream
+    monkeypatch.setattr(SpeechStream, "max_seconds", 0)
+
+    with client.websocket_connect("/speech/stream") as ws:
+        ws.send_bytes(b"\x00\x01")
+        assert ws.receive_json()["type"] == "error"
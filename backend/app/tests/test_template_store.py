@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+from unittest.mock import patch
+from services.templateStore import TemplateStore
+from services.imageService import ImageService
+
+
+def img_to_bytes(img):
+    success, buffer = cv2.imencode(".jpg", img)
+    return buffer.tobytes()
+
+
+def test_get_calcula_una_sola_vez_por_version():
+    """La segunda verificación con la misma foto no debe decodificarla."""
+    photo = img_to_bytes(np.full((40, 40, 3), 120, dtype=np.uint8))
+
+    with patch.object(ImageService, "prepare_template",
+                      wraps=ImageService.prepare_template) as spy:
+        first = TemplateStore.get(1, photo)
+        second = TemplateStore.get(1, photo)
+
+    assert first is second
+    assert spy.call_count == 1
+    assert TemplateStore.stats()["hits"] == 1
+    assert TemplateStore.stats()["misses"] == 1
+
+
+def test_get_recalcula_si_cambia_la_foto():
+    """Una foto nueva (otra versión) invalida la plantilla anterior."""
+    photo_a = img_to_bytes(np.full((40, 40, 3), 50, dtype=np.uint8))
+    photo_b = img_to_bytes(np.full((40, 40, 3), 200, dtype=np.uint8))
+
+    first = TemplateStore.get(1, photo_a)
+    second = TemplateStore.get(1, photo_b)
+
+    assert first is not second
+    assert TemplateStore.stats()["misses"] == 2
+
+
+def test_store_acepta_base64():
+    """store() precalcula la plantilla a partir de la foto en base64."""
+    import base64
+    photo = base64.b64encode(
+        img_to_bytes(np.full((40, 40, 3), 90, dtype=np.uint8))).decode()
+
+    stored = TemplateStore.store(3, photo)
+
+    assert TemplateStore.get(3, photo) is stored
+    assert TemplateStore.stats()["hits"] == 1
+
+
+def test_cache_acotada_expulsa_la_menos_usada(monkeypatch):
+    monkeypatch.setattr(TemplateStore, "max_entries", 2)
+    photo = img_to_bytes(np.full((20, 20, 3), 10, dtype=np.uint8))
+
+    TemplateStore.store(1, photo)
+    TemplateStore.store(2, photo)
+    TemplateStore.get(1, photo)      # 1 pasa a ser la más reciente
+    TemplateStore.store(3, photo)    # expulsa a 2
+
+    stats = TemplateStore.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    TemplateStore.get(2, photo)
+    assert TemplateStore.stats()["misses"] == 1
+
+
+def test_cache_acotada_en_bytes(monkeypatch):
+    monkeypatch.setattr(TemplateStore, "max_bytes", 1000)
+    photo = img_to_bytes(np.full((20, 20, 3), 10, dtype=np.uint8))  # 400 B
+    large = img_to_bytes(np.full((40, 40, 3), 10, dtype=np.uint8))  # 1600 B
+
+    TemplateStore.store(1, photo)
+    TemplateStore.store(2, photo)
+    TemplateStore.store(3, photo)    # expulsa a 1
+    TemplateStore.store(4, large)    # no cabe: no se guarda
+
+    stats = TemplateStore.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 800
+    assert stats["evictions"] == 1
+    TemplateStore.invalidate(2)
+    assert TemplateStore.stats()["bytes"] == 400
+
+
+def test_invalidate_elimina_la_entrada():
+    photo = img_to_bytes(np.full((20, 20, 3), 10, dtype=np.uint8))
+    TemplateStore.store(1, photo)
+
+    TemplateStore.invalidate(1)
+
+    assert TemplateStore.stats()["entries"] == 0
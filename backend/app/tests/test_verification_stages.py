@@ -0,0 +1,40 @@
+import pytest
+from services.verificationStages import VerificationStages
+
+
+def test_orden_por_defecto_pone_el_uniforme_antes_que_el_rostro():
+    order = VerificationStages.parse(VerificationStages.DEFAULT)
+
+    assert order.index("uniform") < order.index("face")
+    assert VerificationStages.steps(order) == [
+        ("validity",), ("document",), ("uniform", "face")]
+
+
+def test_etapas_de_imagen_separadas_por_document_no_se_agrupan():
+    order = VerificationStages.parse(
+        "validity, quality, document, uniform, face")
+
+    assert VerificationStages.steps(order) == [
+        ("validity",), ("quality",), ("document",), ("uniform", "face")]
+
+
+@pytest.mark.parametrize("spec", [
+    "validity,document,face,sharpness",   # etapa desconocida
+    "validity,document,face,face",        # repetida
+    "validity,document,uniform",          # falta el rostro
+    "document,validity,face",             # validity no va primero
+    "validity,face,document",             # rostro antes del trabajador
+])
+def test_ordenes_invalidos(spec):
+    with pytest.raises(ValueError):
+        VerificationStages.parse(spec)
+
+
+def test_contadores_de_costo_y_rechazo():
+    VerificationStages.record("uniform", 0.002, True)
+    VerificationStages.record("uniform", 0.004, False)
+
+    stats = VerificationStages.stats()["stages"]["uniform"]
+
+    assert stats == {"runs": 2, "rejections": 1, "rejection_rate": 0.5,
+                     "avg_ms": 3.0}
@@ -0,0 +1,172 @@
+import time
+from unittest.mock import AsyncMock, patch
+from services.workerIndex import WorkerIndex
+from services.workerManager import WorkerManager
+
+
+# ======================
+#        ÍNDICE
+# ======================
+
+def test_put_y_get_por_documento():
+    WorkerIndex.put({"id": 1, "document": "123", "photo": "x",
+                     "photo_ref": "ab"})
+
+    worker = WorkerIndex.get("123")
+
+    assert worker["id"] == 1
+    assert "photo" not in worker  # la foto está en el BlobStore
+    assert WorkerIndex.get("999") is None
+    assert WorkerIndex.stats()["hits"] == 1
+    assert WorkerIndex.stats()["misses"] == 1
+
+
+def test_foto_en_la_fila_se_guarda_como_huella():
+    from services.templateStore import TemplateStore
+    WorkerIndex.put({"id": 1, "document": "123", "photo": "x" * 1000})
+
+    worker = WorkerIndex.get("123")
+
+    assert "photo" not in worker
+    assert worker["photo_version"] == TemplateStore.photo_version("x" * 1000)
+
+
+def test_cambio_de_documento_y_discard():
+    WorkerIndex.put({"id": 1, "document": "123"})
+    WorkerIndex.put({"id": 1, "document": "456"})
+
+    assert WorkerIndex.get("123") is None
+    assert WorkerIndex.get("456")["id"] == 1
+
+    WorkerIndex.discard(1)
+    assert WorkerIndex.stats()["entries"] == 0
+
+
+def test_documento_duplicado_conserva_el_menor_id():
+    WorkerIndex.put({"id": 2, "document": "123"})
+    WorkerIndex.put({"id": 1, "document": "123"})
+    WorkerIndex.put({"id": 3, "document": "123"})
+
+    assert WorkerIndex.get("123")["id"] == 1
+    WorkerIndex.discard(2)  # ya no estaba indexado
+    assert WorkerIndex.get("123")["id"] == 1
+
+
+def test_lru_acotada(monkeypatch):
+    monkeypatch.setattr(WorkerIndex, "max_entries", 2)
+    WorkerIndex.put({"id": 1, "document": "1"})
+    WorkerIndex.put({"id": 2, "document": "2"})
+    WorkerIndex.get("1")
+    WorkerIndex.put({"id": 3, "document": "3"})  # expulsa al 2
+
+    assert WorkerIndex.get("2") is None
+    assert WorkerIndex.stats()["evictions"] == 1
+
+
+def test_fill_descarta_lecturas_anteriores_a_una_escritura():
+    generation = WorkerIndex.generation()
+    WorkerIndex.discard(1)  # p. ej. un delete mientras se leía la BD
+
+    assert WorkerIndex.fill({"id": 1, "document": "123"}, generation) is False
+    assert WorkerIndex.get("123") is None
+    assert WorkerIndex.stats()["stale_fills"] == 1
+
+    assert WorkerIndex.fill({"id": 1, "document": "123"},
+                            WorkerIndex.generation()) is True
+    assert WorkerIndex.get("123")["id"] == 1
+
+
+def test_entradas_vencen_con_el_ttl(monkeypatch):
+    monkeypatch.setattr(WorkerIndex, "ttl", 60)
+    WorkerIndex.put({"id": 1, "document": "123"})
+    assert WorkerIndex.get("123")["id"] == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert WorkerIndex.get("123") is None
+    assert WorkerIndex.stats()["expirations"] == 1
+    assert WorkerIndex.stats()["entries"] == 0
+
+
+# ======================
+#   WORKERS + ÍNDICE
+# ======================
+
+@patch("services.workerManager.SpeechService")
+async def test_verificacion_sin_consultas_a_la_bd(mock_speech, repo,
+                                                  jpeg_base64):
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    await repo.create_role({"name": "Operario", "color": "#FF0000"})
+    photo = jpeg_base64((0, 0, 255))
+    await WorkerManager.create("Alex", "123", 1, photo)
+    await WorkerManager.check_worker(123, photo)  # carga la caché de roles
+
+    with patch.object(repo, "get_workers_by_document") as by_document, \
+            patch.object(repo, "get_role_list") as role_list:
+        result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is True
+    by_document.assert_not_called()
+    role_list.assert_not_called()
+
+
+@patch("services.workerManager.SpeechService")
+async def test_sin_plantilla_la_foto_se_lee_por_id(mock_speech, repo,
+                                                   jpeg_base64):
+    from services.templateStore import TemplateStore
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    await repo.create_role({"name": "Operario", "color": "#FF0000"})
+    photo = jpeg_base64((0, 0, 255))
+    await WorkerManager.create("Alex", "123", 1, photo)
+    TemplateStore.clear()
+
+    with patch.object(repo, "get_workers_by_document") as by_document, \
+            patch.object(repo, "get_worker", wraps=repo.get_worker) as by_id:
+        first = await WorkerManager.check_worker(123, photo)
+        second = await WorkerManager.check_worker(123, photo)
+
+    assert first["match"] is True and second["match"] is True
+    by_document.assert_not_called()
+    by_id.assert_called_once_with(1)  # la segunda usa la plantilla en caché
+
+
+async def test_preload_index(repo, jpeg_base64):
+    from services.templateStore import TemplateStore
+    for i in range(3):
+        await repo.create_worker({"name": f"W{i}", "document": str(i),
+                                  "role": 1, "photo": jpeg_base64((0, 0, 255))})
+
+    loaded = await WorkerManager.preload_index(batch_size=2)
+
+    assert loaded == 3
+    assert WorkerIndex.get("2")["name"] == "W2"
+    assert TemplateStore.stats()["entries"] == 3
+
+
+async def test_indice_al_dia_con_update_y_delete(repo):
+    worker = await WorkerManager.create("Alex", "123", 1, "img.jpg")
+
+    await WorkerManager.update(worker["id"], document="456")
+    assert WorkerIndex.get("123") is None
+    assert WorkerIndex.get("456")["name"] == "Alex"
+
+    await WorkerManager.delete(worker["id"])
+    assert WorkerIndex.get("456") is None
+
+
+async def test_delete_durante_la_consulta_no_reindexa(repo):
+    worker = await WorkerManager.create("Alex", "123", 1, "img.jpg")
+    WorkerIndex.clear()
+    row = (await repo.get_workers_by_document("123")).data
+
+    async def lectura_lenta(document):
+        # La fila se leyó antes de que el delete llegara a la BD
+        await WorkerManager.delete(worker["id"])
+        return type("Response", (), {"data": row})()
+
+    with patch.object(repo, "get_workers_by_document", lectura_lenta):
+        assert (await WorkerManager._worker_by_document("123"))["id"] == 1
+
+    assert WorkerIndex.get("123") is None
+    assert await WorkerManager._worker_by_document("123") is None
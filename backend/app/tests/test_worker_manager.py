@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from services.workerManager import WorkerManager
 
 
@@ -14,14 +14,14 @@ class FakeResponse:
 # =========================================================
 # CREATE
 # =========================================================
-@patch("services.workerManager.Database")
-def test_create_worker(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_create_worker(mock_db):
 
     mock_db.create_worker.return_value = FakeResponse([
         {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": "img.jpg"}
     ])
 
-    worker = WorkerManager.create("Alex", "123", 2, "img.jpg")
+    worker = await WorkerManager.create("Alex", "123", 2, "img.jpg")
 
     assert worker["id"] == 1
     mock_db.create_worker.assert_called_once()
@@ -30,31 +30,67 @@ def test_create_worker(mock_db):
 # =========================================================
 # READ ALL
 # =========================================================
-@patch("services.workerManager.Database")
-def test_read_all_workers(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_read_all_workers(mock_db):
 
     mock_db.get_worker_list.return_value = FakeResponse([
         {"id": 1, "name": "Alex"},
         {"id": 2, "name": "Maria"}
     ])
 
-    workers = WorkerManager.read_all()
+    workers = await WorkerManager.read_all()
 
     assert len(workers) == 2
     mock_db.get_worker_list.assert_called_once()
 
 
+# =========================================================
+# LIST (proyección + paginación por cursor)
+# =========================================================
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_list_page_sin_foto_por_defecto(mock_db):
+
+    mock_db.list_workers.return_value = FakeResponse([
+        {"id": 3, "name": "Alex", "document": "123", "role": 1},
+        {"id": 8, "name": "Maria", "document": "456", "role": 2},
+    ])
+
+    workers, cursor = await WorkerManager.list_page(limit=2)
+
+    mock_db.list_workers.assert_called_once_with(
+        ["id", "name", "document", "role"], None, 2)
+    assert workers[0]["photo_url"] == "/workers/3/photo"
+    assert cursor == 8  # página llena → hay más
+
+
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_list_page_ultima_pagina(mock_db):
+
+    mock_db.list_workers.return_value = FakeResponse([{"id": 9, "name": "Ana"}])
+
+    workers, cursor = await WorkerManager.list_page(fields=["name"], after=8,
+                                                    limit=5)
+
+    mock_db.list_workers.assert_called_once_with(["id", "name"], 8, 5)
+    assert cursor is None
+
+
+async def test_list_page_rechaza_columnas_desconocidas():
+    with pytest.raises(ValueError):
+        await WorkerManager.list_page(fields=["name", "password"])
+
+
 # =========================================================
 # READ BY ID
 # =========================================================
-@patch("services.workerManager.Database")
-def test_read_by_id(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_read_by_id(mock_db):
 
     mock_db.get_worker.return_value = FakeResponse([
         {"id": 5, "name": "Mario"}
     ])
 
-    worker = WorkerManager.read_by_id(5)
+    worker = await WorkerManager.read_by_id(5)
 
     assert worker["id"] == 5
     mock_db.get_worker.assert_called_once_with(5)
@@ -63,35 +99,80 @@ def test_read_by_id(mock_db):
 # =========================================================
 # UPDATE
 # =========================================================
-@patch("services.workerManager.Database")
-def test_update_worker(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_worker(mock_db):
 
-    # Initial list
-    mock_db.get_worker_list.return_value = FakeResponse([
+    mock_db.get_worker.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 1, "photo": "a.jpg",
+         "version": 4},
+    ])
+    mock_db.update_worker_if_version.return_value = FakeResponse([
+        {"id": 1, "name": "ALEX-UPDATED", "document": "123", "role": 1,
+         "photo": "a.jpg", "version": 5},
+    ])
+
+    old_worker = await WorkerManager.update(1, name="ALEX-UPDATED", document="123")
+
+    assert old_worker["name"] == "Alex"
+    # Solo se envían las columnas que cambiaron, con la versión leída
+    mock_db.get_worker.assert_called_once_with(1)
+    mock_db.update_worker_if_version.assert_called_once_with(
+        1, {"name": "ALEX-UPDATED"}, 4)
+    mock_db.get_worker_list.assert_not_called()
+
+
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_worker_sin_cambios(mock_db):
+
+    mock_db.get_worker.return_value = FakeResponse([
         {"id": 1, "name": "Alex", "document": "123", "role": 1, "photo": "a.jpg"},
-        {"id": 2, "name": "Maria", "document": "456", "role": 2, "photo": "b.jpg"},
     ])
 
-    mock_db.update_worker.return_value = None
+    await WorkerManager.update(1, name="Alex")
 
-    old_worker = WorkerManager.update(1, name="ALEX-UPDATED")
+    mock_db.update_worker_if_version.assert_not_called()
 
-    assert old_worker["name"] == "Alex"
-    mock_db.update_worker.assert_called_once_with(
-        1,
-        {"id": 1, "name": "ALEX-UPDATED", "document": "123", "role": 1, "photo": "a.jpg"}
-    )
+
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_worker_conflicto(mock_db):
+    """Si otra petición cambió la fila, la versión no coincide."""
+    from services.workerManager import WorkerUpdateConflict
+
+    mock_db.get_worker.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 1, "photo": "a.jpg",
+         "version": 2},
+    ])
+    mock_db.update_worker_if_version.return_value = FakeResponse([])
+
+    with pytest.raises(WorkerUpdateConflict):
+        await WorkerManager.update(1, name="Otro")
+
+
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_worker_version_esperada_vencida(mock_db):
+    """El formulario se abrió con una versión anterior: no se escribe."""
+    from services.workerManager import WorkerUpdateConflict
+
+    mock_db.get_worker.return_value = FakeResponse([
+        {"id": 1, "name": "Alex A", "document": "123", "role": 1,
+         "photo": "a.jpg", "version": 1},
+    ])
+
+    with pytest.raises(WorkerUpdateConflict):
+        await WorkerManager.update(1, expected_version=0, name="Alex",
+                                   document="999")
+    mock_db.update_worker_if_version.assert_not_called()
 
 
 # =========================================================
 # UPDATE NOT FOUND
 # =========================================================
-@patch("services.workerManager.Database")
-def test_update_worker_not_found(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_update_worker_not_found(mock_db):
 
-    mock_db.get_worker_list.return_value = FakeResponse([])
+    mock_db.get_worker.return_value = FakeResponse([])
 
-    result = WorkerManager.update(99, name="New")
+    result = await WorkerManager.update(99, name="New")
 
     assert result["id"] == -1  # sentinel value
 
@@ -99,14 +180,14 @@ def test_update_worker_not_found(mock_db):
 # =========================================================
 # DELETE
 # =========================================================
-@patch("services.workerManager.Database")
-def test_delete_worker(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_delete_worker(mock_db):
 
     mock_db.delete_worker.return_value = FakeResponse([
         {"id": 1, "name": "Alex"}
     ])
 
-    worker = WorkerManager.delete(1)
+    worker = await WorkerManager.delete(1)
 
     assert worker["id"] == 1
     mock_db.delete_worker.assert_called_once_with(1)
@@ -115,12 +196,316 @@ def test_delete_worker(mock_db):
 # =========================================================
 # DELETE NOT FOUND
 # =========================================================
-@patch("services.workerManager.Database")
-def test_delete_worker_not_found(mock_db):
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_delete_worker_not_found(mock_db):
 
     mock_db.delete_worker.return_value = FakeResponse([])
 
-    worker = WorkerManager.delete(7)
+    worker = await WorkerManager.delete(7)
 
     assert worker["id"] == 7
     assert worker["name"] == "Null"
+
+
+# =========================================================
+# CHECK WORKER
+# =========================================================
+@patch("services.workerManager.SpeechService")
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_en_el_pool_de_procesos(mock_db, mock_speech,
+                                                    monkeypatch):
+    """Al proceso viaja la plantilla reducida, no la foto completa."""
+    import base64
+    import cv2
+    import numpy as np
+    from core.executor import ComputeExecutor
+    from services.templateStore import TemplateStore
+    from services.verificationStages import VerificationStages
+
+    rng = np.random.default_rng(0)
+    photo = cv2.resize(rng.integers(0, 256, (60, 80, 3), dtype=np.uint8),
+                       (1600, 1200))
+    enrolled = base64.b64encode(cv2.imencode(".jpg", photo)[1]).decode()
+    probe = cv2.imencode(".jpg", cv2.resize(photo, (320, 240)))[1].tobytes()
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2,
+         "photo": enrolled}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    monkeypatch.setattr(VerificationStages, "order",
+                        ("validity", "document", "face"))
+    monkeypatch.setattr(ComputeExecutor, "processes", 1)
+
+    shipped = []
+    run_cpu = ComputeExecutor.run_cpu
+
+    async def spy(fn, *args, **kwargs):
+        shipped.extend(a for a in args if hasattr(a, "gray"))
+        return await run_cpu(fn, *args, **kwargs)
+
+    ComputeExecutor.shutdown()
+    try:
+        with patch.object(ComputeExecutor, "run_cpu", spy):
+            result = await WorkerManager.check_worker_bytes(123, probe)
+            again = await WorkerManager.check_worker_bytes(123, probe)
+    finally:
+        ComputeExecutor.shutdown()
+
+    assert result["match"] is True and again["match"] is True
+    assert [t.gray.shape for t in shipped] == [(240, 320), (240, 320)]
+    cached = TemplateStore.lookup(1, TemplateStore.photo_version(enrolled))
+    assert cached.gray.shape == (1200, 1600)
+    assert cached.resized((240, 320)) is shipped[0].gray
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_exitoso(mock_db, mock_role_db, mock_speech,
+                                    jpeg_base64):
+    photo = jpeg_base64((0, 0, 255))
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": photo}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#FF0000"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker(123, photo)
+    again = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is True and again["match"] is True
+    # El color del rol sale de la caché de RoleManager: una sola carga
+    mock_role_db.get_role_list.assert_called_once()
+    mock_role_db.get_role.assert_not_called()
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_documento_inexistente(mock_db, mock_speech,
+                                                  jpeg_base64):
+    mock_db.get_workers_by_document.return_value = FakeResponse([])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker(999, jpeg_base64((0, 0, 255)))
+
+    assert result["match"] is False
+    mock_db.get_role.assert_not_called()
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_imagen_demasiado_grande(mock_db, mock_speech,
+                                                   monkeypatch, jpeg_base64):
+    from services.imageUtils import ImageUtils
+    monkeypatch.setattr(ImageUtils, "max_image_bytes", 100)
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker(123, jpeg_base64((0, 0, 255)))
+
+    assert result["match"] is False
+    mock_speech.text_to_audio_async.assert_awaited_once_with(
+        "La imagen recibida supera el tamaño máximo permitido.")
+    mock_db.get_workers_by_document.assert_not_called()
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_concurrente(mock_db, mock_role_db, mock_speech,
+                                        monkeypatch, jpeg_base64):
+    monkeypatch.setattr(WorkerManager, "concurrent_checks", True)
+    photo = jpeg_base64((0, 0, 255))
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": photo}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#FF0000"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is True
+    mock_speech.text_to_audio_async.assert_awaited_once_with(
+        WorkerManager.greeting("Alex"))
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_concurrente_cancela_al_primer_rechazo(
+        mock_db, mock_role_db, mock_speech, monkeypatch, jpeg_base64):
+    import asyncio
+    monkeypatch.setattr(WorkerManager, "concurrent_checks", True)
+    photo = jpeg_base64((0, 0, 255))
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": photo}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#00FF00"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    # La plantilla nunca llega: el rechazo del uniforme no la espera
+    template_started = asyncio.Event()
+
+    async def slow_template(worker):
+        template_started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(WorkerManager, "_template_for", slow_template)
+
+    result = await asyncio.wait_for(WorkerManager.check_worker(123, photo), 5)
+
+    assert template_started.is_set()
+    assert result["match"] is False
+    mock_speech.text_to_audio_async.assert_awaited_once_with(
+        WorkerManager.MESSAGES["uniform_mismatch"])
+
+
+@pytest.mark.parametrize("order, runs_face", [
+    ("validity,document,uniform,face", False),
+    ("validity,document,face,uniform", True),
+])
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_respeta_el_orden_de_etapas(
+        mock_db, mock_role_db, mock_speech, monkeypatch, order, runs_face,
+        jpeg_base64):
+    from services.verificationStages import VerificationStages
+    monkeypatch.setattr(VerificationStages, "order",
+                        VerificationStages.parse(order))
+    photo = jpeg_base64((0, 0, 255))
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": photo}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#00FF00"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is False
+    stages = VerificationStages.stats()["stages"]
+    assert stages["uniform"]["rejections"] == 1
+    assert ("face" in stages) is runs_face
+    assert stages["document"]["runs"] == 1
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_imagen_ilegible_cuenta_una_validez(
+        mock_db, mock_role_db, mock_speech, jpeg_base64):
+    from services.verificationStages import VerificationStages
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2,
+         "photo": jpeg_base64((0, 0, 255))}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#FF0000"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    result = await WorkerManager.check_worker_bytes(123, b"no es una imagen")
+
+    assert result["match"] is False
+    validity = VerificationStages.stats()["stages"]["validity"]
+    assert (validity["runs"], validity["rejections"]) == (1, 1)
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_check_worker_uniforme_rechaza_sin_cargar_la_plantilla(
+        mock_db, mock_role_db, mock_speech, monkeypatch, jpeg_base64):
+    from services.templateStore import TemplateStore
+    from services.verificationStages import VerificationStages
+    photo = jpeg_base64((0, 0, 255))
+    mock_db.get_workers_by_document.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 2, "photo": photo}
+    ])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#00FF00"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+    template_for = AsyncMock()
+    monkeypatch.setattr(WorkerManager, "_template_for", template_for)
+
+    result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is False
+    template_for.assert_not_awaited()
+    assert TemplateStore.lookup(1, TemplateStore.photo_version(photo)) is None
+    validity = VerificationStages.stats()["stages"]["validity"]
+    assert (validity["runs"], validity["rejections"]) == (1, 0)
+
+
+# =========================================================
+# SALUDO PERSONALIZADO
+# =========================================================
+@patch("services.workerManager.SpeechService")
+@patch("services.roleManager.AsyncDatabase", new_callable=AsyncMock)
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_saludo_se_renderiza_al_crear(mock_db, mock_role_db, mock_speech,
+                                            monkeypatch, jpeg_base64):
+    monkeypatch.setattr(WorkerManager, "greeting_prerender", True)
+    photo = jpeg_base64((0, 0, 255))
+    worker = {"id": 1, "name": "Alex", "document": "123", "role": 2,
+              "photo": photo}
+    mock_db.create_worker.return_value = FakeResponse([worker])
+    mock_db.get_workers_by_document.return_value = FakeResponse([worker])
+    mock_role_db.get_role_list.return_value = FakeResponse([
+        {"id": 2, "name": "Operario", "color": "#FF0000"}
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    await WorkerManager.create("Alex", "123", 2, photo)
+    await WorkerManager.drain_background()
+    mock_speech.text_to_audio_async.assert_awaited_once_with(
+        WorkerManager.greeting("Alex"))
+
+    result = await WorkerManager.check_worker(123, photo)
+
+    assert result["match"] is True
+    # La verificación tomó el saludo de la caché
+    mock_speech.text_to_audio_async.assert_awaited_once()
+
+
+@patch("services.workerManager.SpeechService")
+@patch("services.workerManager.AsyncDatabase", new_callable=AsyncMock)
+async def test_saludo_solo_si_cambia_el_nombre(mock_db, mock_speech,
+                                               monkeypatch):
+    monkeypatch.setattr(WorkerManager, "greeting_prerender", True)
+    mock_db.get_worker.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "123", "role": 1, "version": 0},
+    ])
+    mock_db.update_worker_if_version.return_value = FakeResponse([
+        {"id": 1, "name": "Alex", "document": "999", "role": 1, "version": 1},
+    ])
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    await WorkerManager.update(1, document="999")
+    await WorkerManager.update(1, name="Alejandro")
+    await WorkerManager.drain_background()
+
+    mock_speech.text_to_audio_async.assert_awaited_once_with(
+        WorkerManager.greeting("Alejandro"))
+
+
+@patch("services.workerManager.SpeechService")
+async def test_saludo_en_los_formatos_prerenderizados(mock_speech,
+                                                      monkeypatch):
+    mp3 = "Audio16Khz32KBitRateMonoMp3"
+    monkeypatch.setattr(WorkerManager, "prerender_formats", (mp3,))
+    mock_speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+
+    await WorkerManager._render_greeting("Alex")
+
+    assert mock_speech.text_to_audio_async.await_count == 2
+    mock_speech.text_to_audio_async.assert_awaited_with(
+        WorkerManager.greeting("Alex"), formato=mp3)
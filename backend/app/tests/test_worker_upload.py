@@ -0,0 +1,223 @@
+import base64
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def sin_audio_real(repo):
+    """API sobre SQLite en memoria (fixture repo), sin audio real."""
+    with patch("services.workerManager.SpeechService") as speech:
+        speech.text_to_audio_async = AsyncMock(return_value=b"AUDIO")
+        yield
+
+
+async def _enroll(repo, photo: bytes):
+    await repo.create_role({"name": "Operario", "color": "#FF0000"})
+    response = client.post(
+        "/workers/upload",
+        data={"name": "Alex", "document": "123", "role": "1"},
+        files={"photo": ("alex.jpg", photo, "image/jpeg")})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_enrolamiento_multipart(repo, jpeg):
+    photo = jpeg((0, 0, 255))
+
+    worker = await _enroll(repo, photo)
+
+    row = (await repo.get_worker(worker["id"])).data[0]
+    assert base64.b64decode(row["photo"]) == photo
+    assert base64.b64decode(worker["photo"]) == photo
+
+
+async def test_enrolamiento_multipart_con_blob_store(repo, blob_store, jpeg):
+    photo = jpeg((0, 0, 255))
+
+    worker = await _enroll(repo, photo)
+
+    row = (await repo.get_worker(worker["id"])).data[0]
+    assert row["photo"] is None and row["photo_ref"]
+    assert base64.b64decode(worker["photo"]) == photo
+
+
+async def test_verify_octet_stream(repo, jpeg):
+    photo = jpeg((0, 0, 255))
+    await _enroll(repo, photo)
+
+    response = client.post("/workers/verify/123", content=photo,
+                           headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 200
+    assert response.json()["match"] is True
+
+
+async def test_verify_multipart_documento_inexistente(repo, jpeg):
+    response = client.post(
+        "/workers/verify/999",
+        files={"photo": ("probe.jpg", jpeg((0, 0, 255)), "image/jpeg")})
+
+    assert response.status_code == 200
+    assert response.json()["match"] is False
+
+
+async def test_verify_bytes_que_no_son_imagen(repo, jpeg):
+    from services.verificationStages import VerificationStages
+    await _enroll(repo, jpeg((0, 0, 255)))
+
+    response = client.post("/workers/verify/123", content=b"\x00" * 64,
+                           headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 200
+    assert response.json()["match"] is False
+    validity = VerificationStages.stats()["stages"]["validity"]
+    assert validity["rejections"] == 1
+
+
+def test_verify_tipo_no_soportado():
+    response = client.post("/workers/verify/123", content=b"{}",
+                           headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 415
+
+
+async def test_reemplazar_foto_en_binario(repo, jpeg):
+    worker = await _enroll(repo, jpeg((0, 0, 255)))
+    new_photo = jpeg((255, 0, 0))
+
+    response = client.put(f"/workers/{worker['id']}/photo", content=new_photo,
+                          headers={"Content-Type": "image/jpeg"})
+
+    assert response.status_code == 200
+    row = (await repo.get_worker(worker["id"])).data[0]
+    assert row["version"] == 1
+    assert client.get(f"/workers/{worker['id']}/photo").content == new_photo
+
+
+async def test_ediciones_concurrentes_de_dos_administradores(repo):
+    await repo.create_worker({"name": "Alex", "document": "123", "role": 1,
+                              "photo": "img.jpg"})
+    # Ambos administradores abren el formulario con la misma versión
+    form = client.get("/workers/1").json()
+    assert form["version"] == 0
+
+    admin_a = client.put("/workers/1", json=dict(form, name="Alex A"))
+    admin_b = client.put("/workers/1", json=dict(form, document="999"))
+
+    assert admin_a.status_code == 200
+    assert admin_b.status_code == 409
+    row = (await repo.get_worker(1)).data[0]
+    assert (row["name"], row["document"], row["version"]) == ("Alex A", "123", 1)
+
+
+async def test_edicion_con_if_match(repo):
+    await repo.create_worker({"name": "Alex", "document": "123", "role": 1,
+                              "photo": "img.jpg"})
+    body = {"name": "Alex A", "document": "123", "role": 1, "photo": "img.jpg"}
+
+    stale = client.put("/workers/1", json=body, headers={"If-Match": '"7"'})
+    fresh = client.put("/workers/1", json=body, headers={"If-Match": '"0"'})
+    invalid = client.put("/workers/1", json=body, headers={"If-Match": "*"})
+
+    assert stale.status_code == 409
+    assert fresh.status_code == 200
+    assert invalid.status_code == 400
+
+
+def test_foto_demasiado_grande(monkeypatch):
+    from services.imageUtils import ImageUtils
+    monkeypatch.setattr(ImageUtils, "max_image_bytes", 100)
+
+    response = client.post("/workers/verify/123", content=b"\xff" * 20000,
+                           headers={"Content-Type": "application/octet-stream"})
+    json_response = client.post(
+        "/workers/", json={"name": "A", "document": "1", "role": 1,
+                           "photo": "A" * 1000})
+
+    assert response.status_code == 413
+    assert json_response.status_code == 413
+
+
+def test_enrolamiento_multipart_demasiado_grande(monkeypatch):
+    """El formulario se corta antes de leer la foto completa."""
+    from services.imageUtils import ImageUtils
+    from services.workerManager import WorkerManager
+    monkeypatch.setattr(ImageUtils, "max_image_bytes", 100)
+
+    with patch.object(WorkerManager, "create") as create:
+        response = client.post(
+            "/workers/upload",
+            data={"name": "Alex", "document": "123", "role": "1"},
+            files={"photo": ("alex.jpg", b"\xff" * 40000, "image/jpeg")})
+
+    assert response.status_code == 413
+    create.assert_not_called()
+
+
+def test_enrolamiento_multipart_campos_invalidos():
+    response = client.post(
+        "/workers/upload", data={"name": "Alex", "role": "uno"},
+        files={"photo": ("alex.jpg", b"\xff", "image/jpeg")})
+
+    assert response.status_code == 422
+
+
+def test_foto_chunked_demasiado_grande(monkeypatch):
+    """Sin Content-Length el cuerpo se corta al pasar el límite."""
+    from services.imageUtils import ImageUtils
+    monkeypatch.setattr(ImageUtils, "max_image_bytes", 100)
+
+    def chunks():
+        for _ in range(1000):
+            yield b"\xff" * 64
+
+    response = client.post("/workers/verify/123", content=chunks(),
+                           headers={"Content-Type": "application/octet-stream"})
+    multipart = client.post(
+        "/workers/verify/123", content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=x"})
+
+    assert response.status_code == 413
+    assert multipart.status_code == 413
+
+
+async def test_verify_audio_por_referencia(repo, jpeg):
+    await _enroll(repo, jpeg((0, 0, 255)))
+
+    response = client.post("/workers/verify/999?audio=ref", content=b"\xff",
+                           headers={"Content-Type": "image/jpeg"})
+
+    body = response.json()
+    assert body["audio_url"] == f"/audio/{body['message']}"
+    audio = client.get(body["audio_url"])
+    assert audio.status_code == 200
+    assert audio.content == b"AUDIO"
+    assert audio.headers["etag"] == f'"{body["message"]}"'
+    assert "immutable" in audio.headers["cache-control"]
+
+    cached = client.get(body["audio_url"],
+                        headers={"If-None-Match": audio.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_audio_desconocido():
+    assert client.get("/audio/no-es-un-id").status_code == 404
+    assert client.get("/audio/" + "0" * 64).status_code == 404
+
+
+async def test_verify_negocia_formato_comprimido(repo):
+    with patch("services.workerManager.SpeechService") as speech:
+        speech.formato_salida = "Riff16Khz16BitMonoPcm"
+        speech.text_to_audio_async = AsyncMock(return_value=b"OggS")
+        response = client.post(
+            "/workers/verify/999", content=b"\xff",
+            headers={"Content-Type": "image/jpeg",
+                     "Accept": "application/json, audio/ogg"})
+
+    assert response.json()["audio_type"] == "audio/ogg"
+    _, kwargs = speech.text_to_audio_async.call_args
+    assert kwargs == {"formato": "Ogg16Khz16BitMonoOpus"}
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark: SSIM de ImageService frente a skimage.
+
+Uso (desde backend/):
+    python benchmarks/ssim_benchmark.py
+"""
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+from skimage.metrics import structural_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from services.imageService import ImageService  # noqa: E402
+
+SIZES = [(320, 240), (640, 480), (1280, 960)]
+REPEAT = 5
+
+
+def best_ms(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=REPEAT)) / number * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'tamaño':>10} {'skimage (ms)':>14} {'ImageService (ms)':>18} {'speedup':>8}")
+
+    for width, height in SIZES:
+        img1 = rng.integers(0, 256, (height, width), dtype=np.uint8)
+        img2 = cv2.GaussianBlur(img1, (5, 5), 1.5)
+        number = max(1, 2_000_000 // (width * height))
+
+        reference = best_ms(
+            lambda: structural_similarity(img1, img2, full=True), number)
+        fast = best_ms(lambda: ImageService.ssim(img1, img2), number)
+
+        size = f"{width}x{height}"
+        print(f"{size:>10} {reference:>14.2f} {fast:>18.2f} "
+              f"{reference / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
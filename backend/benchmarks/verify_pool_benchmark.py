@@ -0,0 +1,60 @@
+"""
+Benchmark: etapa del rostro de run_stages a través del pool de procesos,
+enviando la plantilla completa frente a la reducida (FaceTemplate.for_shape).
+
+Uso (desde backend/):
+    python benchmarks/verify_pool_benchmark.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from core.executor import ComputeExecutor  # noqa: E402
+from services.imageService import ImageService  # noqa: E402
+
+TEMPLATE_SIZE = (4000, 3000)  # ~12 MP
+PROBE_SIZE = (640, 480)
+ROUNDS = 20
+
+
+async def best_ms(probe: bytes, template) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await ComputeExecutor.run_cpu(ImageService.run_stages, probe,
+                                      ["face"], template, None)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+async def main():
+    ComputeExecutor.processes = max(ComputeExecutor.processes, 1)
+    ComputeExecutor.start()
+
+    rng = np.random.default_rng(0)
+    photo = cv2.resize(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8),
+                       TEMPLATE_SIZE)
+    template = ImageService.prepare_template(
+        cv2.imencode(".jpg", photo)[1].tobytes())
+    probe = cv2.imencode(".jpg", cv2.resize(photo, PROBE_SIZE))[1].tobytes()
+
+    full = await best_ms(probe, template)
+    shape = ImageService.probe_shape(probe)
+    slim = await best_ms(probe, template.for_shape(
+        shape, ImageService.cascade_levels))
+
+    size = "x".join(map(str, TEMPLATE_SIZE))
+    print(f"plantilla {size}, imagen {PROBE_SIZE[0]}x{PROBE_SIZE[1]}")
+    print(f"{'completa (ms)':>14} {'reducida (ms)':>14} {'speedup':>8}")
+    print(f"{full:>14.2f} {slim:>14.2f} {full / slim:>7.1f}x")
+    ComputeExecutor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -42,7 +42,7 @@ const WorkerAuth = () => {
     setNotification({ icon, title, content, type });
   };
 
-  const playAudioBase64 = (base64Audio) => {
+  const playAudioBase64 = (base64Audio, audioType = "audio/wav") => {
     try {
       if (!base64Audio || base64Audio.trim() === "") {
         return;
@@ -55,7 +55,7 @@ const WorkerAuth = () => {
         bytes[i] = binaryString.charCodeAt(i);
       }
 
-      const blob = new Blob([bytes], { type: "audio/wav" });
+      const blob = new Blob([bytes], { type: audioType });
       const audioUrl = URL.createObjectURL(blob);
       const audio = new Audio(audioUrl);
 
@@ -190,14 +190,14 @@ const WorkerAuth = () => {
     setNotification(null);
 
     try {
-      // Extraer solo la parte base64 (sin el prefijo data:image/jpeg;base64,)
-      const base64Image = image.split(",")[1] || image;
+      // La captura (data URL) se envía en binario, sin base64 en JSON
+      const photoBlob = await (await fetch(image)).blob();
 
-      const result = await workersApi.verify(cedula, base64Image);
+      const result = await workersApi.verifyBinary(cedula, photoBlob);
 
       // Reproducir audio si viene en el message
       if (result.message) {
-        playAudioBase64(result.message);
+        playAudioBase64(result.message, result.audio_type || undefined);
       }
 
       if (result.match === true) {
@@ -118,13 +118,23 @@ function Workers() {
 
   // --- HANDLERS TRABAJADORES ---
 
-  const handleView = (row) => {
-    setSelectedWorker(row);
+  // El listado no trae la foto: se carga el detalle al abrir el modal
+  const loadWorkerDetail = async (row) => {
+    try {
+      return await workersApi.getById(row.id);
+    } catch (error) {
+      console.error("Error loading worker detail:", error);
+      return row;
+    }
+  };
+
+  const handleView = async (row) => {
+    setSelectedWorker(await loadWorkerDetail(row));
     setShowViewModal(true);
   };
 
-  const handleEdit = (row) => {
-    setSelectedWorker(row);
+  const handleEdit = async (row) => {
+    setSelectedWorker(await loadWorkerDetail(row));
     setShowEditModal(true);
   };
 
@@ -180,7 +190,10 @@ function Workers() {
 
   const handleUpdateWorker = async (formData) => {
     try {
-      await workersApi.update(selectedWorker.id, formData);
+      await workersApi.update(selectedWorker.id, {
+        ...formData,
+        version: selectedWorker.version,
+      });
       showNotification(
         "✏️",
         "Trabajador actualizado",
@@ -194,7 +207,7 @@ function Workers() {
       showNotification(
         "❌",
         "Error",
-        "No se pudo actualizar el trabajador",
+        error.message || "No se pudo actualizar el trabajador",
         "error"
       );
       console.error("Error updating worker:", error);
@@ -1,19 +1,30 @@
 const API_URL = import.meta.env.VITE_API_URL || "https://worker-backend-tj2y.onrender.com";
+const WORKERS_PAGE_SIZE = 200;
 
 // ============================================================
 // WORKERS API
 // ============================================================
 
 export const workersApi = {
-  // Obtener todos los trabajadores
+  // Obtener todos los trabajadores (sin foto), recorriendo las páginas
+  // con el cursor que el backend envía en el header X-Next-Cursor
   getAll: async () => {
-    const response = await fetch(`${API_URL}/workers/`);
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      console.error("Error response:", errorData);
-      throw new Error(errorData.detail || "Error al obtener trabajadores");
-    }
-    return response.json();
+    const workers = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ limit: WORKERS_PAGE_SIZE });
+      if (cursor) params.set("after", cursor);
+
+      const response = await fetch(`${API_URL}/workers/?${params}`);
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        console.error("Error response:", errorData);
+        throw new Error(errorData.detail || "Error al obtener trabajadores");
+      }
+      workers.push(...(await response.json()));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return workers;
   },
 
   // Obtener un trabajador por ID
@@ -68,6 +79,9 @@ export const workersApi = {
       document: workerData.documentId || "",
       role: workerData.role ? parseInt(workerData.role) : 1,
       photo: workerData.photo || "",
+      // Versión cargada al abrir el formulario: si otro administrador
+      // guardó antes, el backend responde 409 en lugar de sobrescribirlo
+      version: workerData.version ?? null,
     };
 
     console.log("Update payload being sent:", payload);
@@ -100,6 +114,28 @@ export const workersApi = {
     return response.json();
   },
 
+  // Verificar autenticación con la foto en binario (Blob, sin base64)
+  verifyBinary: async (cc, photoBlob) => {
+    const response = await fetch(
+      `${API_URL}/workers/verify/${parseInt(cc)}`,
+      {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/octet-stream",
+          // Audio comprimido (MP3) en lugar de WAV: ~10x menos bytes
+          Accept: "application/json, audio/mpeg",
+        },
+        body: photoBlob,
+      }
+    );
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      console.error("Error response:", errorData);
+      throw new Error(errorData.detail || "Error al verificar trabajador");
+    }
+    return response.json();
+  },
+
   // Verificar autenticación de trabajador
   verify: async (cc, photo) => {
     const payload = {